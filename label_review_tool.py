@@ -14,6 +14,7 @@ def main(subcommand: str, args: Dict[str, Any]):
             metadata_path=args["metadata"],
             text_dir=args["text"],
             clean=args["clean"],
+            cache_dir=args["cache"],
         )
     elif subcommand == "secExplorer":
         annotate_sections(data_path=args["data"], prev_length=args["prevlen"])
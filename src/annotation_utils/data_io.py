@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import warnings
 
 
@@ -8,30 +9,145 @@ class IncorrectFileTypeWarning(UserWarning):
     pass
 
 
-def pandas_from_path(path: Path) -> pd.DataFrame:
+Filters = List[Tuple[str, str, Any]]
+
+CSV_TYPES = (".csv",)
+PICKLE_TYPES = (".pickle", ".pkl")
+PARQUET_TYPES = (".parquet", ".pq")
+FEATHER_TYPES = (".feather", ".arrow")
+
+_FILTER_OPS: Dict[str, Callable[[pd.Series, Any], pd.Series]] = {
+    "=": lambda col, value: col == value,
+    "==": lambda col, value: col == value,
+    "!=": lambda col, value: col != value,
+    "<": lambda col, value: col < value,
+    "<=": lambda col, value: col <= value,
+    ">": lambda col, value: col > value,
+    ">=": lambda col, value: col >= value,
+    "in": lambda col, value: col.isin(value),
+    "not in": lambda col, value: ~col.isin(value),
+}
+
+
+def _expected_types() -> str:
+    types = CSV_TYPES + PICKLE_TYPES + PARQUET_TYPES + FEATHER_TYPES
+    return ", ".join(types[:-1]) + f", or {types[-1]}"
+
+
+def apply_filters(data: pd.DataFrame, filters: Filters) -> pd.DataFrame:
+    """
+    Keep the rows matching all filters, e.g. [("UID", "in", uids)], like the filters
+    of pd.read_parquet().
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The data.
+    filters : Filters
+        (column, operator, value) tuples. Operators: =, ==, !=, <, <=, >, >=, in and
+        not in.
+
+    Returns
+    -------
+    pd.DataFrame
+        The matching rows.
+    """
+    mask = pd.Series(True, index=data.index)
+    for col, op, value in filters:
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        mask &= _FILTER_OPS[op](data[col], value).fillna(False).astype(bool)
+    return data[mask]
+
+
+def restore_list_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn list columns (e.g. annotated_labels or tokens), which Parquet and Feather
+    return as arrays, back into lists.
+    """
+    for col in data.columns:
+        if data[col].dtype != object:
+            continue
+        values = data[col].dropna()
+        if len(values) and isinstance(values.iloc[0], np.ndarray):
+            data[col] = [
+                v.tolist() if isinstance(v, np.ndarray) else v for v in data[col]
+            ]
+    return data
+
+
+def pandas_from_path(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Filters] = None,
+) -> pd.DataFrame:
+    """
+    Read a DataFrame from a CSV, pickle, Parquet or Feather file.
+
+    Parquet and Feather keep dtypes (e.g. Int16, boolean and categoricals) and list
+    columns. Parquet reads only the requested columns and skips row groups which
+    cannot match the filters; other formats are read whole and then filtered.
+
+    Parameters
+    ----------
+    path : Path
+        The file, whose suffix determines its format.
+    columns : Optional[List[str]], optional
+        Columns to read, by default None (all)
+    filters : Optional[Filters], optional
+        Rows to read, see apply_filters(), by default None (all)
+
+    Returns
+    -------
+    pd.DataFrame
+        The data.
+    """
     file_type = path.suffix
-    if ".csv" == file_type:
-        data = pd.read_csv(path)
-    elif file_type in (".pickle", ".pkl"):
+    read_columns = columns
+    if (columns is not None) and filters:
+        # Columns only used to filter are read, then dropped
+        filter_columns = [f[0] for f in filters if f[0] not in columns]
+        read_columns = columns + list(dict.fromkeys(filter_columns))
+
+    if file_type in CSV_TYPES:
+        data = pd.read_csv(path, usecols=read_columns)
+    elif file_type in PICKLE_TYPES:
         data = pd.read_pickle(path)
+    elif file_type in PARQUET_TYPES:
+        data = pd.read_parquet(path, columns=columns, filters=filters)
+        filters = None
+    elif file_type in FEATHER_TYPES:
+        data = pd.read_feather(path, columns=read_columns)
     else:
         warnings.warn(
-            message=f"Expected .csv, .pkl, or .pickle, got: {file_type}",
+            message=f"Expected {_expected_types()}, got: {file_type}",
             category=IncorrectFileTypeWarning,
         )
 
+    if filters:
+        data = apply_filters(data, filters)
+    if columns is not None:
+        data = data[columns]
+    if file_type in PARQUET_TYPES + FEATHER_TYPES:
+        data = restore_list_columns(data)
+
     return data
 
 
 def save_pandas_to_path(data: pd.DataFrame, path: Path) -> pd.DataFrame:
     file_type = path.suffix
-    if ".csv" == file_type:
+    if file_type in CSV_TYPES:
         data.to_csv(path, sep=",", index=False)
-    elif file_type in (".pickle", ".pkl"):
+    elif file_type in PICKLE_TYPES:
         data.to_pickle(path)
+    elif file_type in PARQUET_TYPES:
+        data.to_parquet(path, index=False)
+    elif file_type in FEATHER_TYPES:
+        # Feather can't store an index
+        data.reset_index(drop=True).to_feather(path)
     else:
         warnings.warn(
-            message=f"Expected .csv, .pkl, or .pickle, got: {file_type}",
+            message=f"Expected {_expected_types()}, got: {file_type}",
             category=IncorrectFileTypeWarning,
         )
 
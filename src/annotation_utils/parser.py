@@ -47,6 +47,15 @@ def build_ingest_command(subparsers: argparse._SubParsersAction):
     subparser.add_argument(
         "--clean", action="store_true", help="Clean text before displaying"
     )
+    subparser.add_argument(
+        "-c",
+        "--cache",
+        dest="cache",
+        type=Path,
+        required=False,
+        default=None,
+        help="Path to a directory for caching web requests",
+    )
 
 
 def build_section_explorer(subparsers: argparse._SubParsersAction):
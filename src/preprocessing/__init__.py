@@ -8,5 +8,6 @@ from .praw_processing import (
     filter_simple_cmt_issues,
 )
 from .markdown_handling import get_section_df, sections_df_to_docs
+from .section_store import SectionStore, build_section_store
 
 from .text_cleaning import data_io as data_io
\ No newline at end of file
@@ -1,10 +1,11 @@
 from pathlib import Path
-import shutil
-from nltk.corpus.reader.markdown import CategorizedMarkdownCorpusReader, MarkdownSection
-from typing import List, Sequence, Dict
+from concurrent.futures import ProcessPoolExecutor
+from nltk.corpus.reader.markdown import MarkdownSection
+from typing import List, Optional, Sequence, Dict
 import pandas as pd
-from collections import defaultdict, namedtuple
+from collections import namedtuple
 from .text_cleaning.credit_identification_helpers import check_if_credit
+from .text_cleaning.markup_style_cleaning import MD_PARSER
 
 Image = namedtuple("Image", "label src title")
 Link = namedtuple("Link", "label href title")
@@ -100,7 +101,8 @@ def sections_df_to_docs(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame
     )
 
     df = df.sort_values(["UID", "section_number"])
-    uids: Sequence[int] = df["UID"].unique()
+    uids = pd.Index(df["UID"].unique(), name="UID")
+    by_uid = df.groupby("UID", sort=True)
 
     # Figure out what columns to process
     # Standard cols
@@ -113,77 +115,134 @@ def sections_df_to_docs(df: pd.DataFrame, inplace: bool = False) -> pd.DataFrame
     ]
     token_cols = [c for c in df.columns if "tokens" in c]
     standard_cols = token_cols + section_cols
-    # Other cols
+    # Other cols, i.e. those with a single value for each UID
     _other_cols = [c for c in df.columns if c not in standard_cols]
     other_cols = []
-    for c in _other_cols:
-        unique_combos = df[~df.duplicated(["UID", c], keep="first")]
-        if len(unique_combos) == len(uids):
-            other_cols.append(c)
+    if _other_cols:
+        n_values = by_uid[_other_cols].nunique(dropna=False)
+        other_cols = [c for c in _other_cols if (n_values[c] == 1).all()]
+
+    # Sections with a missing is_credit are in neither the main nor the credit text
+    is_credit = df["is_credit"].fillna(False).astype(bool)
+    is_main = (~df["is_credit"]).fillna(False).astype(bool)
+
+    def _join_text(mask: pd.Series) -> pd.Series:
+        text = df.loc[mask].groupby("UID", sort=True)["section_text"].agg("\n\n".join)
+        return text.reindex(uids, fill_value="")
+
+    def _merge_tokens(mask: pd.Series, col: str) -> List[list]:
+        # Like exploding each section's tokens and listing them, per UID
+        tokens = df.loc[mask, ["UID", col]].explode(col)
+        tokens = tokens.groupby("UID", sort=True)[col].agg(list).reindex(uids)
+        return [t if isinstance(t, list) else [] for t in tokens]
 
     # Set values for each UID
-    values: Dict[str, List[int | str]] = defaultdict(list)
-    for uid in uids:
-        section_df = df[df["UID"] == uid]
-        is_credit = section_df["is_credit"]
-        main_text = "\n\n".join(section_df[~is_credit]["section_text"])
-        full_text = "\n\n".join(section_df["section_text"])
-        credit_text = "\n\n".join(section_df[is_credit]["section_text"])
-
-        values["UID"].append(uid)
-        values["clean_text"].append(main_text)
-        values["full_text"].append(full_text)
-        values["num_sections"].append(len(section_df))
-        values["credit_text"].append(credit_text)
-        values["num_credit_sections"].append(is_credit.sum())
-        values["clean_text"].append(main_text)
-
-        for col in token_cols:
-            clean_tokens = section_df.loc[~is_credit, col].explode().to_list()
-            credit_tokens = section_df.loc[is_credit, col].explode().to_list()
-            values[f"clean_{col}"].append(clean_tokens)
-            values[f"credit_{col}"].append(credit_tokens)
-
-        for col in other_cols:
-            values[col].append(section_df[col].values[0])
+    values: Dict[str, Sequence] = {
+        "UID": uids.to_list(),
+        "clean_text": _join_text(is_main).to_list(),
+        "full_text": by_uid["section_text"].agg("\n\n".join).to_list(),
+        "num_sections": by_uid.size().to_list(),
+        "credit_text": _join_text(is_credit).to_list(),
+        "num_credit_sections": by_uid["is_credit"].sum().to_list(),
+    }
+
+    for col in token_cols:
+        values[f"clean_{col}"] = _merge_tokens(is_main, col)
+        values[f"credit_{col}"] = _merge_tokens(is_credit, col)
+
+    for col in other_cols:
+        values[col] = by_uid[col].first().to_list()
 
     # Return DF
     _df = pd.DataFrame(values)
     for col in other_cols:
         _df[col] = _df[col].astype(df[col].dtype)
 
-
     if inplace:
         df = _df
     else:
         return _df
 
 
-def _get_section_df(
-    reader: CategorizedMarkdownCorpusReader, uids: Sequence[int]
-) -> pd.DataFrame:
+SECTION_COLUMNS = [
+    "UID",
+    "header_level",
+    "section_number",
+    "section_heading",
+    "section_text",
+    "is_credit",
+]
+
+
+def parse_sections(text: str) -> List[MarkdownSection]:
     """
-    Convert a CategorizedMarkdownCorpusReader object to a DataFrame of section
-    information.
+    Split a markdown text into sections, each starting at a top-level heading. Gives
+    the same sections as the sections() method of NLTK's
+    CategorizedMarkdownCorpusReader, without writing the text to disk. Any text
+    before the first heading is not part of a section.
 
     Parameters
     ----------
-    reader : CategorizedMarkdownCorpusReader
-        A CategorizedMarkdownCorpusReader object for reading markdown files.
-    uids : Sequence[int]
-        A sequence of unique IDs representing the documents to process.
+    text : str
+        A markdown text.
 
     Returns
     -------
-    pd.DataFrame
-        DataFrame containing section information with columns: 'UID', 'header_level',
-        'section_number', 'section_text', 'is_credit'. Optionally: any columns
-        containing the phrase "tokens" are merged into one.
+    List[MarkdownSection]
+        The sections (heading, level and plain text content), in order.
+    """
+    section_blocks, block = [], []
+    for t in MD_PARSER.parse(text):
+        if t.level == 0 and t.type == "heading_open":
+            if block:
+                section_blocks.append(block)
+            block = [t]
+        elif block:
+            block.append(t)
+    if block:
+        section_blocks.append(block)
+
+    return [
+        MarkdownSection(
+            block[1].content,
+            block[0].markup.count("#"),
+            MD_PARSER.renderer.render(block, MD_PARSER.options, env=None),
+        )
+        for block in section_blocks
+    ]
+
+
+def read_sections(path: Path) -> List[MarkdownSection]:
     """
-    values: Dict[str, List[int | str]] = defaultdict(list)
+    Read a markdown file in place and split it into sections, see parse_sections().
 
-    for uid in uids:
-        sections: List[MarkdownSection] = reader.sections(f"{uid}.txt")
+    Parameters
+    ----------
+    path : Path
+        Path to the markdown file (UTF-8, optionally with a BOM, as NLTK reads it).
+
+    Returns
+    -------
+    List[MarkdownSection]
+        The sections, in order.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return parse_sections(f.read())
+
+
+def _section_values(
+    uids: Sequence[int],
+    text_path: Optional[Path] = None,
+    texts: Optional[Sequence[str]] = None,
+) -> Dict[str, list]:
+    # Section rows of some documents, read from text_path or given as texts
+    values: Dict[str, list] = {col: [] for col in SECTION_COLUMNS}
+
+    for j, uid in enumerate(uids):
+        if texts is None:
+            sections = read_sections(Path(text_path) / f"{uid}.txt")
+        else:
+            sections = parse_sections(texts[j])
         for i, section in enumerate(sections):
             values["UID"].append(uid)
             values["header_level"].append(section.level)
@@ -192,6 +251,65 @@ def _get_section_df(
             values["section_text"].append(section.content)
             values["is_credit"].append(check_if_credit(section))
 
+    return values
+
+
+def _get_section_df(
+    uids: Sequence[int],
+    text_path: Optional[Path] = None,
+    texts: Optional[Sequence[str]] = None,
+    workers: int = 1,
+    chunk_size: int = 500,
+) -> pd.DataFrame:
+    """
+    Parse the sections of markdown documents into a DataFrame of section information.
+
+    Parameters
+    ----------
+    uids : Sequence[int]
+        A sequence of unique IDs representing the documents to process.
+    text_path : Optional[Path], optional
+        Directory containing the documents as {uid}.txt, by default None
+    texts : Optional[Sequence[str]], optional
+        The documents' texts, in the order of uids, instead of reading them from
+        text_path, by default None
+    workers : int, optional
+        Number of processes parsing chunks of documents, by default 1 (no processes)
+    chunk_size : int, optional
+        Number of documents per chunk, by default 500
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame containing section information with columns: 'UID', 'header_level',
+        'section_number', 'section_heading', 'section_text', 'is_credit'. Sections
+        without any text are dropped.
+    """
+    if (text_path is None) == (texts is None):
+        raise ValueError("Exactly one of text_path and texts must be given.")
+    uids = list(uids)
+    if (texts is not None) and (len(texts) != len(uids)):
+        raise ValueError("uids and texts must have the same length.")
+
+    chunk_size = max(chunk_size, 1)
+    starts = range(0, len(uids), chunk_size)
+    uid_chunks = [uids[i : i + chunk_size] for i in starts]
+    text_chunks: List[Optional[List[str]]] = [
+        None if texts is None else list(texts[i : i + chunk_size]) for i in starts
+    ]
+    paths = [text_path] * len(uid_chunks)
+
+    if (workers > 1) and (len(uid_chunks) > 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(
+                executor.map(_section_values, uid_chunks, paths, text_chunks)
+            )
+    else:
+        chunks = list(map(_section_values, uid_chunks, paths, text_chunks))
+
+    values = {
+        col: [v for chunk in chunks for v in chunk[col]] for col in SECTION_COLUMNS
+    }
     df = pd.DataFrame(values)
     df["section_number"] = df["section_number"].astype("Int16")
     df["header_level"] = df["header_level"].astype("Int8")
@@ -203,7 +321,12 @@ def _get_section_df(
 
 
 def get_section_df(
-    df: pd.DataFrame, text_path: Path, inplace: bool = False
+    df: pd.DataFrame,
+    text_path: Optional[Path] = None,
+    inplace: bool = False,
+    text_col: Optional[str] = None,
+    workers: int = 1,
+    chunk_size: int = 500,
 ) -> pd.DataFrame:
     """
     Convert a DataFrame of documents to a DataFrame of section information.
@@ -213,11 +336,19 @@ def get_section_df(
     df : pd.DataFrame
         DataFrame containing document information with at least one column 'UID'.
         Expects columns: 'UID'.
-    text_path : Path
-        Path to the directory containing the markdown files.
+    text_path : Optional[Path], optional
+        Path to the directory containing the markdown files, read in place. Not
+        needed if text_col is given, by default None
     inplace : bool, optional
         If True, modify the input DataFrame in place; if False, return a new DataFrame.
         Default is True.
+    text_col : Optional[str], optional
+        Column of df holding the markdown texts, parsed instead of the files in
+        text_path, by default None
+    workers : int, optional
+        Number of processes parsing chunks of documents, by default 1
+    chunk_size : int, optional
+        Number of documents per chunk, by default 500
 
     Returns
     -------
@@ -227,27 +358,19 @@ def get_section_df(
     """
     df = validate_data(
         df,
-        required_columns=["UID"],
+        required_columns=["UID"] if text_col is None else ["UID", text_col],
         inplace=inplace,
     )
 
-    # Make temp directory for reader
-    print("\tPreparing markdown corpus reader")
-    corpus_path = text_path / "Corpus_Files"
-    corpus_path.mkdir(exist_ok=True)
-    for uid in df["UID"].values:
-        target = text_path / f"{uid}.txt"
-        destination = corpus_path / f"{uid}.txt"
-        shutil.copy(target, destination)
-    reader = CategorizedMarkdownCorpusReader(str(corpus_path), r"[0-9]+\.txt")
-
     # Get actual section data
     print("\tParsing sections")
-    _df = _get_section_df(reader=reader, uids=df["UID"])
-
-    # Clean up
-    del reader
-    shutil.rmtree(corpus_path)
+    _df = _get_section_df(
+        uids=df["UID"].values,
+        text_path=text_path if text_col is None else None,
+        texts=None if text_col is None else df[text_col].values,
+        workers=workers,
+        chunk_size=chunk_size,
+    )
 
     # Merge with original data
     df = pd.merge(df, _df, how="outer", on="UID")
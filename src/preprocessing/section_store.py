@@ -0,0 +1,183 @@
+from pathlib import Path
+import os
+from typing import Callable, Iterator, List, Optional
+import pandas as pd
+from ..annotation_utils.data_io import restore_list_columns
+from .markdown_handling import get_section_df, validate_data
+
+PART_PATTERN = "part-*.parquet"
+
+
+class SectionStore:
+    def __init__(self, path: Path):
+        """
+        A directory of Parquet files ("parts"), each holding the rows of a chunk of
+        documents. All rows of a document are in the same part, so each part can be
+        processed on its own, e.g. by sections_df_to_docs(), keeping only one chunk
+        of the corpus in memory at a time.
+
+        Parameters
+        ----------
+        path : Path
+            The store's directory, created when the first part is written.
+        """
+        self.path = Path(path)
+
+    def parts(self) -> List[Path]:
+        """The store's Parquet files, in order."""
+        if not self.path.is_dir():
+            return []
+        return sorted(self.path.glob(PART_PATTERN))
+
+    def __len__(self) -> int:
+        return len(self.parts())
+
+    def clear(self):
+        """Delete all parts."""
+        for part in self.parts():
+            part.unlink()
+
+    def write(self, df: pd.DataFrame, part: int):
+        """
+        Write a chunk as a part, replacing any existing part with the same number.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            The chunk's rows.
+        part : int
+            The part's number, which determines the order of parts.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        destination = self.path / f"part-{part:05d}.parquet"
+        tmp_file = self.path / f"_part-{part:05d}.tmp"
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, destination)
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read the store one part at a time.
+
+        Parameters
+        ----------
+        columns : Optional[List[str]], optional
+            Columns to read, by default None (all)
+
+        Yields
+        ------
+        Iterator[pd.DataFrame]
+            The rows of each part, in order.
+        """
+        for part in self.parts():
+            yield restore_list_columns(pd.read_parquet(part, columns=columns))
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read the whole store into one DataFrame.
+
+        Parameters
+        ----------
+        columns : Optional[List[str]], optional
+            Columns to read, by default None (all)
+
+        Returns
+        -------
+        pd.DataFrame
+            The rows of all parts, in order.
+        """
+        chunks = list(self.iter_chunks(columns=columns))
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)
+
+    def map_chunks(
+        self,
+        func: Callable[[pd.DataFrame], Optional[pd.DataFrame]],
+        out_path: Path,
+        columns: Optional[List[str]] = None,
+    ) -> "SectionStore":
+        """
+        Apply a function to each part, writing its outputs to a new store. Functions
+        which modify a chunk in place and return None (e.g. get_char_counts()) are
+        also supported, in which case the modified chunk is written.
+
+        Parameters
+        ----------
+        func : Callable[[pd.DataFrame], Optional[pd.DataFrame]]
+            Function applied to the rows of each part, e.g. sections_df_to_docs.
+        out_path : Path
+            Directory of the new store, any existing parts are replaced.
+        columns : Optional[List[str]], optional
+            Columns to read, by default None (all)
+
+        Returns
+        -------
+        SectionStore
+            The new store.
+        """
+        out = SectionStore(out_path)
+        if out.path.resolve() == self.path.resolve():
+            raise ValueError("Cannot map a store onto itself.")
+        out.clear()
+        for i, chunk in enumerate(self.iter_chunks(columns=columns)):
+            result = func(chunk)
+            out.write(chunk if result is None else result, i)
+        return out
+
+
+def build_section_store(
+    df: pd.DataFrame,
+    text_path: Path,
+    store_path: Path,
+    chunk_size: int = 500,
+    transform: Optional[Callable[[pd.DataFrame], Optional[pd.DataFrame]]] = None,
+    workers: int = 1,
+) -> SectionStore:
+    """
+    Build the section DataFrame of get_section_df() chunk by chunk, writing each
+    chunk to a SectionStore. Only one chunk of sections is held in memory at a time,
+    so the texts should not be columns of df.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing document information with at least one column 'UID'.
+    text_path : Path
+        Path to the directory containing the markdown files.
+    store_path : Path
+        Directory of the store, any existing parts are replaced.
+    chunk_size : int, optional
+        Number of documents per chunk (and part), by default 500
+    transform : Optional[Callable[[pd.DataFrame], Optional[pd.DataFrame]]], optional
+        Applied to the sections of each chunk before it is written, e.g. to tokenize
+        or calculate metrics, see SectionStore.map_chunks(), by default None
+    workers : int, optional
+        Number of processes parsing the sections of a chunk, by default 1
+
+    Returns
+    -------
+    SectionStore
+        The store.
+    """
+    df = validate_data(df, required_columns=["UID"], inplace=True)
+    store = SectionStore(store_path)
+    store.clear()
+
+    # Chunk by document, so that all rows of a UID end up in the same part
+    chunk_size = max(chunk_size, 1)
+    uids = df["UID"].unique()
+    n_chunks = -(-len(uids) // chunk_size)
+    for i, start in enumerate(range(0, len(uids), chunk_size)):
+        print(f"\tChunk {i + 1}/{n_chunks}")
+        sections = get_section_df(
+            df[df["UID"].isin(uids[start : start + chunk_size])],
+            text_path,
+            workers=workers,
+            chunk_size=-(-chunk_size // max(workers, 1)),
+        )
+        if transform is not None:
+            result = transform(sections)
+            sections = sections if result is None else result
+        store.write(sections, i)
+
+    return store
@@ -1,4 +1,7 @@
 from .main_cleaning_funcs import clean_scraped_text, clean_raw_scrapes
+from .encoding import repair_encoding
+from .profiling import StageProfiler
+from .pipeline import CleaningPipeline, CleaningStage, default_pipeline
 from .markup_style_cleaning import (
     clean_html,
     strip_tags,
@@ -1,7 +1,31 @@
 import re
+from functools import partial
+from typing import Callable, List, NamedTuple, Optional, Tuple
 from .mappers import JARGON
 
 
+def fold_case(text: str) -> str:
+    """
+    Lowercase text such that a literal (lowercase ASCII) string which matches it
+    with re.IGNORECASE is a substring of the result.
+
+    Parameters
+    ----------
+    text : str
+        _description_
+
+    Returns
+    -------
+    str
+        _description_
+    """
+    text = text.lower()
+    if not text.isascii():
+        # re.IGNORECASE also matches these to "i" and "s", str.lower() does not
+        text = text.replace("ı", "i").replace("ſ", "s")
+    return text
+
+
 def fix_units(text: str) -> str:
     """_summary_
 
@@ -270,9 +294,8 @@ def reduce_symbol_runs(text: str) -> str:
         match_str: str = match.group(0)
         return match_str[0]
 
-    chars = [r"\+{2,}", r"-{2,}", r"\/{2,}", r"\|{2,}", r"\.{2,}", r":{2,}"]
-    chars = [f"({c})" for c in chars]
-    pattern = r"|".join(chars)
+    # Runs of 2+ of the same symbol, for any of + - / | . :
+    pattern = r"([+\-/|.:])\1+"
     return re.sub(pattern=pattern, repl=reduce_repeats, string=text)
 
 
@@ -401,6 +424,25 @@ def fix_components(text: str) -> str:
     return "\n".join(fixed_lines)
 
 
+def _fix_jargon(match: re.Match, target: str, replacement: str) -> str:
+    match_str: str = match.group(0)
+    match_str = match_str.lower()
+
+    return match_str.replace(target, replacement)
+
+
+# (target, replacement, pattern, whether the target is a literal string)
+JARGON_RULES: List[Tuple[str, str, re.Pattern, bool]] = [
+    (
+        target,
+        replacement,
+        re.compile(r"(?<![A-Z0-9])" + target + r"s?(?![A-Z0-9])", re.IGNORECASE),
+        re.fullmatch(r"[a-z0-9&]+", target) is not None,
+    )
+    for target, replacement in JARGON.items()
+]
+
+
 def fix_jargon(text: str) -> str:
     """_summary_
 
@@ -414,20 +456,17 @@ def fix_jargon(text: str) -> str:
     str
         _description_
     """
-
-    def _fix_jargon(match: re.Match, target: str, replacement: str) -> str:
-        match_str: str = match.group(0)
-        match_str = match_str.lower()
-
-        return match_str.replace(target, replacement)
-
-    for target, replacement in JARGON.items():
-        text = re.sub(
-            pattern=r"(?<![A-Z0-9])" + target + r"s?(?![A-Z0-9])",
-            repl=lambda match: _fix_jargon(match, target, replacement),
-            string=text,
-            flags=re.IGNORECASE,
-        )
+    folded = fold_case(text)
+
+    for target, replacement, pattern, literal in JARGON_RULES:
+        # Literal targets can only match where they appear in the folded text
+        if literal and (target not in folded):
+            continue
+        repl = partial(_fix_jargon, target=target, replacement=replacement)
+        fixed = pattern.sub(repl, text)
+        if fixed is not text:
+            text = fixed
+            folded = fold_case(text)
 
     text = text.replace("classs", "classes")
     text = text.replace("piecess", "pieces")
@@ -492,71 +531,138 @@ def fix_excessive_repeats(text: str) -> str:
     return text
 
 
-def make_consistent(text: str) -> str:
-    """_summary_
+def collapse_ellipses(text: str) -> str:
+    return re.sub(pattern=r"\.\.+", repl=".", string=text)
 
-    Parameters
-    ----------
-    text : str
-        _description_
 
-    Returns
-    -------
-    str
-        _description_
-    """
-    # Trim any instances of 3+ of a character in a row with only 2 other than #s
-    text = fix_excessive_repeats(text)
-    text = re.sub(pattern=r"\.\.+", repl=".", string=text)
-    # Fix slang
-    text = fix_abbreviations(text)
-    # Fix common jargon terms
-    text = fix_jargon(text)
-    # Fix spacing issues with the word "known"
-    text = fix_known(text)
+def replace_ampersands(text: str) -> str:
     # Go with and over &
-    text = text.replace("&", " and ")
-    # fix components
-    text = fix_components(text)
+    return text.replace("&", " and ")
+
 
+def remove_letter_lists(text: str) -> str:
     # Remove letter lists, i.e. a) ..., b) ..., ...
     text = re.sub(
         pattern=r"(?<![^\s])[A-Z]\)", repl=" ", string=text, flags=re.IGNORECASE
     )
     text = re.sub(pattern=r"\(\s*\)", repl=" ", string=text)
+    return text
+
 
+def fix_subreddit_links(text: str) -> str:
+    text = re.sub(r"/ ?u/ ?", "/u/", text, re.IGNORECASE)
+    text = re.sub(r"/ ?r/ ?", "/r/", text, re.IGNORECASE)
+    return text
+
+
+def remove_unusual_characters(text: str) -> str:
+    return re.sub(
+        pattern=r"[^0-9A-Za-zŽžÀ-ÿÀ-ÖØ-öø-ÿ!@#$%&\-\|\/\+\=\÷\×\*\[\];:_'\)(\",./?><\s]",
+        repl="",
+        string=text,
+    )
+
+
+class ConsistencyRule(NamedTuple):
+    name: str
+    apply: Callable[[str], str]
+    # The rule is skipped unless one of these strings is in the text
+    triggers: Tuple[str, ...] = ()
+    # Whether triggers are looked up in the case-folded text
+    ignore_case: bool = False
+
+
+DIGITS: Tuple[str, ...] = tuple("0123456789")
+
+# Applied in order by make_consistent. Triggers must be necessary for the rule to
+# change the text, so that skipping a rule never changes the output. The only
+# exceptions are GATED_RULES, whose triggers are (case sensitive) conditions the
+# rules have always been applied under, e.g. "3rd-level" is left alone without "lv".
+CONSISTENCY_RULES: List[ConsistencyRule] = [
+    # Trim any instances of 3+ of a character in a row with only 2 other than #s
+    ConsistencyRule("excessive_repeats", fix_excessive_repeats),
+    ConsistencyRule("ellipses", collapse_ellipses, ("..",)),
+    # Fix slang
+    ConsistencyRule("abbreviations", fix_abbreviations),
+    # Fix common jargon terms (fix_jargon skips absent terms itself)
+    ConsistencyRule("jargon", fix_jargon),
+    # Fix spacing issues with the word "known"
+    ConsistencyRule("known", fix_known, ("known",), ignore_case=True),
+    ConsistencyRule("ampersands", replace_ampersands, ("&",)),
+    ConsistencyRule(
+        "components", fix_components, ("components:", "vsm"), ignore_case=True
+    ),
+    ConsistencyRule("letter_lists", remove_letter_lists, (")",)),
     # Number-associated text
     # Fix feet/ft. and pounds/lbs
-    text = fix_units(text)
+    ConsistencyRule("units", fix_units),
     # Make the word level consistent
-    if "lv" in text:
-        text = fix_lvl(text)
+    ConsistencyRule("lvl", fix_lvl, ("lv",)),
     # Fix dmg vs damage
-    if "dmg" in text:
-        text = fix_dmg(text)
+    ConsistencyRule("dmg", fix_dmg, ("dmg",)),
     # Pad phrases separated by certain characters | / + &
-    text = pad_phrases_separated_by_symbol(text)
-    text = re.sub(r"/ ?u/ ?", "/u/", text, re.IGNORECASE)
-    text = re.sub(r"/ ?r/ ?", "/r/", text, re.IGNORECASE)
+    ConsistencyRule(
+        "symbol_padding", pad_phrases_separated_by_symbol, tuple("|/+=÷×*")
+    ),
+    ConsistencyRule("subreddit_links", fix_subreddit_links, ("/",)),
     # Add space between 'str' as in strength and any number
-    text = fix_strength_abbrv_spacing(text)
+    ConsistencyRule("strength", fix_strength_abbrv_spacing, ("str",), ignore_case=True),
     # Fix dice phrases
-    text = fix_dice_and_version(text)
+    ConsistencyRule("dice_and_version", fix_dice_and_version, DIGITS),
     # Fix instances of letters training a number (st, nd, rd, and th handled above)
-    text = add_space_between_number_and_word(text)
-
+    ConsistencyRule("number_spacing", add_space_between_number_and_word, DIGITS),
     # Fix instances where punctuation . , ! ? has no space afterwards
-    text = fix_punctuation(text)
+    ConsistencyRule("punctuation", fix_punctuation, tuple(".,!?")),
     # Strip duplicate symbols
-    text = reduce_symbol_runs(text)
+    ConsistencyRule(
+        "symbol_runs", reduce_symbol_runs, ("++", "--", "//", "||", "..", "::")
+    ),
     # Strip excess whitespaces
-    text = strip_excess_whitespace(text)
-
+    ConsistencyRule("whitespace", strip_excess_whitespace),
     # Remove unusual characters
-    text = re.sub(
-        pattern=r"[^0-9A-Za-zŽžÀ-ÿÀ-ÖØ-öø-ÿ!@#$%&\-\|\/\+\=\÷\×\*\[\];:_'\)(\",./?><\s]",
-        repl="",
-        string=text,
-    )
+    ConsistencyRule("unusual_characters", remove_unusual_characters),
+]
+
+GATED_RULES: Tuple[str, ...] = ("lvl", "dmg")
+
+
+def make_consistent(
+    text: str, rules: List[ConsistencyRule] = CONSISTENCY_RULES
+) -> str:
+    """
+    Apply each consistency rule to the text in turn. Rules with triggers are only
+    applied if one of them appears in the text, which saves a full pass over the
+    text for most rules on most documents.
+
+    Parameters
+    ----------
+    text : str
+        _description_
+    rules : List[ConsistencyRule], optional
+        The rules to apply, by default CONSISTENCY_RULES
+
+    Returns
+    -------
+    str
+        _description_
+    """
+    # Case-folded copy of the text, only recomputed when it is needed again
+    folded: Optional[str] = None
+
+    for rule in rules:
+        if rule.triggers:
+            if rule.ignore_case:
+                if folded is None:
+                    folded = fold_case(text)
+                haystack = folded
+            else:
+                haystack = text
+            if not any(t in haystack for t in rule.triggers):
+                continue
+
+        fixed = rule.apply(text)
+        if fixed is not text:
+            text = fixed
+            folded = None
 
     return text
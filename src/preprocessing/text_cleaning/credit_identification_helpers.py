@@ -1,5 +1,6 @@
-from typing import List
+from typing import List, Optional, Tuple, Union
 import re
+from functools import lru_cache
 from nltk.corpus.reader.markdown import MarkdownSection
 from collections import namedtuple
 
@@ -106,6 +107,94 @@ SPLITTER_PATTERNS = [r"(?<![A-Z])" + p + r"(?![A-Z])" for p in SPLITTER_PATTERNS
 CREDIT_PATTERNS = SOFT_DROP_PATTERNS + HARD_DROP_PATTERNS + SPLITTER_PATTERNS
 
 
+class PatternSet:
+    def __init__(self, name: str, patterns: List[str], flags: int = re.IGNORECASE):
+        """
+        A list of regex patterns compiled once, individually and as one alternation.
+        Checking whether any of the patterns is in a text then takes a single scan.
+
+        Parameters
+        ----------
+        name : str
+            Name of the pattern set.
+        patterns : List[str]
+            The patterns.
+        flags : int, optional
+            Flags to compile the patterns with, by default re.IGNORECASE
+        """
+        self.name = name
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.compiled = [re.compile(pat, flags) for pat in self.patterns]
+
+        self.combined: Optional[re.Pattern] = None
+        if self.patterns:
+            alternatives = [f"(?:{pat})" for pat in self.patterns]
+            self.combined = re.compile("|".join(alternatives), flags)
+
+    def search(self, text: str) -> Optional[re.Match]:
+        """Find the first (leftmost) match of any of the patterns."""
+        if self.combined is None:
+            return None
+        return self.combined.search(text)
+
+    def any_in(self, text: str) -> bool:
+        """Check if any of the patterns is in the text."""
+        return self.search(text) is not None
+
+    def sub_each(self, text: str, repl: str = "") -> str:
+        """Substitute each pattern in turn, as re.sub would in a loop."""
+        for pat in self.compiled:
+            text = pat.sub(repl, text)
+        return text
+
+    def truncate_each(self, text: str) -> str:
+        """Cut the text at each pattern in turn, as re.split(...)[0] would in a loop."""
+        if not self.any_in(text):
+            return text
+        for pat in self.compiled:
+            match = pat.search(text)
+            if match is not None:
+                text = text[: match.start()]
+        return text
+
+
+HARD_DROP = PatternSet("hard", HARD_DROP_PATTERNS)
+SOFT_DROP = PatternSet("soft", SOFT_DROP_PATTERNS)
+# Splitters are matched case-sensitively
+SPLITTERS = PatternSet("splitter", SPLITTER_PATTERNS, flags=0)
+CREDIT = PatternSet("credit", CREDIT_PATTERNS)
+
+
+@lru_cache(maxsize=None)
+def _compile(pat: str) -> re.Pattern:
+    return re.compile(pat, re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _pattern_set(pats: Tuple[str, ...]) -> PatternSet:
+    return PatternSet("pat", list(pats))
+
+
+def get_pattern_set(pats: Union[List[str], PatternSet]) -> PatternSet:
+    """
+    Get the (cached) case-insensitive PatternSet of a list of patterns.
+
+    Parameters
+    ----------
+    pats : Union[List[str], PatternSet]
+        Patterns, or an already built PatternSet.
+
+    Returns
+    -------
+    PatternSet
+        The compiled patterns.
+    """
+    if isinstance(pats, PatternSet):
+        return pats
+    return _pattern_set(tuple(pats))
+
+
 def pat_in_text(pat: str, text: str) -> bool:
     """_summary_
 
@@ -121,16 +210,16 @@ def pat_in_text(pat: str, text: str) -> bool:
     bool
         _description_
     """
-    return bool(re.search(pattern=pat, string=text, flags=re.IGNORECASE))
+    return bool(_compile(pat).search(text))
 
 
-def check_if_any_pats(pats: List[str], text: str) -> bool:
+def check_if_any_pats(pats: Union[List[str], PatternSet], text: str) -> bool:
     """_summary_
 
     Parameters
     ----------
-    pats : List[str]
-        _description_
+    pats : Union[List[str], PatternSet]
+        Patterns (matched case-insensitively) or a PatternSet.
     text : str
         _description_
 
@@ -139,12 +228,7 @@ def check_if_any_pats(pats: List[str], text: str) -> bool:
     bool
         _description_
     """
-    # any([...]) would be neater, but this minimizes loop length
-    for pat in pats:
-        if pat_in_text(pat, text):
-            return True
-
-    return False
+    return get_pattern_set(pats).any_in(text)
 
 
 def strip_header_promos(text: str) -> str:
@@ -160,11 +244,11 @@ def strip_header_promos(text: str) -> str:
     str
         _description_
     """
-    if check_if_any_pats(HARD_DROP_PATTERNS, text):
+    if HARD_DROP.any_in(text):
         return ""
+    elif SOFT_DROP.any_in(text):
+        return SOFT_DROP.sub_each(text)
     else:
-        for pat in SOFT_DROP_PATTERNS:
-            text = re.sub(pattern=pat, repl="", string=text, flags=re.IGNORECASE)
         return text
 
 
@@ -183,11 +267,10 @@ def strip_body_promos(text: str, max_pct_promos: float = 0.4) -> str:
     str
         _description_
     """
-    if check_if_any_pats(HARD_DROP_PATTERNS, text):
+    if HARD_DROP.any_in(text):
         lines = text.split("\n")
 
-        for phrase in HARD_DROP_PATTERNS:
-            text = re.sub(pattern=phrase, repl="", string=text, flags=re.IGNORECASE)
+        text = HARD_DROP.sub_each(text)
 
         clean_lines = []
         for edited, original in zip(text.split("\n"), lines):
@@ -197,10 +280,9 @@ def strip_body_promos(text: str, max_pct_promos: float = 0.4) -> str:
                 clean_lines.append(original)
 
         text = "\n".join(clean_lines)
-    if check_if_any_pats(SOFT_DROP_PATTERNS, text):
+    if SOFT_DROP.any_in(text):
         lines = text.split("\n")
-        for phrase in SOFT_DROP_PATTERNS:
-            text = re.sub(pattern=phrase, repl="", string=text, flags=re.IGNORECASE)
+        text = SOFT_DROP.sub_each(text)
 
         clean_lines = []
         for edited, original in zip(text.split("\n"), lines):
@@ -230,8 +312,7 @@ def clean_promos(text: str, header: bool, max_pct_promos: float = 0.4) -> str:
     str
         _description_
     """
-    for pat in SPLITTER_PATTERNS:
-        text = re.split(pat, text)[0]
+    text = SPLITTERS.truncate_each(text)
 
     if header:
         text = strip_header_promos(text)
@@ -1,13 +1,114 @@
 import re
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple, Union
 
 WRAPPER_OPEN_PATTERN: re.Pattern = re.compile(r"^{{([)(#\w:\s-]*[,]*)*")
 
+# Leading global inline flags, e.g. the "(?i)" in "(?i)url\(...\)"
+_GLOBAL_FLAGS_PATTERN: re.Pattern = re.compile(r"^\(\?([aiLmsux]+)\)")
+# Group references which would break once the pattern's groups are renumbered
+_GROUP_REF_PATTERN: re.Pattern = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?\(")
+# Flags which can be scoped to an alternative, e.g. "(?i:...)"
+_SCOPED_FLAGS = {re.IGNORECASE: "i", re.MULTILINE: "m", re.DOTALL: "s"}
+
+
+class CssClassifier:
+    def __init__(self, noisy_css: Sequence[re.Pattern], cache_size: int = 4096):
+        """
+        Checks lines for known CSS with a single compiled alternation of all the
+        patterns, instead of one search per pattern. Patterns which cannot be
+        merged safely (group references, unsupported flags) are still searched
+        individually. A line matches iff any of the patterns matches it, so the
+        decisions are identical to searching each pattern.
+
+        Results are cached per line, since clean_css checks most lines twice.
+
+        Parameters
+        ----------
+        noisy_css : Sequence[re.Pattern]
+            Patterns of known CSS.
+        cache_size : int, optional
+            Number of lines to cache results for, by default 4096
+        """
+        self.patterns = list(noisy_css)
+        alternatives = []
+        separate = []
+        for pat in self.patterns:
+            alternative = _as_alternative(pat)
+            if alternative is None:
+                separate.append(pat)
+            else:
+                alternatives.append(alternative)
+
+        self.combined = None
+        if alternatives:
+            try:
+                self.combined = re.compile("|".join(alternatives))
+            except re.error:
+                separate = self.patterns
+        self.separate = separate
+        self.search = lru_cache(maxsize=cache_size)(self._search)
+
+    def _search(self, line: str) -> bool:
+        if (self.combined is not None) and (self.combined.search(line) is not None):
+            return True
+        return any(pat.search(line) is not None for pat in self.separate)
+
+
+def _as_alternative(pat: re.Pattern) -> Optional[str]:
+    # Verbose patterns (re.X) may end in a comment, which would swallow the ")"
+    flags = pat.flags & ~re.UNICODE
+    if (flags & ~(re.IGNORECASE | re.MULTILINE | re.DOTALL)) or not isinstance(
+        pat.pattern, str
+    ):
+        return None
+    if _GROUP_REF_PATTERN.search(pat.pattern):
+        return None
+
+    pattern = pat.pattern
+    while (m := _GLOBAL_FLAGS_PATTERN.match(pattern)) is not None:
+        if set(m.group(1)) - set(_SCOPED_FLAGS.values()):
+            return None
+        pattern = pattern[m.end() :]
+
+    scoped = "".join(c for f, c in _SCOPED_FLAGS.items() if flags & f)
+    if scoped:
+        return f"(?{scoped}:{pattern})"
+    return f"(?:{pattern})"
+
+
+@lru_cache(maxsize=8)
+def _cached_classifier(noisy_css: Tuple[re.Pattern, ...]) -> CssClassifier:
+    return CssClassifier(noisy_css)
+
+
+def get_css_classifier(
+    noisy_css: Union[Sequence[re.Pattern], CssClassifier]
+) -> CssClassifier:
+    """
+    Get a (cached) CssClassifier for a list of CSS patterns.
 
-def check_for_css(line: str, noisy_css: List[re.Pattern]) -> bool:
+    Parameters
+    ----------
+    noisy_css : Union[Sequence[re.Pattern], CssClassifier]
+        Patterns of known CSS, or an already built classifier.
+
+    Returns
+    -------
+    CssClassifier
+        The classifier for the patterns.
+    """
+    if isinstance(noisy_css, CssClassifier):
+        return noisy_css
+    return _cached_classifier(tuple(noisy_css))
+
+
+def check_for_css(
+    line: str, noisy_css: Union[List[re.Pattern], CssClassifier]
+) -> bool:
     line = line.strip()
     # Check for known CSS
-    css = any([bool(css.findall(line)) for css in noisy_css])
+    css = get_css_classifier(noisy_css).search(line)
     # If no known CSS, check if this is a plausible single line CSS element
     # Typically of the form:
     # .element {variable: value}
@@ -20,7 +121,9 @@ def check_for_css(line: str, noisy_css: List[re.Pattern]) -> bool:
 
 
 def clean_standard_css(
-    lines: List[str], noisy_css: List[re.Pattern], warn_limit: int = 7
+    lines: List[str],
+    noisy_css: Union[List[re.Pattern], CssClassifier],
+    warn_limit: int = 7,
 ) -> List[str]:
     """
     Cleans standard CSS. Not optimized to ignore content wrappd by CSS.
@@ -30,8 +133,8 @@ def clean_standard_css(
     ----------
     lines : List[str]
         _description_
-    noisy_css : List[re.Pattern]
-        _description_
+    noisy_css : Union[List[re.Pattern], CssClassifier]
+        Patterns of known CSS, or a CssClassifier built from them.
     warn_limit : int, optional
         _description_, by default 7
 
@@ -99,15 +202,17 @@ def clean_standard_css(
     return clean_lines
 
 
-def clean_wrapper_css(lines: List[str], noisy_css: List[re.Pattern]) -> List[str]:
+def clean_wrapper_css(
+    lines: List[str], noisy_css: Union[List[re.Pattern], CssClassifier]
+) -> List[str]:
     """_summary_
 
     Parameters
     ----------
     lines : List[str]
         _description_
-    noisy_css : List[re.Pattern]
-        _description_
+    noisy_css : Union[List[re.Pattern], CssClassifier]
+        Patterns of known CSS, or a CssClassifier built from them.
 
     Returns
     -------
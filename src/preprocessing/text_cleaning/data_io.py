@@ -2,6 +2,8 @@ from pathlib import Path
 from typing import List
 import pandas as pd
 import time
+import os
+import tempfile
 
 
 def get_uids_from_path(path: Path) -> List[int]:
@@ -53,6 +55,29 @@ def read_src_txt_from_file(uid: int, text_dir: Path) -> str:
     return text
 
 
+def write_text_to_file(uid: int, text: str, text_dir: Path):
+    """
+    Write a text to its UID's file, replacing any existing file. The text is written
+    to a temporary file first, so an interrupted write never leaves a partial file.
+
+    Parameters
+    ----------
+    uid : int
+        An integer representing the unique identifier of the text.
+    text : str
+        The text to write.
+    text_dir : Path
+        A Path object representing the directory where the text files are stored.
+    """
+    destination = text_dir / f"{uid}.txt"
+    # A unique temporary file, so concurrent writes of the same UID can't collide
+    with tempfile.NamedTemporaryFile(
+        "w", dir=text_dir, prefix=f"_{uid}.", suffix=".tmp", delete=False
+    ) as f:
+        f.write(text)
+    os.replace(f.name, destination)
+
+
 def write_row_to_file(row: pd.Series, text_dir: Path):
     filename = f"{row['UID']}" + ".txt"  # Name as UID.txt\
     destination = text_dir / filename
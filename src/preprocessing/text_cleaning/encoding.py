@@ -0,0 +1,36 @@
+import re
+from typing import Tuple
+
+from .mappers import ENCODING_MAPPER
+
+# Every mis-encoded sequence starts with one of these characters
+ENCODING_TRIGGERS: Tuple[str, ...] = tuple(sorted({k[0] for k in ENCODING_MAPPER}))
+
+# Longest sequences first, so that e.g. "â€¢" is not repaired as "â€" + "¢"
+ENCODING_PATTERN: re.Pattern = re.compile(
+    "|".join(re.escape(k) for k in sorted(ENCODING_MAPPER, key=len, reverse=True))
+)
+
+
+def repair_encoding(text: str) -> Tuple[str, int]:
+    """
+    Fix mistakes of improper string encoding, i.e. cases where UTF-8 strings contain
+    ISO-8599 encoded UTF-8 characters, using the sequences in ENCODING_MAPPER.
+
+    Texts without any of the ENCODING_TRIGGERS are returned as they are. Otherwise
+    all sequences are replaced in a single pass, preferring the longest sequence at
+    each position. Replaced characters are not repaired again.
+
+    Parameters
+    ----------
+    text : str
+        The text to repair.
+
+    Returns
+    -------
+    Tuple[str, int]
+        The repaired text and the number of sequences which were replaced.
+    """
+    if not any(t in text for t in ENCODING_TRIGGERS):
+        return text, 0
+    return ENCODING_PATTERN.subn(lambda m: ENCODING_MAPPER[m.group(0)], text)
@@ -1,29 +1,38 @@
 # Imports primarily for typehinting
 from pathlib import Path
 import pandas as pd
-from typing import List
-from nltk.corpus.reader.markdown import CategorizedMarkdownCorpusReader
-import re
+from typing import List, Dict, NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import time
 
 # Custom modules
 from .data_io import (
     read_src_txt_from_file,
     get_uids_from_path,
 )
-from .mappers import ENCODING_MAPPER
-from .noise import HTML_TAG_PATTERN, URL_PATTERN
-from .markup_style_cleaning import (
-    clean_html,
-    clean_formatters,
-    clean_metadata,
-    clean_css,
-    clean_links_images,
-    strip_excess_whitespace,
+from .manifest import CleaningManifest
+from .md_fixes import NoHeadersError
+from .pipeline import CleaningPipeline, default_pipeline, scraped_text_stages
+from .profiling import StageProfiler, StageRecord
+
+# Keyword arguments of clean_scraped_text() which configure its stages
+SCRAPED_TEXT_OPTIONS = (
+    "fix_encoding",
+    "formatters",
+    "noisy_css",
+    "warn_limit",
+    "noisy_metadata",
 )
-from .credit_identification_helpers import check_if_any_pats, CREDIT_PATTERNS
-from .md_fixes import fix_markdown, credited_horizontal_rules_to_headers, NoHeadersError
-from .consistency import make_consistent
-from .nuisance_credits import fix_known_nuisance_credits
+
+DEFAULT_PIPELINE: CleaningPipeline = default_pipeline()
+# The stages of clean_scraped_text() without any options, built once
+SCRAPED_TEXT_PIPELINE: CleaningPipeline = CleaningPipeline(scraped_text_stages())
+
+# Name of the manifest of cleaned texts, kept in the clean text directory
+MANIFEST_NAME = "manifest.csv"
+
+# Number of stage outputs kept in a stage cache, see CleaningPipeline.prune_cache()
+CACHE_MAX_ENTRIES: int = 250_000
 
 
 def clean_scraped_text(text: str, **kwargs) -> str:
@@ -46,6 +55,11 @@ def clean_scraped_text(text: str, **kwargs) -> str:
     ensure_consistence : bool
         Whether or not to ensure consistent language/formating, may negatively impact
         human-readability in some cases.
+    fix_encoding : bool
+        Whether to repair improper encoding, by default True. Disable this if the text
+        was already passed through repair_encoding().
+    profiler : StageProfiler
+        Records each cleaning stage if given, by default None.
 
     Other Parameters
     ----------------
@@ -64,40 +78,24 @@ def clean_scraped_text(text: str, **kwargs) -> str:
         "Text with a bad (parenthetical}")
     - Currently these are fixed via manual text inspection/correction
     """
-    # Perform encoding replacement to fix improper UTF-8 encoding
-    for k, v in ENCODING_MAPPER.items():
-        text = text.replace(k, v)
-
-    # Clean HTML tags as noise
-    if re.search(pattern=HTML_TAG_PATTERN, string=text):
-        text = clean_html(text)
-
-    # Clean formatters as noise
-    if "formatters" in kwargs:
-        text = clean_formatters(text, kwargs["formatters"])
-    else:
-        text = clean_formatters(text)
-
-    # Clean CSS as noise
-    css_kwargs = {k: v for k, v in kwargs.items() if k in ("noisy_css", "warn_limit")}
-    text = clean_css(text=text, **css_kwargs)
-
-    # Clean metadata as noise
-    if "noisy_metadata" in kwargs:
-        text = clean_metadata(text, kwargs["noisy_metadata"])
+    # The stages themselves are listed in pipeline.scraped_text_stages()
+    options = {k: v for k, v in kwargs.items() if k in SCRAPED_TEXT_OPTIONS}
+    if options:
+        pipeline = CleaningPipeline(scraped_text_stages(**options))
     else:
-        text = clean_metadata(text)
-
-    # Fix critical markdown errors
-    text = fix_markdown(text)
-
-    # Strip excess whitespaces
-    text = strip_excess_whitespace(text)
+        pipeline = SCRAPED_TEXT_PIPELINE
+    text, _ = pipeline.run(text, profiler=kwargs.get("profiler"))
 
     return text
 
 
-def clean_by_uid(uid: int, raw_path: Path, clean_path: Path):
+def clean_by_uid(
+    uid: int,
+    raw_path: Path,
+    clean_path: Path,
+    profiler: Optional[StageProfiler] = None,
+    pipeline: Optional[CleaningPipeline] = None,
+) -> int:
     """_summary_
 
     Parameters
@@ -108,57 +106,107 @@ def clean_by_uid(uid: int, raw_path: Path, clean_path: Path):
         _description_
     clean_path : Path
         _description_
+    profiler : Optional[StageProfiler], optional
+        Records each cleaning stage if given, by default None
+    pipeline : Optional[CleaningPipeline], optional
+        The cleaning stages to apply, by default DEFAULT_PIPELINE
+
+    Returns
+    -------
+    int
+        The number of improperly encoded sequences which were repaired.
     """
     txt = read_src_txt_from_file(uid, raw_path)
+    if profiler is not None:
+        profiler.start_document(uid)
+
+    if pipeline is None:
+        pipeline = DEFAULT_PIPELINE
+    txt, stats = pipeline.run(txt, profiler=profiler)
+
+    # Write cleaned text
+    with open(clean_path / f"{uid}.txt", "w") as f:
+        f.write(txt)
 
-    # This is necessary for handling some really unusual methods of attributing credit
-    # Uses patterns in /src/prepocessing/text_cleaning/nuisance_credits.csv
-    txt = fix_known_nuisance_credits(txt)
+    return stats.get("encoding_repairs", 0)
 
-    # Basic cleaning
-    txt = clean_scraped_text(txt)
 
-    # Clean out images...
-    imgs_or_links = ("](" in txt) or bool(re.search(pattern=URL_PATTERN, string=txt))
-    if imgs_or_links:
-        tmp_file = clean_path / f"_{uid}.tmp"
-        with open(tmp_file, "w") as f:
-            f.write(txt)
+CleaningError = ValueError | KeyError | NoHeadersError
 
-        # Clear out images
-        reader = CategorizedMarkdownCorpusReader(str(clean_path), f"_{uid}" + r"\.tmp")
-        images = [i for i in reader.images(f"_{uid}.tmp")]
-        links = [i for i in reader.links(f"_{uid}.tmp")]
-        txt = clean_links_images(txt, links, images)
-        tmp_file.unlink()
+# Seconds between progress updates
+PROGRESS_INTERVAL: float = 10.0
 
-    txt = "\n".join([line for line in txt.split("\n") if line.strip() != "Num"])
-    txt = make_consistent(txt)
-    txt = txt.rstrip().lstrip()
 
-    # Check if there could be improperly marked credit sections
-    if "___" in txt:
-        if check_if_any_pats(CREDIT_PATTERNS, txt):
-            txt = credited_horizontal_rules_to_headers(txt)
+class CleaningResult(NamedTuple):
+    uid: int
+    error: Optional[CleaningError]
+    encoding_repairs: int
+    stage_records: List[StageRecord]
 
-    txt = re.sub(r"__+", "", txt)
 
-    # Write cleaned text
-    with open(clean_path / f"{uid}.txt", "w") as f:
-        f.write(txt)
+def _clean_uid_safely(
+    uid: int,
+    raw_path: Path,
+    clean_path: Path,
+    pipeline: CleaningPipeline,
+    profile: bool = False,
+) -> CleaningResult:
+    """
+    Run clean_by_uid, returning any expected cleaning error instead of raising it so
+    that it can be reported from a worker process.
+
+    Returns
+    -------
+    CleaningResult
+        The UID, the error raised while cleaning it (if any), the number of encoding
+        repairs made and, if profiling, the records of each cleaning stage.
+    """
+    profiler = StageProfiler() if profile else None
+    records = profiler.records if profile else []
+    try:
+        n_repairs = clean_by_uid(
+            uid, raw_path, clean_path, profiler=profiler, pipeline=pipeline
+        )
+    except (ValueError, KeyError, NoHeadersError) as e:
+        return CleaningResult(uid, e, 0, records)
+    return CleaningResult(uid, None, n_repairs, records)
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)} min {int(seconds)} sec"
+
+
+def _print_progress(n_done: int, n_total: int, start: float):
+    """Print progress and an ETA based on the throughput measured so far."""
+    elapsed = time.perf_counter() - start
+    rate = n_done / elapsed if elapsed > 0 else 0
+    if rate > 0:
+        eta = _format_duration((n_total - n_done) / rate)
+    else:
+        eta = "unknown"
+    print(f"Cleaned {n_done}/{n_total} texts ({rate:.1f} texts/sec). ETA: {eta}")
 
 
 def clean_raw_scrapes(
-    df: pd.DataFrame, raw_path: Path, clean_path: Path, limit_to_df: bool = False
-):
+    df: pd.DataFrame,
+    raw_path: Path,
+    clean_path: Path,
+    limit_to_df: bool = False,
+    workers: int = 1,
+    profiler: Optional[StageProfiler] = None,
+    cache_dir: Optional[Path] = None,
+    cache_max_entries: Optional[int] = CACHE_MAX_ENTRIES,
+) -> pd.Series:
     """
     Clean raw texts by applying the `clean_scraped_text` function to each text.
 
     This function takes a DataFrame, a raw text file path, and a clean text file path
-    as input. It compares the UIDs of raw texts and clean texts to identify the texts
-    that need cleaning. It then applies the `clean_scraped_text` function to each raw
-    text to perform basic cleaning operations and saves the cleaned texts to the clean
-    text file path.
+    as input. It uses the manifest in the clean text directory (see MANIFEST_NAME) to
+    identify the texts that need cleaning: those without a clean text, those whose raw
+    text changed and those cleaned by a different version of the cleaning pipeline. It
+    then applies the cleaning pipeline to each of these raw texts and saves the cleaned
+    texts to the clean text file path.
 
     Parameters
     ----------
@@ -171,6 +219,24 @@ def clean_raw_scrapes(
         The file path to the directory where the cleaned text files will be saved.
     limit_to_df : bool
         Whether to only fix texts with UIDs in the DF of interest
+    workers : int
+        Number of processes used to clean texts, by default 1 (no multiprocessing)
+    profiler : Optional[StageProfiler]
+        If given, the time spent in each cleaning stage of each text is recorded to
+        it, see StageProfiler.print_summary(). By default None (no profiling).
+    cache_dir : Optional[Path]
+        If given, the output of each cleaning stage is cached in this directory, so
+        that re-cleaning a text after changing a stage only re-runs the stages from
+        that one onwards. By default None (no caching).
+    cache_max_entries : Optional[int]
+        Number of stage outputs kept in cache_dir, the least recently used ones are
+        deleted after cleaning. By default CACHE_MAX_ENTRIES (None for no limit).
+
+    Returns
+    -------
+    pd.Series
+        The number of improperly encoded sequences repaired in each text cleaned,
+        indexed by UID. Useful for tracking the quality of the raw texts.
 
     Raises
     ------
@@ -189,47 +255,112 @@ def clean_raw_scrapes(
     - If an error occurs during the cleaning process, the function prints an error
       message, including the UID and, if available, the associated URL from the
       DataFrame `df`. The specific error encountered is also printed.
-    - If multiple errors occur, only the first encountered error is raised at the end of
-      the cleaning process, though all are printed to the console.
+    - If multiple errors occur, only the error for the lowest UID is raised at the end
+      of the cleaning process, though all are printed to the console.
+    - Progress and an ETA, based on the measured throughput, are printed every
+      PROGRESS_INTERVAL seconds.
+    - Texts which fail to clean are not recorded in the manifest, so they are retried
+      on the next run.
+    - Stage outputs cached under outdated keys (e.g. of a previous version of a stage)
+      are never used again, so they are the first to be pruned from cache_dir.
 
     """
     raw_uids = get_uids_from_path(raw_path)
     print(f"{len(raw_uids)} raw texts found")
-    clean_uids = get_uids_from_path(clean_path)
+    clean_uids = set(get_uids_from_path(clean_path))
     print(f"{len(clean_uids)} clean texts found")
 
-    uids_to_clean = [i for i in raw_uids if i not in clean_uids]
-    uids_to_clean.sort()
     if limit_to_df:
         print("Limiting cleaning only to files in the provided dataframe")
-        uids_to_clean = [uid for uid in uids_to_clean if uid in df["UID"].values]
+        df_uids = set(df["UID"].values)
+        raw_uids = [uid for uid in raw_uids if uid in df_uids]
+
+    pipeline = default_pipeline(cache_dir)
+    manifest = CleaningManifest(clean_path / MANIFEST_NAME)
+    uids_to_clean, pending = manifest.find_stale(
+        raw_path, raw_uids, clean_uids, pipeline.config_hash()
+    )
     n_uids = len(uids_to_clean)
 
-    if any(uids_to_clean):
-        ur = 6
-        lr = 4
-        lb_min, lb_sec = divmod(n_uids / ur, 60)
-        lb = f"{int(lb_min)} min {int(lb_sec)} sec"
-        ub_min, ub_sec = divmod(n_uids / lr, 60)
-        ub = f"{int(ub_min)} min {int(ub_sec)} sec"
-
-        print(f"Cleaning {n_uids} texts, starting with UID {uids_to_clean[0]}.")
-        print(f"Note processes ~{lr}-{ur} texts/sec.\nETA: {lb} to {ub}")
-
-        errs: List[ValueError | KeyError | NoHeadersError] = []
-        for uid in uids_to_clean:
+    if uids_to_clean:
+        n_new = len([uid for uid in uids_to_clean if uid not in clean_uids])
+        print(f"Cleaning {n_uids} texts ({n_new} new, {n_uids - n_new} out of date)")
+
+        errs: Dict[int, CleaningError] = {}
+        repairs: Dict[int, int] = {}
+
+        def _report(result: CleaningResult):
+            uid, e, n_repairs, records = result
+            repairs[uid] = n_repairs
+            if profiler is not None:
+                profiler.extend(records)
+            if e is None:
+                manifest.record(pending[uid])
+                return
             try:
-                clean_by_uid(uid, raw_path, clean_path)
-            except (ValueError, KeyError, NoHeadersError) as e:
-                try:
-                    url = f" ({df[df['UID'] == uid]['link'].values[0]})"
-                except Exception:
-                    url = ""
-                print(f"Error: UID {uid}{url}")
-                print(e)
-                errs.append(e)
+                url = f" ({df[df['UID'] == uid]['link'].values[0]})"
+            except Exception:
+                url = ""
+            print(f"Error: UID {uid}{url}")
+            print(e)
+            errs[uid] = e
+
+        profile = profiler is not None
+        start = time.perf_counter()
+        last_update = start
+        n_done = 0
+
+        def _update_progress():
+            nonlocal last_update
+            now = time.perf_counter()
+            if (now - last_update) >= PROGRESS_INTERVAL:
+                _print_progress(n_done, n_uids, start)
+                manifest.save()
+                last_update = now
+
+        try:
+            if workers <= 1:
+                for uid in uids_to_clean:
+                    _report(
+                        _clean_uid_safely(uid, raw_path, clean_path, pipeline, profile)
+                    )
+                    n_done += 1
+                    _update_progress()
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(
+                            _clean_uid_safely,
+                            uid,
+                            raw_path,
+                            clean_path,
+                            pipeline,
+                            profile,
+                        )
+                        for uid in uids_to_clean
+                    ]
+                    for future in as_completed(futures):
+                        _report(future.result())
+                        n_done += 1
+                        _update_progress()
+        finally:
+            # Keep track of what was cleaned, even if interrupted
+            manifest.save()
+            n_pruned = pipeline.prune_cache(max_entries=cache_max_entries)
+            if n_pruned:
+                print(f"Pruned {n_pruned} cached stage outputs")
+
+        _print_progress(n_done, n_uids, start)
+
+        repairs = pd.Series(repairs, name="encoding_repairs", dtype=int).sort_index()
+        repairs.index.name = "UID"
+        n_repaired = (repairs > 0).sum()
+        print(f"{n_repaired} texts had {repairs.sum()} improperly encoded sequences")
 
         if len(errs) > 0:
-            raise errs[0]
+            raise errs[min(errs)]
+        return repairs
     else:
+        manifest.save()
         print("All texts have already been cleaned and filtered.")
+        return pd.Series(name="encoding_repairs", dtype=int)
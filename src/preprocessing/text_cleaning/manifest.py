@@ -0,0 +1,130 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+import pandas as pd
+
+
+class ManifestEntry(NamedTuple):
+    uid: int
+    raw_hash: str
+    raw_size: int
+    raw_mtime_ns: int
+    cleaner_version: str
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CleaningManifest:
+    def __init__(self, path: Path):
+        """
+        Records, for each cleaned text, the hash of the raw text it was cleaned from
+        and the version of the cleaner used. A clean text is stale if its raw text or
+        the cleaner changed since, or if it does not exist.
+
+        Raw files whose size and modification time match the manifest are assumed
+        unchanged; other files are hashed to check.
+
+        Parameters
+        ----------
+        path : Path
+            Path to the manifest (CSV) file, created when first saved.
+        """
+        self.path = Path(path)
+        self.entries: Dict[int, ManifestEntry] = {}
+        if self.path.is_file():
+            df = pd.read_csv(self.path, dtype={"raw_hash": str, "cleaner_version": str})
+            self.entries = {
+                int(row.uid): ManifestEntry(
+                    int(row.uid),
+                    row.raw_hash,
+                    int(row.raw_size),
+                    int(row.raw_mtime_ns),
+                    row.cleaner_version,
+                )
+                for row in df.itertuples(index=False)
+            }
+
+    def find_stale(
+        self,
+        raw_path: Path,
+        raw_uids: Iterable[int],
+        clean_uids: Set[int],
+        cleaner_version: str,
+    ) -> Tuple[List[int], Dict[int, ManifestEntry]]:
+        """
+        Find the UIDs whose clean text is missing or out of date.
+
+        Parameters
+        ----------
+        raw_path : Path
+            The directory containing the raw text files.
+        raw_uids : Iterable[int]
+            UIDs of the raw texts.
+        clean_uids : Set[int]
+            UIDs of the existing clean texts.
+        cleaner_version : str
+            The current version of the cleaner.
+
+        Returns
+        -------
+        Tuple[List[int], Dict[int, ManifestEntry]]
+            The stale UIDs (sorted), and the entries to record for them once they
+            have been cleaned.
+        """
+        stale: List[int] = []
+        pending: Dict[int, ManifestEntry] = {}
+
+        for uid in raw_uids:
+            file = raw_path / f"{uid}.txt"
+            stat = os.stat(file)
+            old = self.entries.get(uid)
+
+            if (
+                (old is not None)
+                and (old.raw_size == stat.st_size)
+                and (old.raw_mtime_ns == stat.st_mtime_ns)
+            ):
+                raw_hash = old.raw_hash
+            else:
+                raw_hash = hash_file(file)
+            entry = ManifestEntry(
+                uid, raw_hash, stat.st_size, stat.st_mtime_ns, cleaner_version
+            )
+
+            up_to_date = (
+                (uid in clean_uids)
+                and (old is not None)
+                and (old.raw_hash == raw_hash)
+                and (old.cleaner_version == cleaner_version)
+            )
+            if not up_to_date:
+                stale.append(uid)
+                pending[uid] = entry
+            elif entry != old:
+                # Touched but unchanged, remember the new modification time
+                self.entries[uid] = entry
+
+        stale.sort()
+        return stale, pending
+
+    def record(self, entry: ManifestEntry):
+        """Record that a text has been cleaned."""
+        self.entries[entry.uid] = entry
+
+    def save(self):
+        """Write the manifest, replacing the previous one atomically."""
+        df = pd.DataFrame(
+            sorted(self.entries.values()), columns=ManifestEntry._fields
+        )
+        tmp_path = self.path.with_name(f"_{self.path.name}.tmp")
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
@@ -1,11 +1,16 @@
 from bs4 import BeautifulSoup, Tag
-from typing import List, Tuple, Callable
+from typing import List, Optional
 import re
-from collections import namedtuple
+from itertools import groupby
+from operator import itemgetter
+from markdown_it import MarkdownIt
+from markdown_it.common.utils import unescapeAll
+from mdit_plain.renderer import RendererPlain
+from mdit_py_plugins.front_matter import front_matter_plugin
 
 # Custom modules
 from .noise import FORMATTERS, NOISY_CSS, NOISY_METADATA, URL_PATTERN, HTML_TAG_PATTERN
-from .css_cleaning import clean_standard_css, clean_wrapper_css
+from .css_cleaning import clean_standard_css, clean_wrapper_css, get_css_classifier
 
 
 def strip_excess_whitespace(text: str) -> str:
@@ -101,8 +106,9 @@ def clean_css(
     lines = text.split("\n")
     single_line_block = re.compile(r"^{{.*}}")
     lines = [line for line in lines if not single_line_block.findall(line)]
-    lines = clean_wrapper_css(lines=lines, noisy_css=noisy_css)
-    lines = clean_standard_css(lines=lines, noisy_css=noisy_css, warn_limit=warn_limit)
+    classifier = get_css_classifier(noisy_css)
+    lines = clean_wrapper_css(lines=lines, noisy_css=classifier)
+    lines = clean_standard_css(lines=lines, noisy_css=classifier, warn_limit=warn_limit)
 
     lines = [line for line in lines if line != "}"]
     lines = [line for line in lines if line != "{"]
@@ -233,116 +239,231 @@ def clean_metadata(text: str, noisy_metadata: List[str] = NOISY_METADATA) -> str
     return text
 
 
-Image = namedtuple("Image", "label src title")
-Link = namedtuple("Link", "label href title")
-
-
-QUOTE1 = r"(" + re.escape('"') + r")"
-QUOTE2 = r"(" + re.escape("'") + r")"
-QUOTE = f"({QUOTE1}|{QUOTE2})"
-
-
-def link_repl(match: re.Match) -> str:
-    match_str: str = match.group(0)
-    match_str = match_str.split("](")[0]
-    match_str = match_str.lstrip("[")
-    return match_str
-
-
-def link_pattern_repl(link: Link) -> Tuple[str, str | Callable]:
-    """_summary_
-
-    Parameters
-    ----------
-    link : Link
-        _description_
-
-    Returns
-    -------
-    Tuple[str, str]
-        _description_
+# Configured like NLTK's MarkdownCorpusReader, so parses match its readers exactly
+MD_PARSER: MarkdownIt = MarkdownIt("commonmark", renderer_cls=RendererPlain).use(
+    front_matter_plugin
+)
+
+
+# Markdown link/image syntax, matched without backtracking: each alternative starts
+# with a different character. Labels may contain one level of brackets (e.g. an
+# image inside a link), destinations one level of parentheses. Labels with code
+# spans are not matched, as code spans take precedence over link syntax.
+_LABEL = r"(?:[^\[\]\\`\n]|\\.|\[(?:[^\[\]\\`\n]|\\.)*\])*"
+_DEST = r"(?:<[^<>\n]*>|(?:[^\s()\\]|\\.|\((?:[^\s()\\]|\\.)*\))*)"
+_TITLE = r"(?:\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*'|\((?:[^()\\\n]|\\.)*\))"
+LINK_IMAGE_PATTERN: str = (
+    rf"(?P<image>!)?\[(?P<label>{_LABEL})\]\((?P<pre>[ \t]*)(?P<dest>{_DEST})"
+    rf"(?:(?P<sep>[ \t]+)(?P<title>{_TITLE}))?(?P<post>[ \t]*)\)"
+)
+# Escaped characters and code spans, which are never part of link syntax
+ESCAPE_PATTERN: str = r"(?P<escape>\\[\\`!\[\]])"
+CODE_SPAN_PATTERN: str = (
+    r"(?P<code>(?<!`)(?P<ticks>`+)(?!`)"
+    r"(?:(?!\n[ \t]*\n)[\s\S])*?(?<!`)(?P=ticks)(?!`))"
+)
+# Links/images before URLs, so that a URL used as a link's destination is removed
+# with it
+LINK_IMAGE_URL_REGEX: re.Pattern = re.compile(
+    f"{ESCAPE_PATTERN}|{CODE_SPAN_PATTERN}|{LINK_IMAGE_PATTERN}|{URL_PATTERN}",
+    flags=re.IGNORECASE,
+)
+URL_REGEX: re.Pattern = re.compile(URL_PATTERN, flags=re.IGNORECASE)
+
+# Labels without any of these are plain text, i.e. a single text token
+_INLINE_MARKUP_CHARS = set("*_`<>![]\\&")
+# Text around the first token of a label that removal of a link allows (NLTK's
+# CategorizedMarkdownCorpusReader only reports a link's first token as its label)
+_EMPHASIS = r"( ?\*.*\* ?)?"
+_FENCE_PATTERN: re.Pattern = re.compile(r"^ {0,3}(`{3,}|~{3,})(.*)$")
+_LIST_ITEM_PATTERN: re.Pattern = re.compile(
+    r"^( {0,3}(?:[-+*]|[0-9]{1,9}[.)]))( {1,4}|\t|$)"
+)
+_FRONT_MATTER_PATTERN: re.Pattern = re.compile(r"^(-{3,})[ \t]*$")
+
+
+def _indent(line: str) -> int:
+    line = line.expandtabs(4)
+    return len(line) - len(line.lstrip(" "))
+
+
+def _unparsed_lines(lines: List[str]) -> List[bool]:
     """
-    label = re.escape(link.label)
-    # ( ?\*.*\* ?)? captures text between asterisks that are lost by NLTK
-    label = r"( ?\*.*\* ?)?" + label + r"( ?\*.*\* ?)?"
-    href = re.escape(link.href)
-    if link.title:
-        title = re.escape(link.title)
-        pattern = f"\[{label}\]\({href}\s*{QUOTE}{title}{QUOTE}\)"
+    Find the lines of a markdown text which are not parsed for links: front matter,
+    fenced code blocks and indented code blocks (which, inside list items, need to
+    be indented beyond the item's content). Line based, so nested blocks (e.g. code
+    in block quotes) are not recognised.
+    """
+    unparsed = [False] * len(lines)
+
+    start = 0
+    if lines and lines[0].startswith("---"):
+        # Front matter, if closed by a line of at least as many dashes
+        n_dashes = len(lines[0]) - len(lines[0].lstrip("-"))
+        for i in range(1, len(lines)):
+            m = _FRONT_MATTER_PATTERN.match(lines[i])
+            if (m is not None) and (len(m.group(1)) >= n_dashes):
+                unparsed[: i + 1] = [True] * (i + 1)
+                start = i + 1
+                break
+
+    fence: Optional[str] = None
+    list_indent: Optional[int] = None
+    prev_blank = True
+    prev_code = False
+    for i in range(start, len(lines)):
+        line = lines[i]
+        if fence is not None:
+            # Inside a fenced code block, until a closing fence (or the end)
+            unparsed[i] = True
+            m = _FENCE_PATTERN.match(line)
+            closes = (m is not None) and m.group(1).startswith(fence)
+            if closes and not m.group(2).strip():
+                fence = None
+            prev_blank, prev_code = False, False
+            continue
+
+        if line.strip() == "":
+            prev_blank = True
+            continue
+
+        indent = _indent(line)
+        code_indent = 4 if list_indent is None else list_indent + 4
+        if (indent >= code_indent) and (prev_blank or prev_code):
+            unparsed[i] = True
+            prev_blank, prev_code = False, True
+            continue
+
+        m = _FENCE_PATTERN.match(line)
+        if (m is not None) and not (m.group(1)[0] == "`" and "`" in m.group(2)):
+            unparsed[i] = True
+            fence = m.group(1)
+        elif (m := _LIST_ITEM_PATTERN.match(line)) is not None:
+            list_indent = len(m.group(1)) + max(len(m.group(2).expandtabs(4)), 1)
+        elif prev_blank and (indent < (list_indent or 0)):
+            # A paragraph after a blank line, which is not part of the list item
+            list_indent = None
+        prev_blank, prev_code = False, False
+
+    return unparsed
+
+
+def _first_token(label: str) -> str:
+    # Content of the first inline token of a link's label, i.e. the label NLTK reports
+    if not (_INLINE_MARKUP_CHARS & set(label)):
+        return label
+    tokens = MD_PARSER.parseInline(label)[0].children
+    return tokens[0].content if tokens else ""
+
+
+def _removable(match: re.Match) -> bool:
+    """
+    Whether a link/image is replaced, i.e. whether its destination and title are
+    written the way the parser reports them, and a link's label is (apart from
+    emphasis) its first token.
+    """
+    dest = match.group("dest")
+    if match.group("pre") or dest.startswith("<"):
+        return False
+    href = MD_PARSER.normalizeLink(unescapeAll(dest))
+    if (href != dest) or not MD_PARSER.validateLink(href):
+        return False
+
+    title = match.group("title")
+    if title is None:
+        if match.group("post"):
+            return False
+    elif title[0] == "(" or match.group("post") or (unescapeAll(title) != title):
+        return False
+
+    if match.group("image"):
+        return True
+    label = match.group("label")
+    return re.fullmatch(_EMPHASIS + re.escape(_first_token(label)) + _EMPHASIS, label)
+
+
+def _link_image_url_repl(match: re.Match) -> str:
+    if match.group("escape") is not None:
+        return match.group(0)
+    elif match.group("code") is not None:
+        # Code spans are not parsed, but URLs in them are removed
+        return URL_REGEX.sub("", match.group(0))
+    elif match.group("label") is None:
+        # A bare URL
+        return ""
+
+    # Clean the label the same way, removing any images or URLs in it
+    label = LINK_IMAGE_URL_REGEX.sub(_link_image_url_repl, match.group("label"))
+    if not _removable(match):
+        # Keep the syntax, without its URLs
+        start = match.end("label") - match.start()
+        rest = URL_REGEX.sub("", match.group(0)[start:])
+        return ("!" if match.group("image") else "") + "[" + label + rest
+    elif match.group("image"):
+        return ""
     else:
-        pattern = f"\[{label}\]\({href}\)"
-
-    repl = link_repl
-
-    return (pattern, repl)
+        # Unwrap the link
+        return label.split("](")[0].lstrip("[")
 
 
-def image_pattern_repl(image: Image) -> Tuple[str, str]:
-    """_summary_
-
-    Parameters
-    ----------
-    image : Image
-        _description_
-
-    Returns
-    -------
-    Tuple[str, str]
-        _description_
+def clean_links_images(text: str, max_pct_links: float = 0.4) -> str:
     """
-    label = re.escape(image.label)
-    # ( ?\*.*\* ?)? captures text between asterisks that are lost by NLTK
-    label = r"( ?\*.*\* ?)?" + label + r"( ?\*.*\* ?)?"
-    src = re.escape(image.src)
-    if image.title:
-        title = re.escape(image.title)
-        pattern = f"!\[{label}\]\({src}\s*{QUOTE}{title}{QUOTE}\)"
-    else:
-        pattern = f"!\[{label}\]\({src}\)"
-    repl = ""
-    return (pattern, repl)
+    Remove markdown images and URLs and replace markdown links with their labels, in
+    a single scan of the text. Lines which consisted largely of links/images/URLs
+    (other than headings) are dropped.
 
+    Links/images are found the way NLTK's CategorizedMarkdownCorpusReader parses
+    them: escaped brackets, code spans, code blocks and front matter are not parsed
+    (only URLs are removed from them), and links/images which the parser would
+    report in a different form (e.g. <...> destinations, or labels with emphasis
+    other than around the whole label) keep their syntax, without URLs.
 
-def clean_links_images(text: str, links: List[Link], images: List[Image]) -> str:
-    """_summary_
+    This differs from the previous approach (finding the links/images with the
+    parser, then substituting a pattern for each one over the whole text) in two
+    intentional ways:
+
+    - Text between two emphasised links on a line is kept. The old pattern for
+      emphasis around a label was greedy, so it also deleted everything between.
+    - Links in fenced/indented code blocks are never rewritten. Before, they were
+      rewritten whenever the same link also appeared outside the code block.
 
     Parameters
     ----------
     text : str
-        _description_
-    links : List[Link]
-        _description_
-    images : List[Image]
-        _description_
+        A markdown text.
+    max_pct_links : float, optional
+        Lines which shrink by this fraction or more are dropped, by default 0.4
 
     Returns
     -------
     str
-        _description_
+        The text without links, images and URLs.
     """
 
     lines = text.split("\n")
 
-    for img in images:
-        img_pat, img_repl = image_pattern_repl(img)
-        text = re.sub(pattern=img_pat, repl=img_repl, string=text)
-
-    for link in links:
-        link_pat, link_repl = link_pattern_repl(link)
-        text = re.sub(pattern=link_pat, repl=link_repl, string=text)
-
-    text = re.sub(pattern=URL_PATTERN, repl="", string=text, flags=re.IGNORECASE)
+    # Rewrite each run of parsed lines in one scan, the replacements never add or
+    # remove line breaks
+    edited: List[str] = []
+    runs = groupby(zip(_unparsed_lines(lines), lines), key=itemgetter(0))
+    for unparsed, group in runs:
+        chunk = "\n".join([line for _, line in group])
+        if unparsed:
+            chunk = URL_REGEX.sub("", chunk)
+        else:
+            chunk = LINK_IMAGE_URL_REGEX.sub(_link_image_url_repl, chunk)
+        edited.extend(chunk.split("\n"))
 
     clean_lines = []
-    for edited, original in zip(text.split("\n"), lines):
+    for edited_line, original in zip(edited, lines):
         if original:
-            pct_link = 1 - (len(edited) / len(original))
-            if (pct_link >= 0.4) and ("#" not in original):
+            pct_link = 1 - (len(edited_line) / len(original))
+            if (pct_link >= max_pct_links) and ("#" not in original):
                 pass
             else:
-                clean_lines.append(edited)
+                clean_lines.append(edited_line)
         else:
-            clean_lines.append(edited)
+            clean_lines.append(edited_line)
 
     text = "\n".join(clean_lines)
 
@@ -0,0 +1,573 @@
+import ast
+import hashlib
+import inspect
+import json
+import os
+import re
+import tempfile
+import textwrap
+import time
+from functools import lru_cache, partial
+from pathlib import Path
+from types import CodeType, FunctionType, ModuleType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .consistency import CONSISTENCY_RULES, JARGON_RULES, make_consistent
+from .credit_identification_helpers import CREDIT, check_if_any_pats
+from .encoding import repair_encoding
+from .mappers import ENCODING_MAPPER
+from .markup_style_cleaning import (
+    clean_css,
+    clean_formatters,
+    clean_html,
+    clean_links_images,
+    clean_metadata,
+    strip_excess_whitespace,
+)
+from .md_fixes import credited_horizontal_rules_to_headers, fix_markdown
+from .noise import FORMATTERS, HTML_TAG_PATTERN, NOISY_CSS, NOISY_METADATA, URL_PATTERN
+from .nuisance_credits import NUISSANCE_PATTERNS, fix_known_nuisance_credits
+from .profiling import StageProfiler, run_stage
+
+StageOutput = Union[str, Tuple[str, Dict[str, int]]]
+
+# Part of every pipeline's config_hash(). Bump after changes to how cleaned texts are
+# produced which no stage's source hash covers, e.g. to how clean_by_uid() writes them
+CLEANER_VERSION: int = 1
+
+
+class CleaningStage(NamedTuple):
+    name: str
+    # Takes a text, returns the cleaned text and optionally a dict of statistics
+    func: Callable[[str], StageOutput]
+    # Anything (besides the input) the stage's output depends on, e.g. patterns
+    config: Any = None
+    # Bump to invalidate the stage's cached outputs after changes its source hash
+    # cannot see, e.g. to a data file the stage reads (see source_hash())
+    version: int = 1
+    # Whether to cache the stage's output (cheap stages need not be)
+    cache: bool = True
+
+
+def _config_token(config: Any) -> Any:
+    # A deterministic, fully spelled out representation (re.Pattern's repr is
+    # truncated and dicts are order-sensitive here, e.g. JARGON is applied in order)
+    if isinstance(config, re.Pattern):
+        return ["re", config.pattern, int(config.flags)]
+    elif isinstance(config, dict):
+        return [[_config_token(k), _config_token(v)] for k, v in config.items()]
+    elif isinstance(config, (set, frozenset)):
+        return [_config_token(c) for c in sorted(config, key=repr)]
+    elif isinstance(config, (list, tuple)):
+        return [_config_token(c) for c in config]
+    else:
+        return repr(config)
+
+
+def _code_names(code: CodeType) -> Iterator[str]:
+    # Names a function refers to, including in nested functions and comprehensions
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _code_names(const)
+
+
+def _getsource(obj: Any) -> str:
+    # The code of an object's source, without docstrings, comments or formatting,
+    # which can then be edited without changing the hash
+    try:
+        source = textwrap.dedent(inspect.getsource(obj))
+    except (OSError, TypeError):
+        # E.g. classes made by namedtuple(), which have no source of their own
+        return ""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        # E.g. a lambda, whose source is the lines it is defined on
+        return source
+
+    for node in ast.walk(tree):
+        if not isinstance(
+            node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+        ):
+            continue
+        body = node.body
+        if (
+            body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            node.body = body[1:]
+    return ast.dump(tree)
+
+
+class _SourceTokens:
+    def __init__(self, packages: Set[str]):
+        """
+        Deterministic representations ("tokens") of the values a stage's code refers
+        to. Functions, classes and modules of the given (root) packages are
+        represented by name, and their source (with the tokens of everything they
+        refer to) is added to self.sources. Objects of other packages are
+        represented by their type only.
+        """
+        self.packages = packages
+        self.sources: Dict[str, Any] = {}
+
+    def _in_packages(self, module: Optional[str]) -> bool:
+        return (module or "").split(".")[0] in self.packages
+
+    def token(self, value: Any, stack: FrozenSet[int] = frozenset()) -> Any:
+        if isinstance(value, (str, bytes, int, float, bool, type(None))):
+            return repr(value)
+        elif isinstance(value, re.Pattern):
+            return ["re", value.pattern, int(value.flags)]
+        if id(value) in stack:
+            return "<cycle>"
+        stack = stack | {id(value)}
+
+        if callable(value):
+            # E.g. functions wrapped by lru_cache
+            value = inspect.unwrap(value)
+        if isinstance(value, partial):
+            return [
+                self.token(value.func, stack),
+                self.token(value.args, stack),
+                self.token(value.keywords, stack),
+            ]
+        elif inspect.ismethod(value):
+            return self.token(value.__func__, stack)
+        elif isinstance(value, ModuleType):
+            name = value.__name__
+            if self._in_packages(name) and (name not in self.sources):
+                self.sources[name] = _getsource(value)
+            return name
+        elif isinstance(value, (FunctionType, type)):
+            name = f"{value.__module__}.{value.__qualname__}"
+            if self._in_packages(value.__module__) and (name not in self.sources):
+                # Placeholder, in case of recursion
+                self.sources[name] = None
+                if isinstance(value, type):
+                    self.sources[name] = self._class_source(value, stack)
+                else:
+                    self.sources[name] = self._function_source(value, stack)
+            return name
+        elif isinstance(value, dict):
+            return [
+                [self.token(k, stack), self.token(v, stack)] for k, v in value.items()
+            ]
+        elif isinstance(value, (set, frozenset)):
+            return sorted([self.token(v, stack) for v in value], key=json.dumps)
+        elif isinstance(value, (list, tuple)):
+            return [self.token(v, stack) for v in value]
+        elif self._in_packages(type(value).__module__):
+            # An instance of a class of the packages, e.g. a PatternSet
+            return [self.token(type(value), stack), self.token(vars(value), stack)]
+        else:
+            return f"{type(value).__module__}.{type(value).__qualname__}"
+
+    def _function_source(self, func: FunctionType, stack: FrozenSet[int]) -> Any:
+        closure = [cell.cell_contents for cell in func.__closure__ or ()]
+        used = {
+            name: self.token(func.__globals__[name], stack)
+            for name in _code_names(func.__code__)
+            if name in func.__globals__
+        }
+        return [
+            _getsource(func),
+            self.token(func.__defaults__, stack),
+            self.token(func.__kwdefaults__, stack),
+            self.token(closure, stack),
+            used,
+        ]
+
+    def _class_source(self, cls: type, stack: FrozenSet[int]) -> Any:
+        methods = {}
+        for name, attr in vars(cls).items():
+            if isinstance(attr, (staticmethod, classmethod)):
+                methods[name] = self.token(attr.__func__, stack)
+            elif isinstance(attr, property):
+                methods[name] = self.token(attr.fget, stack)
+            elif isinstance(attr, FunctionType):
+                methods[name] = self.token(attr, stack)
+        return [_getsource(cls), methods]
+
+
+@lru_cache(maxsize=None)
+def source_hash(func: Callable) -> str:
+    """
+    Hash of a stage function's source and of everything it uses from its own package
+    and this one, recursively: the source of the functions and classes it calls and
+    the values of the patterns and constants they refer to (including default
+    arguments). Any code change which could change the function's output changes
+    the hash, except to data read from files. Docstrings, comments and formatting
+    are not part of the hash.
+
+    Parameters
+    ----------
+    func : Callable
+        The stage function.
+
+    Returns
+    -------
+    str
+        A SHA-256 hex digest.
+    """
+    packages = {__name__.split(".")[0], (func.__module__ or "").split(".")[0]}
+    tokens = _SourceTokens(packages)
+    token = tokens.token(func)
+    data = json.dumps([token, tokens.sources], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def stage_key(prev_key: str, stage: CleaningStage) -> str:
+    """
+    Cache key of a stage's output, given the key (or hash) of its input.
+
+    Parameters
+    ----------
+    prev_key : str
+        Key of the previous stage's output, or the hash of the raw text.
+    stage : CleaningStage
+        The stage.
+
+    Returns
+    -------
+    str
+        A SHA-256 hex digest.
+    """
+    func = stage.func.func if isinstance(stage.func, partial) else stage.func
+    token = [
+        prev_key,
+        stage.name,
+        f"{func.__module__}.{func.__qualname__}",
+        source_hash(func),
+        stage.version,
+        _config_token(stage.config),
+    ]
+    return hashlib.sha256(json.dumps(token).encode("utf-8")).hexdigest()
+
+
+class CleaningPipeline:
+    def __init__(self, stages: List[CleaningStage], cache_dir: Optional[Path] = None):
+        """
+        An ordered list of named cleaning stages. With a cache directory, the output
+        of each (cached) stage is stored on disk under a key which hashes the raw
+        text and the configuration and code (see source_hash()) of that stage and of
+        every stage before it. A re-run then starts from the output of the last stage
+        whose key is unchanged, i.e. only the stages from the first changed one
+        onwards are run again. Outputs under outdated keys are never read again, see
+        prune_cache() for removing them.
+
+        Parameters
+        ----------
+        stages : List[CleaningStage]
+            The stages, in the order they are applied.
+        cache_dir : Optional[Path], optional
+            Directory for cached stage outputs, by default None (no caching)
+        """
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Stage names must be unique: {names}")
+        self.stages = stages
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+
+    def stage_names(self) -> List[str]:
+        return [stage.name for stage in self.stages]
+
+    def config_hash(self) -> str:
+        """
+        Hash of CLEANER_VERSION and of every stage's name, function, source hash,
+        version and config, i.e. a version of the cleaner which changes whenever any
+        stage's output could.
+        """
+        key = f"cleaner-{CLEANER_VERSION}"
+        for stage in self.stages:
+            key = stage_key(key, stage)
+        return key
+
+    def keys(self, text: str) -> List[str]:
+        """Cache keys of each stage's output for a raw text."""
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        keys = []
+        for stage in self.stages:
+            key = stage_key(key, stage)
+            keys.append(key)
+        return keys
+
+    def _cache_path(self, stage: CleaningStage, key: str) -> Path:
+        return self.cache_dir / stage.name / key[:2] / f"{key}.json"
+
+    def _load(self, stage: CleaningStage, key: str) -> Optional[Dict[str, Any]]:
+        path = self._cache_path(stage, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Mark the entry as recently used, see prune_cache()
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry
+
+    def _store(self, stage: CleaningStage, key: str, text: str, stats: Dict[str, int]):
+        path = self._cache_path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial entry. The temporary file
+        # is unique, as other threads/processes may be storing the same entry
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=path.parent,
+            prefix=f"_{key}.",
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump({"text": text, "stats": stats}, f)
+        os.replace(f.name, path)
+
+    def prune_cache(
+        self, max_entries: Optional[int] = None, max_age: Optional[float] = None
+    ) -> int:
+        """
+        Delete cached stage outputs: those last used more than max_age seconds ago,
+        then the least recently used ones beyond max_entries. Outputs under keys of
+        outdated code or configuration are never used again, so are pruned first.
+
+        Parameters
+        ----------
+        max_entries : Optional[int], optional
+            Number of entries to keep, by default None (no limit)
+        max_age : Optional[float], optional
+            Seconds since an entry was last written or read, by default None (no
+            limit)
+
+        Returns
+        -------
+        int
+            The number of entries deleted.
+        """
+        if (self.cache_dir is None) or not self.cache_dir.is_dir():
+            return 0
+
+        entries = []
+        for path in self.cache_dir.glob("*/*/*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        # Most recently used first
+        entries.sort(reverse=True)
+
+        keep = len(entries)
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            keep = len([mtime for mtime, _ in entries if mtime >= cutoff])
+        if max_entries is not None:
+            keep = min(keep, max(max_entries, 0))
+
+        for _, path in entries[keep:]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        return len(entries) - keep
+
+    def run(
+        self, text: str, profiler: Optional[StageProfiler] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        Clean a text, resuming from cached stage outputs where possible.
+
+        Parameters
+        ----------
+        text : str
+            The raw text.
+        profiler : Optional[StageProfiler], optional
+            Records each stage that is run, by default None
+
+        Returns
+        -------
+        Tuple[str, Dict[str, int]]
+            The cleaned text and the statistics reported by the stages.
+        """
+        stats: Dict[str, int] = {}
+        start = 0
+
+        keys: List[Optional[str]] = [None] * len(self.stages)
+        if self.cache_dir is not None:
+            keys = self.keys(text)
+            for i in reversed(range(len(self.stages))):
+                if not self.stages[i].cache:
+                    continue
+                entry = self._load(self.stages[i], keys[i])
+                if entry is not None:
+                    text = entry["text"]
+                    stats.update(entry["stats"])
+                    start = i + 1
+                    break
+
+        for stage, key in zip(self.stages[start:], keys[start:]):
+            out = run_stage(profiler, stage.name, stage.func, text)
+            if isinstance(out, tuple):
+                text, stage_stats = out
+                stats.update(stage_stats)
+            else:
+                text = out
+            if (key is not None) and stage.cache:
+                self._store(stage, key, text, stats)
+
+        return text, stats
+
+
+def _repair_encoding(text: str) -> Tuple[str, Dict[str, int]]:
+    text, n_repairs = repair_encoding(text)
+    return text, {"encoding_repairs": n_repairs}
+
+
+def _clean_html_tags(text: str) -> str:
+    if re.search(pattern=HTML_TAG_PATTERN, string=text):
+        text = clean_html(text)
+    return text
+
+
+def _clean_links_images(text: str) -> str:
+    imgs_or_links = ("](" in text) or bool(re.search(pattern=URL_PATTERN, string=text))
+    if imgs_or_links:
+        text = clean_links_images(text)
+    return text
+
+
+def _drop_num_lines(text: str) -> str:
+    return "\n".join([line for line in text.split("\n") if line.strip() != "Num"])
+
+
+def _credited_rules_to_headers(text: str) -> str:
+    text = text.rstrip().lstrip()
+    # Check if there could be improperly marked credit sections
+    if "___" in text:
+        if check_if_any_pats(CREDIT, text):
+            text = credited_horizontal_rules_to_headers(text)
+    return text
+
+
+def _drop_underscore_runs(text: str) -> str:
+    return re.sub(r"__+", "", text)
+
+
+def scraped_text_stages(
+    fix_encoding: bool = True,
+    formatters: List[str] = FORMATTERS,
+    noisy_css: List[re.Pattern] = NOISY_CSS,
+    warn_limit: int = 7,
+    noisy_metadata: List[str] = NOISY_METADATA,
+) -> List[CleaningStage]:
+    """
+    The stages of clean_scraped_text(): encoding repair, removal of HTML, page
+    formatters, CSS and metadata, markdown fixes and whitespace stripping.
+
+    Parameters
+    ----------
+    fix_encoding : bool, optional
+        Whether to include the encoding repair stage, by default True
+    formatters : List[str], optional
+        Page formatters to remove, by default FORMATTERS
+    noisy_css : List[re.Pattern], optional
+        Patterns of known CSS, by default NOISY_CSS
+    warn_limit : int, optional
+        See clean_standard_css(), by default 7
+    noisy_metadata : List[str], optional
+        Metadata keys to remove, by default NOISY_METADATA
+
+    Returns
+    -------
+    List[CleaningStage]
+        The stages, in order.
+    """
+    stages = []
+    if fix_encoding:
+        stages.append(CleaningStage("encoding", _repair_encoding, ENCODING_MAPPER))
+    stages += [
+        CleaningStage("html", _clean_html_tags, HTML_TAG_PATTERN),
+        CleaningStage(
+            "formatters",
+            partial(clean_formatters, page_formatters=formatters),
+            formatters,
+            cache=False,
+        ),
+        CleaningStage(
+            "css",
+            partial(clean_css, noisy_css=noisy_css, warn_limit=warn_limit),
+            [noisy_css, warn_limit],
+        ),
+        CleaningStage(
+            "metadata",
+            partial(clean_metadata, noisy_metadata=noisy_metadata),
+            noisy_metadata,
+            cache=False,
+        ),
+        CleaningStage("markdown", fix_markdown),
+        CleaningStage("whitespace", strip_excess_whitespace, cache=False),
+    ]
+    return stages
+
+
+def default_stages() -> List[CleaningStage]:
+    """
+    The stages clean_by_uid() applies to a raw text, in order.
+
+    Returns
+    -------
+    List[CleaningStage]
+        The stages.
+    """
+    return [
+        # This is necessary for handling some really unusual methods of attributing
+        # credit. Uses patterns in /src/prepocessing/text_cleaning/nuisance_credits.csv
+        CleaningStage(
+            "nuisance_credits", fix_known_nuisance_credits, NUISSANCE_PATTERNS
+        ),
+        *scraped_text_stages(),
+        CleaningStage("links_images", _clean_links_images, URL_PATTERN),
+        CleaningStage("num_lines", _drop_num_lines, cache=False),
+        CleaningStage(
+            "make_consistent",
+            make_consistent,
+            [
+                [(target, repl) for target, repl, _, _ in JARGON_RULES],
+                [rule.name for rule in CONSISTENCY_RULES],
+            ],
+        ),
+        CleaningStage(
+            "credited_rules_to_headers", _credited_rules_to_headers, CREDIT.patterns
+        ),
+        CleaningStage("underscores", _drop_underscore_runs, cache=False),
+    ]
+
+
+def default_pipeline(cache_dir: Optional[Path] = None) -> CleaningPipeline:
+    """
+    The pipeline clean_by_uid() uses, optionally caching stage outputs.
+
+    Parameters
+    ----------
+    cache_dir : Optional[Path], optional
+        Directory for cached stage outputs, by default None (no caching)
+
+    Returns
+    -------
+    CleaningPipeline
+        The pipeline.
+    """
+    return CleaningPipeline(default_stages(), cache_dir=cache_dir)
@@ -0,0 +1,176 @@
+import time
+from pathlib import Path
+from typing import Any, Callable, List, NamedTuple, Optional, TypeVar
+
+import pandas as pd
+
+R = TypeVar("R")
+
+
+class StageRecord(NamedTuple):
+    uid: Optional[int]
+    stage: str
+    seconds: float
+    in_chars: int
+    out_chars: int
+
+
+def _n_chars(obj: Any) -> int:
+    # Stages return either a text or a tuple starting with the text
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    return len(obj) if isinstance(obj, str) else 0
+
+
+class StageProfiler:
+    def __init__(self):
+        """
+        Records the wall time and input/output size of each call to a cleaning stage,
+        per document. Pass one to clean_raw_scrapes (or clean_by_uid) to profile the
+        cleaning pipeline; without one, stages run without any instrumentation.
+        """
+        self.records: List[StageRecord] = []
+        self.uid: Optional[int] = None
+
+    def start_document(self, uid: Optional[int]):
+        """Attribute the following stage calls to a document."""
+        self.uid = uid
+
+    def run(self, stage: str, func: Callable[..., R], text: str, *args, **kwargs) -> R:
+        """
+        Run a stage, i.e. func(text, *args, **kwargs), and record it.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage.
+        func : Callable[..., R]
+            The stage's function, which takes the text as its first argument.
+        text : str
+            The stage's input text.
+
+        Returns
+        -------
+        R
+            The function's output.
+        """
+        start = time.perf_counter()
+        out = func(text, *args, **kwargs)
+        seconds = time.perf_counter() - start
+        self.records.append(
+            StageRecord(self.uid, stage, seconds, len(text), _n_chars(out))
+        )
+        return out
+
+    def extend(self, records: List[StageRecord]):
+        """Add records, e.g. those collected by a worker process."""
+        self.records.extend(records)
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Get all records, one row per stage call.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns "uid", "stage", "seconds", "in_chars" and "out_chars".
+        """
+        return pd.DataFrame(self.records, columns=StageRecord._fields)
+
+    def to_csv(self, path: Path):
+        """Write all records to a CSV file."""
+        self.to_df().to_csv(path, index=False)
+
+    def stage_summary(self) -> pd.DataFrame:
+        """
+        Summarise the records per stage, slowest (in total) first.
+
+        Returns
+        -------
+        pd.DataFrame
+            Calls, documents, total/mean/max seconds, share of the total time and
+            characters in/out of each stage, indexed by stage.
+        """
+        df = self.to_df()
+        summary = df.groupby("stage").agg(
+            calls=("seconds", "size"),
+            documents=("uid", "nunique"),
+            total_seconds=("seconds", "sum"),
+            mean_seconds=("seconds", "mean"),
+            max_seconds=("seconds", "max"),
+            in_chars=("in_chars", "sum"),
+            out_chars=("out_chars", "sum"),
+        )
+        pct_time = 100 * summary["total_seconds"] / df["seconds"].sum()
+        summary.insert(5, "pct_time", pct_time)
+        return summary.sort_values("total_seconds", ascending=False)
+
+    def slowest_documents(self, n: int = 10) -> pd.DataFrame:
+        """
+        Get the documents which took longest to clean.
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of documents, by default 10
+
+        Returns
+        -------
+        pd.DataFrame
+            Total seconds, input characters and the slowest stage of each document,
+            indexed by UID.
+        """
+        df = self.to_df()
+        by_uid = df.groupby("uid")
+        slowest_stage = df.loc[by_uid["seconds"].idxmax(), ["uid", "stage"]]
+        summary = pd.DataFrame(
+            {
+                "total_seconds": by_uid["seconds"].sum(),
+                # The first stage's input is the raw document
+                "in_chars": by_uid["in_chars"].first(),
+                "slowest_stage": slowest_stage.set_index("uid")["stage"],
+            }
+        )
+        return summary.sort_values("total_seconds", ascending=False).head(n)
+
+    def print_summary(self, n: int = 10):
+        """Print the stage summary and the n slowest documents."""
+        if not self.records:
+            print("No stages were profiled.")
+            return
+        print("Time per stage:")
+        print(self.stage_summary().to_string(float_format="{:.4f}".format))
+        print(f"\n{n} slowest documents:")
+        print(self.slowest_documents(n).to_string(float_format="{:.4f}".format))
+
+
+def run_stage(
+    profiler: Optional[StageProfiler],
+    stage: str,
+    func: Callable[..., R],
+    text: str,
+    *args,
+    **kwargs,
+) -> R:
+    """
+    Run a cleaning stage, recording it if a profiler is given.
+
+    Parameters
+    ----------
+    profiler : Optional[StageProfiler]
+        The profiler, or None to run the stage without instrumentation.
+    stage : str
+        Name of the stage.
+    func : Callable[..., R]
+        The stage's function, which takes the text as its first argument.
+    text : str
+        The stage's input text.
+
+    Returns
+    -------
+    R
+        The function's output.
+    """
+    if profiler is None:
+        return func(text, *args, **kwargs)
+    return profiler.run(stage, func, text, *args, **kwargs)
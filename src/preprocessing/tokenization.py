@@ -1,11 +1,23 @@
-from typing import List, Sequence, Callable, Set, TypeVar, Generic
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Sequence,
+    Set,
+    TypeVar,
+    Union,
+)
 import pandas as pd
 import numpy as np
 from nltk.tokenize import word_tokenize
-from nltk import pos_tag
+from nltk import pos_tag_sents
 from num2words import num2words
 from itertools import chain, combinations
-from sklearn.feature_extraction.text import CountVectorizer
+from functools import lru_cache
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from statistics import variance
 import re
 
@@ -61,6 +73,7 @@ class TokenSplitter:
 
 K = TypeVar("K")
 V = TypeVar("V")
+T = TypeVar("T")
 
 
 class TokenMapper(Generic[K, V], dict):
@@ -68,6 +81,26 @@ class TokenMapper(Generic[K, V], dict):
         return [key]
 
 
+ORD_SUFF: List[str] = ["st", "nd", "rd", "th"]
+
+
+@lru_cache(maxsize=65536)
+def _number_to_words(match_str: str) -> str:
+    # The same numbers recur throughout a corpus, and num2words is slow
+    match_str = match_str.replace(",", "")
+    match_str = match_str.strip()
+
+    check_ord_strings = [suff in match_str.lower() for suff in ORD_SUFF]
+    if any(check_ord_strings):
+        ind = check_ord_strings.index(True)
+        suff = ORD_SUFF[ind]
+        num_str = match_str.lower().replace(suff, "")
+        return num2words(num_str, to="ordinal")
+
+    else:
+        return num2words(match_str)
+
+
 def convert_numbers(text: str) -> str:
     """_summary_
 
@@ -81,22 +114,9 @@ def convert_numbers(text: str) -> str:
     str
         _description_
     """
-    ORD_SUFF: List[str] = ["st", "nd", "rd", "th"]
 
     def to_num(match: re.Match) -> str:
-        match_str: str = match.group(0)
-        match_str = match_str.replace(",", "")
-        match_str = match_str.strip()
-
-        check_ord_strings = [suff in match_str.lower() for suff in ORD_SUFF]
-        if any(check_ord_strings):
-            ind = check_ord_strings.index(True)
-            suff = ORD_SUFF[ind]
-            num_str = match_str.lower().replace(suff, "")
-            return num2words(num_str, to="ordinal")
-
-        else:
-            return num2words(match_str)
+        return _number_to_words(match.group(0))
 
     # Define pattern
     base_pat = r"[0-9]+"
@@ -108,6 +128,32 @@ def convert_numbers(text: str) -> str:
     return re.sub(pattern=pattern, repl=to_num, string=text, flags=re.IGNORECASE)
 
 
+def _map_text(text: str, token_mappings: TokenMapper) -> List[str]:
+    # Lowercase, convert numbers, split into word tokens and apply the token mappings
+    tokens: List[str] = []
+    for token in word_tokenize(convert_numbers(text.lower())):
+        tokens.extend(token_mappings[token])
+    return tokens
+
+
+# Token mappings of the tokenizer being applied, set once in each worker process
+_WORKER_MAPPINGS: TokenMapper = TokenMapper()
+
+
+def _init_worker(token_mappings: TokenMapper):
+    global _WORKER_MAPPINGS
+    _WORKER_MAPPINGS = token_mappings
+
+
+def _map_texts(texts: List[str]) -> List[List[str]]:
+    return [_map_text(text, _WORKER_MAPPINGS) for text in texts]
+
+
+def _chunks(items: Sequence[T], chunk_size: int) -> List[Sequence[T]]:
+    chunk_size = max(chunk_size, 1)
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
 class EmbeddingAwareTokenizer:
     def __init__(
         self,
@@ -126,19 +172,61 @@ class EmbeddingAwareTokenizer:
         self.common_vocab: Set[str] = set()
         self.token_mappings: TokenMapper[str, List[str]] = TokenMapper()
         self._fitted: bool = False
+        # Placeholder (POS tag) each unknown token was first resolved to
+        self.unknown_mappings: Dict[str, str] = {}
+        self._known_terms: Set[str] = set()
+        self._known_terms_key: tuple = ()
+
+    def __getstate__(self) -> dict:
+        # The known terms cache is rebuilt when needed, don't pickle it
+        state = self.__dict__.copy()
+        state["_known_terms"] = set()
+        state["_known_terms_key"] = ()
+        return state
+
+    def __setstate__(self, state: dict):
+        state.setdefault("unknown_mappings", {})
+        self.__dict__.update(state)
 
     @property
     def token_mapping_keys(self) -> Set[str]:
-        keys = set([k for k in self.token_mappings.keys()])
+        keys = set(self.token_mappings)
         return keys
 
+    def _known_terms_signature(self) -> tuple:
+        # The vocabularies and mappings only ever grow, so their sizes tell whether
+        # they have changed
+        return (
+            id(self.embedding_vocab),
+            len(self.embedding_vocab),
+            id(self.common_vocab),
+            len(self.common_vocab),
+            id(self.token_mappings),
+            len(self.token_mappings),
+        )
+
+    @property
+    def known_terms(self) -> Set[str]:
+        """
+        The common vocabulary, token mapping keys and embedding vocabulary combined.
+        Cached, and only rebuilt when any of them has changed (e.g. after fit()).
+        Treat as read only.
+        """
+        signature = self._known_terms_signature()
+        if getattr(self, "_known_terms_key", None) != signature:
+            self._known_terms = self.common_vocab.union(self.token_mapping_keys).union(
+                self.embedding_vocab
+            )
+            self._known_terms_key = signature
+        return self._known_terms
+
     @property
     def vocab(self) -> Set[str]:
         vocab = self.embedding_vocab.union(self.common_vocab)
         return vocab
 
-    def _tokenize(self, text: str) -> List[str]:
-        """_summary_
+    def _map_tokens(self, text: str) -> List[str]:
+        """Split a text into word tokens and apply the token mappings.
 
         Parameters
         ----------
@@ -150,31 +238,112 @@ class EmbeddingAwareTokenizer:
         List[str]
             _description_
         """
-        initial_tokens = word_tokenize(text)
         tokens: List[str] = []
-        for token in initial_tokens:
+        for token in word_tokenize(text):
             tokens.extend(self.token_mappings[token])
+        return tokens
 
-        known_terms = self.common_vocab.union(self.token_mapping_keys).union(
-            self.embedding_vocab
-        )
+    def _texts_to_tag(self, token_lists: List[List[str]]) -> List[int]:
+        """Find the texts which need POS tagging, i.e. those with unknown tokens not
+        resolved before or in an earlier text.
 
-        # If there are unknown tokens, get the POS tags
-        if any([t not in known_terms for t in tokens]):
-            if self.unknown_token == "":
-                pos_tags = pos_tag(tokens)
+        Parameters
+        ----------
+        token_lists : List[List[str]]
+            The mapped tokens of each text.
 
-                for i, token in enumerate(pos_tags):
-                    if token[0] not in known_terms:
-                        ptag = "<" + token[1] + ">"
-                        tokens[i] = ptag
-                        self.token_mappings[token] = ptag
-            else:
-                for i, token in enumerate(tokens):
-                    if token not in known_terms:
-                        tokens[i] = self.unknown_token
-                        self.token_mappings[token] = self.unknown_token
-        return tokens
+        Returns
+        -------
+        List[int]
+            Indices of the texts to tag.
+        """
+        known_terms = self.known_terms
+        memo = self.unknown_mappings
+        to_tag: List[int] = []
+        pending: Set[str] = set()
+        for i, tokens in enumerate(token_lists):
+            new = {t for t in tokens if (t not in known_terms) and (t not in memo)}
+            if new - pending:
+                to_tag.append(i)
+                pending.update(new)
+        return to_tag
+
+    def _resolve_unknowns(
+        self,
+        token_lists: List[List[str]],
+        tagger: Callable[[List[List[str]]], List[List[tuple]]] = pos_tag_sents,
+    ) -> List[List[str]]:
+        """Replace unknown tokens with the unknown token or, if there is none, with
+        their POS tag. Texts are resolved as if one after the other: a token resolved
+        in one text keeps its placeholder in later texts (see unknown_mappings), so
+        only texts with unknown tokens not seen in earlier texts are POS tagged, all
+        in one call to the tagger.
+
+        Parameters
+        ----------
+        token_lists : List[List[str]]
+            The mapped tokens of each text.
+        tagger : Callable[[List[List[str]]], List[List[tuple]]], optional
+            POS tags several texts' tokens, by default pos_tag_sents
+
+        Returns
+        -------
+        List[List[str]]
+            The tokens of each text, unknown tokens replaced.
+        """
+        known_terms = self.known_terms
+
+        if self.unknown_token != "":
+            unk = self.unknown_token
+            return [[t if t in known_terms else unk for t in ts] for ts in token_lists]
+
+        to_tag = self._texts_to_tag(token_lists)
+        if to_tag:
+            tagged = tagger([token_lists[i] for i in to_tag])
+            pos_tags = dict(zip(to_tag, tagged))
+        else:
+            pos_tags = {}
+
+        memo = self.unknown_mappings
+        resolved: List[List[str]] = []
+        for i, tokens in enumerate(token_lists):
+            if i not in pos_tags:
+                # Any unknown tokens were resolved in an earlier text
+                resolved.append(
+                    [t if t in known_terms else memo.get(t, t) for t in tokens]
+                )
+                continue
+            out: List[str] = []
+            new_mappings: Dict[str, str] = {}
+            for token, tag in pos_tags[i]:
+                if token in known_terms:
+                    out.append(token)
+                elif token in memo:
+                    out.append(memo[token])
+                else:
+                    # Tagged in context, only memorised once the text is done
+                    ptag = "<" + tag + ">"
+                    out.append(ptag)
+                    new_mappings[token] = ptag
+            memo.update(new_mappings)
+            resolved.append(out)
+
+        return resolved
+
+    def _tokenize(self, text: str) -> List[str]:
+        """_summary_
+
+        Parameters
+        ----------
+        text : str
+            _description_
+
+        Returns
+        -------
+        List[str]
+            _description_
+        """
+        return self._resolve_unknowns([self._map_tokens(text)])[0]
 
     def tokenize(self, text: str) -> List[str]:
         """_summary_
@@ -195,26 +364,57 @@ class EmbeddingAwareTokenizer:
 
         return tokens
 
-    def get_count_df(self, corpus: pd.Series, tokenizer: Callable) -> pd.DataFrame:
-        """_summary_
+    def tokenize_batch(self, texts: Sequence[str]) -> List[List[str]]:
+        """Tokenize several texts, giving the same tokens as tokenize() on each text in
+        order (unknown tokens resolved in one text keep their placeholder in the next),
+        but POS tagging all texts with new unknown tokens at once.
 
         Parameters
         ----------
-        corpus : pd.Series
+        texts : Sequence[str]
             _description_
+
+        Returns
+        -------
+        List[List[str]]
+            The tokens of each text.
+        """
+        token_lists = [_map_text(text, self.token_mappings) for text in texts]
+        return self._resolve_unknowns(token_lists)
+
+    def get_count_df(
+        self, corpus: Union[str, Iterable[str]], tokenizer: Callable
+    ) -> pd.DataFrame:
+        """Count the tokens of a corpus, as CountVectorizer(tokenizer=tokenizer) summed
+        over the corpus would, but keeping only a counter of the vocabulary in memory.
+
+        Parameters
+        ----------
+        corpus : Union[str, Iterable[str]]
+            A single text, or texts (tokenized separately) which may be streamed.
         tokenizer : Callable
-            _description_
+            Splits a (lowercased) text into tokens.
 
         Returns
         -------
         pd.DataFrame
-            _description_
+            Columns "token" and "count", sorted by token.
         """
-        vectorizer = CountVectorizer(tokenizer=tokenizer, token_pattern=None)
-        count_vector = vectorizer.fit_transform([corpus])
-        counts = count_vector.toarray().sum(axis=0)
+        texts = [corpus] if isinstance(corpus, str) else corpus
+        counts: Counter = Counter()
+        for text in texts:
+            counts.update(tokenizer(text.lower()))
+        if not counts:
+            raise ValueError(
+                "empty vocabulary; perhaps the documents only contain stop words"
+            )
+
+        tokens = sorted(counts)
         count_df = pd.DataFrame(
-            {"token": vectorizer.get_feature_names_out(), "count": counts}
+            {
+                "token": np.array(tokens, dtype=object),
+                "count": np.array([counts[t] for t in tokens], dtype=np.int64),
+            }
         )
 
         return count_df
@@ -248,18 +448,18 @@ class EmbeddingAwareTokenizer:
         df["is_known"] = df["token"].isin(embedding_vocab)
         df = df[df["base_token"].str.len() > 1]
         df = df.sort_values(by=["is_known", "count"], ascending=[False, False])
-        preferred_variations: Sequence[str] = df[
-            ~df["base_token"].duplicated(keep="first")
-            & df["base_token"].duplicated(keep=False)
-        ]["token"]
-
-        mappings = {}
-        for token in preferred_variations:
-            basic_token = token.replace(delim, "")
-            variant_mask = (df["base_token"] == basic_token) & (df["token"] != token)
-            variants = df.loc[variant_mask, "token"]
-            for v in variants:
-                mappings[v] = [token]
+
+        # The preferred variation of a base token is its first (known, most common)
+        # one, every other variation is mapped to it
+        by_base = df.groupby("base_token", sort=False)["token"]
+        tokens = df["token"].to_numpy()
+        preferred = by_base.transform("first").to_numpy()
+        is_variant = tokens != preferred
+        # Grouped by preferred variation, in order (as the variants are found)
+        order = np.argsort(by_base.ngroup().to_numpy()[is_variant], kind="stable")
+        variants = tokens[is_variant][order]
+        preferred = preferred[is_variant][order]
+        mappings = {v: [p] for v, p in zip(variants, preferred)}
 
         self.token_mappings.update(mappings)
 
@@ -340,29 +540,37 @@ class EmbeddingAwareTokenizer:
 
         # Use only tokens containing the delimiter
         df = count_df[count_df["token"].str.contains(delim, regex=False)].copy()
+        df = df.reset_index(drop=True)
         # Get and check the splits
         df["split_tokens"] = df["token"].str.split(delim, regex=False)
         df["split_tokens"] = df["split_tokens"].map(
             lambda tokens: [t for t in tokens if t != ""]
         )
         vocab = self.embedding_vocab.union(self.common_vocab)
-        df["valid_splits"] = df["split_tokens"].map(
-            lambda toks: sum([t in vocab for t in toks]) > 0
+        subtokens = df["split_tokens"].explode()
+        in_vocab = subtokens.isin(vocab)
+        df["valid_splits"] = in_vocab.groupby(level=0).any().reindex(
+            df.index, fill_value=False
         )
 
         # Create and add mappings
-        mappings = df[df["valid_splits"]].set_index("token")["split_tokens"].to_dict()
+        valid = df[df["valid_splits"].astype(bool)]
+        mappings = dict(zip(valid["token"], valid["split_tokens"]))
         self.token_mappings.update(mappings)
 
         # Update original DF for return
-        count_df = count_df[~count_df["token"].isin([k for k in mappings.keys()])]
-
-        for token, subtokens in mappings.items():
-            added_count = df[df["token"] == token]["count"]
-            subtoken_rows = count_df["token"].isin(subtokens)
-            count_df.loc[subtoken_rows, "count"] = (
-                count_df.loc[subtoken_rows, "count"] + added_count
-            )
+        count_df = count_df[~count_df["token"].isin(mappings)].copy()
+
+        # Add the count of each split token to (each distinct one of) its subtokens
+        pairs = subtokens[df["valid_splits"].astype(bool).to_numpy()[subtokens.index]]
+        pairs = pairs.rename("subtoken").rename_axis("row").reset_index()
+        pairs = pairs.drop_duplicates()
+        pairs["count"] = pairs["row"].map(df["count"])
+        added_counts = pairs.groupby("subtoken")["count"].sum()
+        added_counts = count_df["token"].map(added_counts).fillna(0)
+        count_df["count"] = count_df["count"] + added_counts.astype(
+            count_df["count"].dtype
+        )
 
         return count_df
 
@@ -417,23 +625,22 @@ class EmbeddingAwareTokenizer:
 
         return df
 
-    def fit(self, corpus: str):
+    def fit(self, corpus: Union[str, List[str], pd.Series, np.ndarray]):
         """_summary_
 
         Parameters
         ----------
-        corpus : str
-            _description_
+        corpus : Union[str, List[str], pd.Series, np.ndarray]
+            A single text, or texts which are tokenized (and counted) one at a time,
+            see get_count_df()
         """
-        if not (isinstance(corpus, str)):
-            if isinstance(corpus, (list, pd.Series, np.ndarray)):
-                corpus = "\n".join(corpus)
-            else:
-                raise TypeError(
-                    "Expected a single string or a list, Pandas series or numpy array of strings"
-                )
+        if not isinstance(corpus, (str, list, pd.Series, np.ndarray)):
+            raise TypeError(
+                "Expected a single string or a list, Pandas series or numpy array of strings"
+            )
 
-        corpus = corpus.lower()
+        # Tokens resolved as unknown before may be known now
+        self.unknown_mappings.clear()
 
         count_df = self.get_count_df(corpus, tokenizer=word_tokenize)
         # Check for tokens that differ only by hyphenation or apostrophe
@@ -457,13 +664,72 @@ class EmbeddingAwareTokenizer:
 
         self._fitted = True
 
-    def fit_transform(self, corpus: pd.Series) -> pd.Series:
+    def transform(
+        self, corpus: pd.Series, workers: int = 1, chunk_size: int = 1000
+    ) -> pd.Series:
+        """Tokenize each text of a corpus, giving the same tokens as tokenize() on
+        each text in order, whatever the number of workers.
+
+        With several workers, the token mappings are sent to each worker process once,
+        which then split and map chunks of texts. Texts with new unknown tokens are
+        POS tagged in chunks by the workers too, while the (cheap) choice of texts to
+        tag and placing of the placeholders happen in order in this process. The
+        embedding vocabulary is never sent to the workers.
+
+        Parameters
+        ----------
+        corpus : pd.Series
+            _description_
+        workers : int, optional
+            Number of worker processes, by default 1 (no processes)
+        chunk_size : int, optional
+            Number of texts per task sent to a worker, by default 1000
+
+        Returns
+        -------
+        pd.Series
+            The tokens of each text, with the corpus' index.
+        """
+        if not isinstance(corpus, pd.Series):
+            corpus = pd.Series(corpus)
+        texts = corpus.to_list()
+
+        if (workers > 1) and (len(texts) > max(chunk_size, 1)):
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self.token_mappings,),
+            ) as executor:
+                token_lists = [
+                    tokens
+                    for chunk in executor.map(_map_texts, _chunks(texts, chunk_size))
+                    for tokens in chunk
+                ]
+
+                def tagger(sents: List[List[str]]) -> List[List[tuple]]:
+                    chunks = _chunks(sents, chunk_size)
+                    tagged = executor.map(pos_tag_sents, chunks)
+                    return [tags for chunk in tagged for tags in chunk]
+
+                tokens = self._resolve_unknowns(token_lists, tagger=tagger)
+        else:
+            tokens = self.tokenize_batch(texts)
+
+        return pd.Series(tokens, index=corpus.index, name=corpus.name, dtype=object)
+
+    def fit_transform(
+        self, corpus: pd.Series, workers: int = 1, chunk_size: int = 1000
+    ) -> pd.Series:
         """_summary_
 
         Parameters
         ----------
         corpus : pd.Series
             _description_
+        workers : int, optional
+            Number of worker processes for transform(), by default 1
+        chunk_size : int, optional
+            Number of texts per task sent to a worker, by default 1000
 
         Returns
         -------
@@ -472,12 +738,13 @@ class EmbeddingAwareTokenizer:
         """
         if not isinstance(corpus, pd.Series):
             corpus = pd.Series(corpus)
-        corpus_str = "\n".join(corpus)
-        corpus = convert_numbers(corpus)
-        self.fit(corpus_str)
-        tokenized_corpus = corpus.map(self.tokenize)
+        self.fit(corpus)
+        tokenized_corpus = self.transform(
+            corpus, workers=workers, chunk_size=chunk_size
+        )
         return tokenized_corpus
 
+
 def do_nothing(tokens: List[str]):
     """
     Return pre-determined tokens to sklearn count vectorizer
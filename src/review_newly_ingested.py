@@ -3,12 +3,11 @@ import pandas as pd
 import numpy as np
 
 # Web/collecting data
-import requests
 import bs4
 
 # Annotation/ system
 from pathlib import Path
-from typing import Tuple, List, Optional, Dict
+from typing import Tuple, List, Optional
 import sys
 
 # CLI/UI
@@ -28,7 +27,13 @@ from .annotation_utils.uix_utils import ANNOUNCE, RAW, Cyans
 from .preprocessing.praw_processing import conform_url
 from .preprocessing.text_cleaning import clean_scraped_text
 from .scraping import get_source_texts
-from .scraping import _grab_src_url
+from .scraping import resolve_src_urls, DEFAULT_FETCHER
+from .scraping_utils.sessions import (
+    DOMAIN_RATE_LIMITS,
+    DomainRateLimiter,
+    PageFetcher,
+)
+from .scraping_utils.response_cache import ResponseCache
 
 FLAIR = [
     "Class",
@@ -75,28 +80,28 @@ class SubmissionRecord:
         return self.id + "_" + self.title
 
 
-def fix_and_fill_src_url(metadata: pd.DataFrame, data: pd.DataFrame):
-    # Helpers for grabbing source URLs efficiently.
+def fix_and_fill_src_url(
+    metadata: pd.DataFrame,
+    data: pd.DataFrame,
+    fetcher: Optional[PageFetcher] = None,
+    workers: int = 8,
+):
+    # Source URLs already known from the metadata need no web requests
     url_map = metadata.set_index("link").to_dict()["src_url"]
-    url_cache: Dict[str, str] = {}
-
-    def to_src_url(url_str):
-        if url_str in url_map.keys():
-            return url_map[url_str]
-        elif url_str in url_cache.keys():
-            return url_cache[url_str]
-        else:
-            url_cache[url_str] = _grab_src_url(url_str)
-            return url_cache[url_str]
 
     if "src_url" not in data.columns:
         # Get all source URLs
-        data["src_url"] = data["link"].apply(lambda x: to_src_url(x))
+        data["src_url"] = resolve_src_urls(
+            data["link"], known=url_map, fetcher=fetcher, workers=workers
+        )
     else:
         # Fill in missing source URLs
         missing_src = data["src_url"].isna()
-        data.loc[missing_src, "src_url"] = data.loc[missing_src, "link"].apply(
-            lambda x: to_src_url(x)
+        data.loc[missing_src, "src_url"] = resolve_src_urls(
+            data.loc[missing_src, "link"],
+            known=url_map,
+            fetcher=fetcher,
+            workers=workers,
         )
 
 
@@ -145,26 +150,34 @@ def preview_long_text(text: str, n: int) -> str:
     return text
 
 
-def get_soup(url: str) -> bs4.BeautifulSoup:
+def get_soup(url: str, fetcher: Optional[PageFetcher] = None) -> bs4.BeautifulSoup:
     """Get a BeautifulSoup object by making a request to the specified URL.
 
     Parameters
     ----------
     url : str
         The URL from which to fetch the data.
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for the web request, by default DEFAULT_FETCHER
 
     Returns
     -------
     bs4.BeautifulSoup
         A BeautifulSoup object representing the parsed HTML content.
     """
-    r = requests.get(url)
+    if fetcher is None:
+        fetcher = DEFAULT_FETCHER
+    r = fetcher.get(url)
     soup = bs4.BeautifulSoup(r.text, "html5lib")
     return soup
 
 
 def get_title_and_body(
-    text_dir: Path, metadata: pd.DataFrame, url: str, clean: bool
+    text_dir: Path,
+    metadata: pd.DataFrame,
+    url: str,
+    clean: bool,
+    fetcher: Optional[PageFetcher] = None,
 ) -> Tuple[str, str]:
     """Get the title and body of the content associated with the given URL.
 
@@ -178,14 +191,17 @@ def get_title_and_body(
         The URL of the content to retrieve.
     clean : bool
         Flag indicating whether the scraped text needs to be cleaned.
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default DEFAULT_FETCHER
 
     Returns
     -------
     Tuple[str, str]
         A tuple containing the title and body of the content.
     """
+    cache = fetcher.cache if fetcher is not None else None
     try:
-        soup = get_soup(url)
+        soup = get_soup(url, fetcher=fetcher)
         title = RAW + soup.title
     except Exception:
         title = RAW + "Title Not Found"
@@ -201,7 +217,7 @@ def get_title_and_body(
     else:
         print(ANNOUNCE + f"Searching for data at {url}")
         df = pd.DataFrame({"link": [url]})
-        df = get_source_texts(df, pass_attempts=5)
+        df = get_source_texts(df, pass_attempts=5, cache=cache)
         body = df["Text"].values[0]
         if body == "":
             body = "Body Not Found"
@@ -223,6 +239,7 @@ def post_entry_data(
     num_urls: int,
     prev_length: int,
     clean: bool,
+    fetcher: Optional[PageFetcher] = None,
 ):
     """Display the entry data to the terminal for the specified URL.
 
@@ -244,6 +261,8 @@ def post_entry_data(
         The desired length for previewing the text body.
     clean : bool
         Flag indicating whether the scraped text needs to be cleaned.
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default DEFAULT_FETCHER
     """
     # Get entry data to display
     pos = ANNOUNCE + f"{i}/{num_urls}: "
@@ -254,7 +273,7 @@ def post_entry_data(
     if cmt_author != "":
         author = author + f"/{cmt_author}"
     # Title and body
-    title, body = get_title_and_body(text_dir, metadata, url, clean)
+    title, body = get_title_and_body(text_dir, metadata, url, clean, fetcher=fetcher)
     body = preview_long_text(body, n=round(prev_length / 2))
 
     # Write entry data to terminal
@@ -315,7 +334,7 @@ def process_url_entry(data: pd.DataFrame, data_path: Path, url: str):
     data : pd.DataFrame
         The DataFrame containing data related to the content.
     data_path : Path
-        The path to the CSV or pickle file containing the data.
+        The path to the CSV, pickle, Parquet or Feather file containing the data.
     url : str
         The URL of the content to process.
     """
@@ -355,7 +374,7 @@ def process_url_entry(data: pd.DataFrame, data_path: Path, url: str):
 
 
 def prep_data(
-    data_path: Path, metadata_path: Path
+    data_path: Path, metadata_path: Path, fetcher: Optional[PageFetcher] = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Prepare the data for processing, ensuring that URLs are formatted as similarly as
@@ -364,9 +383,11 @@ def prep_data(
     Parameters
     ----------
     data_path : Path
-        The path to the CSV or pickle file containing the data.
+        The path to the CSV, pickle, Parquet or Feather file containing the data.
     metadata_path : Path
-        The path to the CSV or pickle file containing metadata information.
+        The path to the CSV, pickle, Parquet or Feather file containing metadata information.
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default DEFAULT_FETCHER
 
     Returns
     -------
@@ -386,7 +407,7 @@ def prep_data(
     fill_missing_cols(data)
     # Try to find a src url for each link to help identify repeat links
     ## Avoid making web requests as much as possible
-    fix_and_fill_src_url(metadata, data)
+    fix_and_fill_src_url(metadata, data, fetcher=fetcher)
     # Save data now that everything has been cleaned/prepped
     save_pandas_to_path(data, data_path)
 
@@ -394,7 +415,12 @@ def prep_data(
 
 
 def review_newly_ingested_links(
-    data_path: Path, metadata_path: Path, text_dir: Path, prev_length: int, clean: bool
+    data_path: Path,
+    metadata_path: Path,
+    text_dir: Path,
+    prev_length: int,
+    clean: bool,
+    cache_dir: Optional[Path] = None,
 ):
     """
     Process the main submission flair for newly scraped URLs and prompts the user for
@@ -412,17 +438,24 @@ def review_newly_ingested_links(
     Parameters
     ----------
     data_path : Path
-        The path to the CSV or pickle file containing the main data DataFrame.
+        The path to the CSV, pickle, Parquet or Feather file containing the main data DataFrame.
     metadata_path : Path
-        The path to the CSV or pickle file containing metadata information.
+        The path to the CSV, pickle, Parquet or Feather file containing metadata information.
     text_dir : Path
         The path to the directory where the text files are stored.
     prev_length : int
         The desired length for previewing the text body during the review process.
     clean : bool
         Flag indicating whether the scraped text needs to be cleaned before displaying.
+    cache_dir : Optional[Path], optional
+        Directory of an on-disk response cache shared with get_source_texts, by
+        default None (no caching)
     """
-    data, metadata = prep_data(data_path, metadata_path)
+    cache = ResponseCache(cache_dir) if cache_dir is not None else None
+    fetcher = PageFetcher(
+        rate_limiter=DomainRateLimiter(DOMAIN_RATE_LIMITS), cache=cache
+    )
+    data, metadata = prep_data(data_path, metadata_path, fetcher=fetcher)
 
     # Announce how much progress as been made.
     num_processed = data["manually_reviewed"].sum()
@@ -444,6 +477,7 @@ def review_newly_ingested_links(
                 num_urls=num_urls,
                 prev_length=prev_length,
                 clean=clean,
+                fetcher=fetcher,
             )
             process_url_entry(data, data_path, url)
         except EmptyText:
@@ -1,12 +1,13 @@
 # 3rd party/standard library imports
-import requests
 from bs4 import BeautifulSoup
-import time
-from requests.exceptions import RequestException, MissingSchema
+from requests.exceptions import MissingSchema, RequestException
 from markdownify import markdownify as md
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 
 # Needed only for type-hinting
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Sequence, Callable
+from pathlib import Path
 import numpy as np
 import re
 import pandas as pd
@@ -14,9 +15,34 @@ import pandas as pd
 # Custom modules
 from .preprocessing.text_cleaning.markup_style_cleaning import strip_tags
 from .preprocessing.text_cleaning.noise import NOISY_HTML
-
-
-def _grab_src_url(url: str) -> str:
+from .preprocessing.text_cleaning.data_io import (
+    read_src_txt_from_file,
+    write_text_to_file,
+)
+from .preprocessing.markdown_handling import validate_data
+from .scraping_utils.sessions import (
+    DOMAIN_RATE_LIMITS,
+    DomainRateLimiter,
+    PageFetcher,
+    get_domain,
+)
+from .scraping_utils.response_cache import ResponseCache
+from .scraping_utils.journal import ScrapeJournal
+from .scraping_utils.retry import RetryScheduler
+from .scraping_utils.html_extraction import extract_textarea_text, find_first_tag_attr
+from .scraping_utils.url_rules import (
+    DROP,
+    REQUEST,
+    apply_src_url_rule,
+    apply_src_url_rules,
+    match_src_url_rule,
+)
+
+# Used whenever a caller does not supply its own fetcher (no rate limiting)
+DEFAULT_FETCHER = PageFetcher()
+
+
+def _grab_src_url(url: str, fetcher: Optional[PageFetcher] = None) -> str:
     """
     This method attempts to find the source/markdown for an entry. If it
     can't find a link to the page, it will return the original URL.
@@ -26,6 +52,8 @@ def _grab_src_url(url: str) -> str:
     url : str
         A URL, either to the GMBinder or Homebrewery sites. Typically this
         will be a rendered view rather than a source page.
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default DEFAULT_FETCHER
 
     Returns
     -------
@@ -33,37 +61,122 @@ def _grab_src_url(url: str) -> str:
         A URL, either to the GMBinder or Homebrewery sites. Ideally this
         should be the page containing the source code.
     """
+    if fetcher is None:
+        fetcher = DEFAULT_FETCHER
 
+    # Most URL shapes can be rewritten without looking at the page
+    rule = match_src_url_rule(url)
+    if rule.action != REQUEST:
+        return apply_src_url_rule(rule, url)
+
+    _r = fetcher.get(url)
     if "gmbinder.com" in url:
-        _r = requests.get(url)
+        src_attrs = {"class": "btn btn-default", "title": "View Source"}
+        # Try to find the button without parsing the whole page first
+        href = find_first_tag_attr(_r.text, "a", src_attrs, "href")
+        if href is not None:
+            return href
+
         soup = BeautifulSoup(_r.text, "html5lib")
-        src_btn = soup.find("a", {"class": "btn btn-default", "title": "View Source"})
+        src_btn = soup.find("a", src_attrs)
 
         if src_btn is not None:
             return src_btn["href"]
         else:
             return url
 
-    elif "homebrewery.naturalcrit.com" in url:
-        if "share" in url:
-            return url.replace("share", "source")
-        elif "source" in url:
-            return url
+    else:
+        src_attrs = {"class": "navItem teal", "icon": "fas fa-code"}
+        href = find_first_tag_attr(_r.text, "a", src_attrs, "href")
+        if href is not None:
+            return "https://homebrewery.naturalcrit.com" + href
+
+        soup = BeautifulSoup(_r.text, "html5lib")
+        src_btn = soup.find("a", src_attrs)
+
+        if src_btn is not None:  # Seems outdated as of July 2021
+            return "https://homebrewery.naturalcrit.com" + src_btn["href"]
         else:
-            _r = requests.get(url)
-            soup = BeautifulSoup(_r.text, "html5lib")
-            src_btn = soup.find("a", {"class": "navItem teal", "icon": "fas fa-code"})
+            return ""
 
-            if src_btn is not None:  # Seems outdated as of July 2021
-                return "https://homebrewery.naturalcrit.com" + src_btn["href"]
-            else:
-                return ""
 
-    else:
+def _try_grab_src_url(url: str, fetcher: PageFetcher) -> str:
+    """
+    _grab_src_url, but a failed request leaves the source URL empty rather than
+    raising, so one bad URL cannot discard the rest of a batch.
+    """
+    try:
+        return _grab_src_url(url, fetcher=fetcher)
+    except RequestException as e:
+        print(f"Could not resolve source URL for {url}: {e}")
         return ""
 
 
-def _collect_text(url: str, noisy_tags: List[str] = NOISY_HTML) -> str:
+def resolve_src_urls(
+    urls: pd.Series,
+    known: Optional[Dict[str, str]] = None,
+    fetcher: Optional[PageFetcher] = None,
+    workers: int = 8,
+    rate_limit: float = 0.05,
+    domain_rate_limits: Optional[Dict[str, float]] = DOMAIN_RATE_LIMITS,
+) -> pd.Series:
+    """
+    Batch version of _grab_src_url. URLs are deduplicated, rewritten with the rules
+    in SRC_URL_RULES where possible, and only the remaining unique URLs are
+    requested (concurrently). The results are then mapped back onto the URLs.
+    URLs whose request fails are given an empty source URL.
+
+    Parameters
+    ----------
+    urls : pd.Series
+        URLs, either to the GMBinder or Homebrewery sites.
+    known : Optional[Dict[str, str]], optional
+        Source URLs which are already known, keyed by URL, by default None
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default a fetcher rate limited by
+        rate_limit and domain_rate_limits
+    workers : int, optional
+        Number of threads used to request pages, by default 8
+    rate_limit : float, optional
+        Minimum seconds between requests to a domain not listed in
+        domain_rate_limits, by default .05. Ignored if a fetcher is given.
+    domain_rate_limits : Optional[Dict[str, float]], optional
+        Minimum seconds between requests to specific domains, by default
+        DOMAIN_RATE_LIMITS. Ignored if a fetcher is given.
+
+    Returns
+    -------
+    pd.Series
+        The source URL for each URL, with the same index as urls.
+    """
+    mapping: Dict[str, str] = dict(known or {})
+
+    unique_urls = pd.Series(pd.unique(urls.dropna()), dtype=object)
+    unique_urls = unique_urls[~unique_urls.isin(mapping.keys())]
+
+    src_urls = apply_src_url_rules(unique_urls)
+    needs_request = src_urls.isna()
+    mapping.update(zip(unique_urls[~needs_request], src_urls[~needs_request]))
+
+    to_request = unique_urls[needs_request].to_list()
+    if fetcher is None:
+        rate_limiter = DomainRateLimiter(
+            domain_rate_limits, default_rate_limit=rate_limit
+        )
+        fetcher = PageFetcher(pool_size=max(workers, 1), rate_limiter=rate_limiter)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        requested = executor.map(
+            lambda url: _try_grab_src_url(url, fetcher), to_request
+        )
+        mapping.update(zip(to_request, requested))
+
+    return urls.map(mapping)
+
+
+def _collect_text(
+    url: str, noisy_tags: List[str] = NOISY_HTML, fetcher: Optional[PageFetcher] = None
+) -> str:
     """
     Collects text associated with a GMBinder or Homebrewery link.
     This method generally assumes the link will be directly to the markdown.
@@ -82,18 +195,36 @@ def _collect_text(url: str, noisy_tags: List[str] = NOISY_HTML) -> str:
         A list containing different HTML tags to remove in the form of strings,
         by default, NOISY_HTML ['head', 'img', 'script',
         'campaign-manager-header', 'campaign-manager-footer', 'style']
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default DEFAULT_FETCHER
 
     Returns
     -------
     str
         The text associated with the resulting link.
     """
+    if fetcher is None:
+        fetcher = DEFAULT_FETCHER
+
     try:
-        _r = requests.get(url)
+        _r = fetcher.get(url)
     except MissingSchema:
         return ""
 
     encoding = _r.apparent_encoding
+
+    # GMBinder source pages hold the markdown in a textarea, which can usually be
+    # found without parsing the whole page
+    if "gmbinder.com" in url:
+        try:
+            html = _r.content.decode(encoding or "utf-8", errors="replace")
+        except LookupError:
+            html = None
+        if html is not None:
+            txt = extract_textarea_text(html, noisy_tags=noisy_tags)
+            if txt is not None:
+                return txt
+
     soup = BeautifulSoup(_r.content, "html5lib", from_encoding=encoding)
 
     for tag in noisy_tags:
@@ -115,7 +246,9 @@ def _collect_text(url: str, noisy_tags: List[str] = NOISY_HTML) -> str:
         return ""
 
 
-def _get_source_text(url: str, noisy_tags: List[str] = NOISY_HTML) -> Tuple[str, str]:
+def _get_source_text(
+    url: str, noisy_tags: List[str] = NOISY_HTML, fetcher: Optional[PageFetcher] = None
+) -> Tuple[str, str]:
     """Attempty(lambdas to retrieve raw source text from GMBinder/Homebrewery
 
     Three primary steps:
@@ -135,12 +268,14 @@ def _get_source_text(url: str, noisy_tags: List[str] = NOISY_HTML) -> Tuple[str,
         A list containing different HTML tags to remove in the form of strings,
         by default, NOISY_HTML ['head', 'img', 'script',
         'campaign-manager-header', 'campaign-manager-footer', 'style']
+    fetcher : Optional[PageFetcher], optional
+        Fetcher used for any web requests, by default DEFAULT_FETCHER
 
     Tuople[str, str]
         [description]
     """
-    src_url = _grab_src_url(url)
-    src_text = _collect_text(src_url, noisy_tags=noisy_tags)
+    src_url = _grab_src_url(url, fetcher=fetcher)
+    src_text = _collect_text(src_url, noisy_tags=noisy_tags, fetcher=fetcher)
 
     # Remove excess single spaces and compress linebreaks of 3+ to 2.
     src_text = src_text.lstrip()
@@ -151,26 +286,114 @@ def _get_source_text(url: str, noisy_tags: List[str] = NOISY_HTML) -> Tuple[str,
     return (src_url, src_text)
 
 
-def _try_to_get_src(
-    results: Dict[str, Tuple[str, str]],
-    url: str,
+def _scrape_urls(
+    urls: Sequence[str],
+    fetcher: PageFetcher,
+    on_result: Callable[[str, Tuple[str, str], int], None],
     noisy_tags: List[str] = NOISY_HTML,
-):
-    """_summary_
+    workers: int = 1,
+    max_attempts: int = 1,
+) -> Dict[str, int]:
+    """
+    Collect source URLs/texts for each URL, passing each final result to on_result
+    as soon as it is ready. URLs where a request fails or no text is found at the
+    source URL are retried individually with exponential backoff (see
+    RetryScheduler) up to max_attempts times. URLs without a source URL (DROP rule
+    links and pages without a source button) are never retried, and DROP rule links
+    are not requested at all (0 attempts). With more than one worker, URLs are
+    spread over a bounded thread pool. Rate limits are enforced by the fetcher per
+    domain, so workers only wait on requests to the same site.
 
     Parameters
     ----------
-    results : Dict[str, str]
-        _description_
-    url : str
-        _description_
+    urls : Sequence[str]
+        The URLs to scrape.
+    fetcher : PageFetcher
+        Fetcher used for any web requests, shared by all workers.
+    on_result : Callable[[str, Tuple[str, str], int], None]
+        Called with each URL, its (src_url, text) result and the number of attempts
+        it took. Failed URLs get ("", "") if their last request failed.
     noisy_tags : List[str], optional
-        _description_, by default NOISY_HTML
+        HTML tags to remove, by default NOISY_HTML
+    workers : int, optional
+        Number of threads used to scrape URLs, by default 1
+    max_attempts : int, optional
+        Maximum attempts per URL, by default 1
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of attempts made for each URL.
     """
-    try:
-        results[url] = _get_source_text(url, noisy_tags=noisy_tags)
-    except RequestException:
-        results[url] = ("", "")
+
+    def _scrape(url: str) -> Tuple[str, str]:
+        return _get_source_text(url, noisy_tags=noisy_tags, fetcher=fetcher)
+
+    def _on_result(url: str, result: Optional[Tuple[str, str]], attempts: int):
+        on_result(url, result if result is not None else ("", ""), attempts)
+
+    # Unsupported sites have no source URL, don't request (or retry) them at all
+    attempts: Dict[str, int] = {}
+    to_scrape = []
+    for url in urls:
+        if match_src_url_rule(url).action == DROP:
+            on_result(url, ("", ""), 0)
+            attempts[url] = 0
+        else:
+            to_scrape.append(url)
+
+    scheduler = RetryScheduler(max_attempts=max_attempts)
+    attempts.update(
+        scheduler.run(
+            to_scrape,
+            task=_scrape,
+            is_success=lambda result: result[1] != "",
+            on_result=_on_result,
+            workers=workers,
+            # No source URL (e.g. a Homebrewery page without a source button) is not
+            # going to change, only empty texts from a source page are retried
+            is_final=lambda result: result[0] == "",
+        )
+    )
+    return attempts
+
+
+def _report_attempts(attempts: Dict[str, int]):
+    """Print how many URLs took each number of attempts."""
+    counts = sorted(Counter(attempts.values()).items())
+    summary = ", ".join([f"{n} attempt(s): {n_urls}" for n, n_urls in counts])
+    print(f"URLs by number of attempts... {summary}")
+
+
+def _build_fetcher(
+    urls: Sequence[str],
+    rate_limit: float,
+    workers: int,
+    domain_rate_limits: Optional[Dict[str, float]],
+    cache: Optional[ResponseCache],
+    pass_attempts: int,
+    verbose: bool,
+) -> PageFetcher:
+    """
+    Build the rate limited fetcher shared by a scraping run and, if verbose, print
+    an estimate of how long the run will take.
+    """
+    rate_limiter = DomainRateLimiter(domain_rate_limits, default_rate_limit=rate_limit)
+    fetcher = PageFetcher(
+        pool_size=max(workers, 1), rate_limiter=rate_limiter, cache=cache
+    )
+
+    # Domains are rate limited independently, so the slowest domain sets the pace
+    domain_counts = Counter([get_domain(url) for url in urls])
+    eta = max(
+        [n * rate_limiter.interval(d) for d, n in domain_counts.items()], default=0
+    )
+    if verbose:
+        print(
+            f"Procesing submissions... eta approx: {eta:.2f} to {eta*pass_attempts:.2f} seconds."
+        )
+
+    return fetcher
 
 
 def get_source_texts(
@@ -179,6 +402,9 @@ def get_source_texts(
     rate_limit: float = 0.05,
     pass_attempts: int = 1,
     verbose: bool = False,
+    workers: int = 1,
+    domain_rate_limits: Optional[Dict[str, float]] = DOMAIN_RATE_LIMITS,
+    cache: Optional[ResponseCache] = None,
 ) -> pd.DataFrame:
     """[summary]
 
@@ -191,9 +417,18 @@ def get_source_texts(
         by default, NOISY_HTML ['head', 'img', 'script',
         'campaign-manager-header', 'campaign-manager-footer', 'style']
     rate_limit : float, optional
-        Length of seconds to wait between requests, by default .05
+        Minimum seconds between requests to a domain not listed in
+        domain_rate_limits, by default .05
     pass_attempts : int, optional
-        [description], by default 1
+        Maximum attempts per URL; URLs where a request fails or no text is found
+        are retried with exponential backoff, by default 1
+    workers : int, optional
+        Number of threads used to scrape URLs concurrently, by default 1
+    domain_rate_limits : Optional[Dict[str, float]], optional
+        Minimum seconds between requests to specific domains, by default
+        DOMAIN_RATE_LIMITS
+    cache : Optional[ResponseCache], optional
+        On-disk cache of previously fetched pages, by default None
 
     Returns
     -------
@@ -204,37 +439,33 @@ def get_source_texts(
     results: Dict[str, Tuple[str, str]] = {}
 
     url_array = df["link"].to_numpy()
-
-    eta = len(url_array) * rate_limit
+    unique_urls = pd.unique(url_array)
+
+    fetcher = _build_fetcher(
+        unique_urls,
+        rate_limit=rate_limit,
+        workers=workers,
+        domain_rate_limits=domain_rate_limits,
+        cache=cache,
+        pass_attempts=pass_attempts,
+        verbose=verbose,
+    )
+
+    attempts = _scrape_urls(
+        unique_urls,
+        fetcher,
+        on_result=lambda url, result, _: results.__setitem__(url, result),
+        noisy_tags=noisy_tags,
+        workers=workers,
+        max_attempts=pass_attempts,
+    )
     if verbose:
-        print(
-            f"Procesing submissions... eta approx: {eta:.2f} to {eta*pass_attempts:.2f} seconds."
-        )
-
-    for url in url_array:
-        _try_to_get_src(results, url, noisy_tags=noisy_tags)
-        time.sleep(rate_limit)
-
-    if any([i for i in results.values() if i is None or i == ""]):
-        for _ in range(pass_attempts - 1):
-            for url, result in results.items():
-                if (result is None) or (result == ""):
-                    _try_to_get_src(results, url, noisy_tags=noisy_tags)
-                    time.sleep(rate_limit)
-        for url, result in results.items():
-            if result is None:
-                results[url] = ""
+        _report_attempts(attempts)
 
     src_urls = np.empty(url_array.shape, dtype=object)
     texts = np.empty(url_array.shape, dtype=object)
     for ind, url in enumerate(url_array):
-        result = results[url]
-        try:
-            src_urls[ind] = result[0]
-            texts[ind] = result[1]
-        except TypeError:
-            src_urls[ind] = result
-            texts[ind] = result
+        src_urls[ind], texts[ind] = results[url]
 
     submissions = (src_urls, texts)
 
@@ -243,3 +474,125 @@ def get_source_texts(
     new_df["Text"] = submissions[1]
 
     return new_df
+
+
+def run_scrape_job(
+    df: pd.DataFrame,
+    journal_path: Path,
+    text_dir: Path,
+    noisy_tags: List[str] = NOISY_HTML,
+    rate_limit: float = 0.05,
+    pass_attempts: int = 1,
+    verbose: bool = False,
+    workers: int = 1,
+    domain_rate_limits: Optional[Dict[str, float]] = DOMAIN_RATE_LIMITS,
+    cache: Optional[ResponseCache] = None,
+) -> pd.DataFrame:
+    """
+    Resumable alternative to get_source_texts for large batches of links.
+
+    Each text is written to text_dir as {UID}.txt as soon as it is collected, and
+    every finished link is then appended to a journal. Re-running the job with the
+    same journal skips links that already succeeded (and whose text files exist),
+    so an interrupted run picks up where it stopped. Links where a request fails or
+    no text is found are retried individually with exponential backoff. The journal
+    records the total number of attempts made for each link.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A dataframe containing columns 'UID' and 'link'
+    journal_path : Path
+        Path to the journal file used to checkpoint progress
+    text_dir : Path
+        Directory to write the raw text files to (i.e. TEXT_FILES)
+    noisy_tags : List[str]
+        A list containing different HTML tags to remove in the form of strings,
+        by default, NOISY_HTML
+    rate_limit : float, optional
+        Minimum seconds between requests to a domain not listed in
+        domain_rate_limits, by default .05
+    pass_attempts : int, optional
+        Maximum attempts per link on each run, by default 1
+    verbose : bool, optional
+        Whether to report progress, by default False
+    workers : int, optional
+        Number of threads used to scrape URLs concurrently, by default 1
+    domain_rate_limits : Optional[Dict[str, float]], optional
+        Minimum seconds between requests to specific domains, by default
+        DOMAIN_RATE_LIMITS
+    cache : Optional[ResponseCache], optional
+        On-disk cache of previously fetched pages, by default None
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the original dataframe containing new columns 'src_url' and
+        'Text' ('' for links where no text could be collected)
+    """
+    validate_data(df, required_columns=["UID", "link"], inplace=True)
+
+    journal = ScrapeJournal(journal_path)
+    records = journal.load()
+    uids_by_link: Dict[str, List[int]] = df.groupby("link")["UID"].agg(list).to_dict()
+
+    def _is_done(link: str) -> bool:
+        record = records.get(link)
+        if (record is None) or not record.ok:
+            return False
+        return all((text_dir / f"{uid}.txt").is_file() for uid in uids_by_link[link])
+
+    pending = [link for link in uids_by_link if not _is_done(link)]
+    if verbose:
+        n_done = len(uids_by_link) - len(pending)
+        print(f"{n_done} links already collected, {len(pending)} remaining.")
+
+    fetcher = _build_fetcher(
+        pending,
+        rate_limit=rate_limit,
+        workers=workers,
+        domain_rate_limits=domain_rate_limits,
+        cache=cache,
+        pass_attempts=pass_attempts,
+        verbose=verbose,
+    )
+
+    def _checkpoint(link: str, result: Tuple[str, str], attempts: int):
+        src_url, text = result
+        ok = text != ""
+        if ok:
+            for uid in uids_by_link[link]:
+                write_text_to_file(uid, text, text_dir)
+        previous = records.get(link)
+        if previous is not None:
+            attempts = attempts + previous.attempts
+        records[link] = journal.append(link, src_url, ok=ok, attempts=attempts)
+
+    attempts = _scrape_urls(
+        pending,
+        fetcher,
+        on_result=_checkpoint,
+        noisy_tags=noisy_tags,
+        workers=workers,
+        max_attempts=pass_attempts,
+    )
+
+    if verbose:
+        _report_attempts(attempts)
+        n_failed = len([link for link in pending if not records[link].ok])
+        if n_failed > 0:
+            print(f"No text found for {n_failed} links.")
+
+    def _read_text(row: pd.Series) -> str:
+        record = records.get(row["link"])
+        if (record is None) or not record.ok:
+            return ""
+        return read_src_txt_from_file(row["UID"], text_dir)
+
+    new_df = df.copy()
+    new_df["src_url"] = new_df["link"].map(
+        lambda link: records[link].src_url if link in records else ""
+    )
+    new_df["Text"] = new_df.apply(_read_text, axis=1)
+
+    return new_df
@@ -0,0 +1,13 @@
+from .sessions import (
+    DOMAIN_RATE_LIMITS,
+    DomainRateLimiter,
+    PageFetcher,
+    ThrottledError,
+    build_session,
+    get_domain,
+)
+from .response_cache import ResponseCache, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from .journal import ScrapeJournal, JournalRecord
+from .retry import RetryScheduler, CircuitBreaker
+from .html_extraction import extract_textarea_text, find_first_tag_attr
+from .url_rules import SRC_URL_RULES, SrcUrlRule, apply_src_url_rules
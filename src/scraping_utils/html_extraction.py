@@ -0,0 +1,141 @@
+import html
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Elements without content, or (head) which html5lib closes implicitly
+_NOT_WRAPPERS = {"head", "img", "br"}
+
+TEXTAREA_END_PATTERN = re.compile(r"</textarea[\s/>]", re.IGNORECASE)
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _FirstTagFinder(HTMLParser):
+    def __init__(self, tag: str, attrs: Dict[str, str], noisy_tags: Sequence[str]):
+        """
+        Event-based parser which stops at the first start tag with the given name
+        and attribute values. Attribute values are compared the way BeautifulSoup
+        compares them, i.e. classes are compared as whitespace-normalised strings.
+        """
+        super().__init__(convert_charrefs=True)
+        self.tag = tag
+        self.attrs = attrs
+        self.wrappers = set(noisy_tags) - _NOT_WRAPPERS
+        self.noisy_depth = 0
+        self.match: Optional[Dict[str, Optional[str]]] = None
+        self.match_pos: Tuple[int, int] = (0, 0)
+        self.match_in_noise = False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if tag in self.wrappers:
+            self.noisy_depth += 1
+        if tag != self.tag:
+            return
+
+        found: Dict[str, Optional[str]] = {}
+        for k, v in attrs:
+            # Like html5lib, the first of any duplicated attributes wins
+            found.setdefault(k, v)
+        if found.get("class") is not None:
+            found["class"] = " ".join(found["class"].split())
+
+        if all(found.get(k) == v for k, v in self.attrs.items()):
+            self.match = found
+            self.match_pos = self.getpos()
+            self.match_in_noise = self.noisy_depth > 0
+            raise _StopParsing
+
+    def handle_endtag(self, tag: str):
+        if (tag in self.wrappers) and (self.noisy_depth > 0):
+            self.noisy_depth -= 1
+
+
+def _find_first_tag(
+    html_str: str, tag: str, attrs: Dict[str, str], noisy_tags: Sequence[str] = ()
+) -> Optional[_FirstTagFinder]:
+    parser = _FirstTagFinder(tag, attrs, noisy_tags)
+    try:
+        parser.feed(html_str)
+        parser.close()
+    except _StopParsing:
+        return parser
+    return None
+
+
+def find_first_tag_attr(
+    html_str: str, tag: str, attrs: Dict[str, str], attr: str
+) -> Optional[str]:
+    """
+    Find an attribute of the first tag matching the given attributes, without
+    building a tree. Equivalent to soup.find(tag, attrs)[attr] for the pages we
+    scrape.
+
+    Parameters
+    ----------
+    html_str : str
+        The page's HTML.
+    tag : str
+        Name of the tag to find, e.g. "a".
+    attrs : Dict[str, str]
+        Attribute values the tag must have, e.g. {"title": "View Source"}.
+    attr : str
+        The attribute to return, e.g. "href".
+
+    Returns
+    -------
+    Optional[str]
+        The attribute's value, or None if there is no such tag/attribute.
+    """
+    parser = _find_first_tag(html_str, tag, attrs)
+    if parser is None:
+        return None
+    return parser.match.get(attr)
+
+
+def extract_textarea_text(
+    html_str: str, noisy_tags: Sequence[str] = ()
+) -> Optional[str]:
+    """
+    Get the text of the first <textarea> on a page, without building a tree.
+
+    The start tag is located with an event parser (so tags in comments or scripts
+    are ignored), after which the raw content is sliced up to the closing tag and
+    decoded the way html5lib decodes RCDATA: newlines are normalised, the newline
+    directly after the start tag is dropped and character references are unescaped.
+
+    Parameters
+    ----------
+    html_str : str
+        The page's HTML.
+    noisy_tags : Sequence[str], optional
+        Tags which will be stripped from the page. A textarea nested in one of
+        these is not returned, by default ()
+
+    Returns
+    -------
+    Optional[str]
+        The textarea's text, or None if no (unambiguous) textarea was found.
+    """
+    parser = _find_first_tag(html_str, "textarea", {}, noisy_tags)
+    if (parser is None) or parser.match_in_noise:
+        return None
+
+    # HTMLParser reports (line, column) positions; lines are split on "\n" only
+    line, col = parser.match_pos
+    offset = 0
+    for _ in range(line - 1):
+        offset = html_str.index("\n", offset) + 1
+    start = offset + col + len(parser.get_starttag_text())
+
+    end = TEXTAREA_END_PATTERN.search(html_str, start)
+    if end is None:
+        return None
+
+    text = html_str[start : end.start()]
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "�")
+    if text.startswith("\n"):
+        text = text[1:]
+    return html.unescape(text)
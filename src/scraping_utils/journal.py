@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+
+class JournalRecord(NamedTuple):
+    link: str
+    src_url: str
+    ok: bool
+    attempts: int
+    finished_at: float
+
+
+class ScrapeJournal:
+    def __init__(self, path: Path):
+        """
+        Append-only journal of finished scrapes, one JSON record per line. Records are
+        flushed to disk as soon as they are written, so a crashed or interrupted job
+        can resume from the last finished URL.
+
+        Parameters
+        ----------
+        path : Path
+            Path to the journal file, created if it does not exist.
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, JournalRecord]:
+        """
+        Read the journal, keeping only the latest record for each link.
+
+        Returns
+        -------
+        Dict[str, JournalRecord]
+            The latest record for each link, keyed by link.
+        """
+        records: Dict[str, JournalRecord] = {}
+        if not self.path.is_file():
+            return records
+
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = JournalRecord(**json.loads(line))
+                except (json.JSONDecodeError, TypeError):
+                    # A crash can leave a truncated final line behind
+                    continue
+                records[record.link] = record
+        return records
+
+    def append(self, link: str, src_url: str, ok: bool, attempts: int) -> JournalRecord:
+        """
+        Append a record for a finished URL. Safe to call from worker threads.
+
+        Parameters
+        ----------
+        link : str
+            The link that was scraped.
+        src_url : str
+            The source URL found for the link.
+        ok : bool
+            Whether any text was collected.
+        attempts : int
+            Total number of attempts made for this link so far.
+
+        Returns
+        -------
+        JournalRecord
+            The record written to the journal.
+        """
+        record = JournalRecord(
+            link=link,
+            src_url=src_url,
+            ok=ok,
+            attempts=attempts,
+            finished_at=time.time(),
+        )
+        line = (json.dumps(record._asdict()) + "\n").encode()
+        with self._lock:
+            with open(self.path, "ab+") as f:
+                # Don't glue the record onto a truncated final line left by a crash
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return record
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Optional, NamedTuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from ..preprocessing.praw_processing import conform_url
+
+# One week
+DEFAULT_TTL: float = 7 * 24 * 60 * 60
+# 1 GiB
+DEFAULT_MAX_BYTES: int = 2**30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """
+        On-disk cache of HTTP responses shared between processes (notebooks, the
+        ingest CLI) and threads.
+
+        Entries are keyed by the SHA-256 of the URL after normalisation with
+        conform_url, so trivially different links to the same page share an entry.
+        Bodies are stored as individual files, metadata in an SQLite index. Entries
+        younger than the TTL are served without any network I/O; older entries are
+        revalidated with their ETag/Last-Modified headers. When the total size of
+        the bodies exceeds max_bytes, the least recently used entries are evicted.
+
+        Parameters
+        ----------
+        cache_dir : Path
+            Directory to hold the cache, created if it does not exist.
+        ttl : float, optional
+            Seconds an entry is considered fresh, by default DEFAULT_TTL (one week)
+        max_bytes : int, optional
+            Maximum total size of cached bodies, by default DEFAULT_MAX_BYTES (1 GiB)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.db_path = self.cache_dir / "index.sqlite"
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps this safe to use from worker threads
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(conform_url(url).encode("utf-8")).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """
+        Find the cache entry for a URL, if any, marking it as recently used.
+
+        Parameters
+        ----------
+        url : str
+            The URL to look up.
+
+        Returns
+        -------
+        Optional[CacheEntry]
+            The entry's metadata, or None if the URL is not cached.
+        """
+        key = self.key(url)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT key, url, status, headers, etag, last_modified, fetched_at "
+                "FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        if not self._body_path(key).is_file():
+            return None
+        return CacheEntry(
+            key=row[0],
+            url=row[1],
+            status=row[2],
+            headers=json.loads(row[3]),
+            etag=row[4],
+            last_modified=row[5],
+            fetched_at=row[6],
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return (time.time() - entry.fetched_at) < self.ttl
+
+    def revalidation_headers(self, entry: CacheEntry) -> Dict[str, str]:
+        """
+        Get the conditional request headers used to revalidate a stale entry.
+
+        Parameters
+        ----------
+        entry : CacheEntry
+            A stale cache entry.
+
+        Returns
+        -------
+        Dict[str, str]
+            If-None-Match and/or If-Modified-Since headers, possibly empty.
+        """
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def to_response(self, entry: CacheEntry) -> requests.Response:
+        """
+        Rebuild a requests Response from a cache entry.
+
+        Parameters
+        ----------
+        entry : CacheEntry
+            The entry to rebuild.
+
+        Returns
+        -------
+        requests.Response
+            A response equivalent to the one that was cached.
+        """
+        response = requests.Response()
+        response.status_code = entry.status
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.url = entry.url
+        response.encoding = get_encoding_from_headers(response.headers)
+        with open(self._body_path(entry.key), "rb") as f:
+            response._content = f.read()
+        return response
+
+    def refresh(self, entry: CacheEntry):
+        """
+        Restart the TTL of an entry after the server confirmed it is unchanged.
+
+        Parameters
+        ----------
+        entry : CacheEntry
+            The revalidated entry.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE entries SET fetched_at = ? WHERE key = ?",
+                (time.time(), entry.key),
+            )
+
+    def store(self, url: str, response: requests.Response):
+        """
+        Add or replace the cached response for a URL, evicting old entries if the
+        cache grows beyond max_bytes.
+
+        Parameters
+        ----------
+        url : str
+            The URL that was requested.
+        response : requests.Response
+            A successful response for the URL.
+        """
+        key = self.key(url)
+        body_path = self._body_path(key)
+        body_path.parent.mkdir(exist_ok=True)
+        content = response.content
+        # Write then rename, so readers never see a partial body. The temporary file
+        # is unique, as other threads/processes may be storing the same URL
+        with tempfile.NamedTemporaryFile(
+            dir=body_path.parent, prefix=f"{key}.", suffix=".tmp", delete=False
+        ) as f:
+            f.write(content)
+        os.replace(f.name, body_path)
+
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.url or url,
+                    response.status_code,
+                    json.dumps(dict(response.headers)),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    now,
+                    now,
+                    len(content),
+                ),
+            )
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with closing(self._connect()) as conn, conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            excess = total[0] - self.max_bytes
+            if excess <= 0:
+                return
+            evicted = []
+            for key, size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC"
+            ):
+                if excess <= 0:
+                    break
+                evicted.append(key)
+                excess -= size
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in evicted])
+        for key in evicted:
+            self._body_path(key).unlink(missing_ok=True)
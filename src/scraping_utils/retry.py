@@ -0,0 +1,204 @@
+import heapq
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from requests.exceptions import RequestException
+
+from .sessions import ThrottledError, get_domain
+
+R = TypeVar("R")
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        """
+        Per-host circuit breaker. After failure_threshold consecutive request
+        failures for a host, no requests are made to it for cooldown seconds. The
+        first request after a cooldown is a trial: a single failure re-opens the
+        circuit, a success closes it.
+
+        Parameters
+        ----------
+        failure_threshold : int, optional
+            Consecutive failures which open the circuit, by default 5
+        cooldown : float, optional
+            Seconds the circuit stays open, by default 30.0
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = defaultdict(int)
+        self._open_until: Dict[str, float] = {}
+
+    def retry_in(self, host: str) -> float:
+        """Seconds until requests to the host are allowed again (0 if allowed)."""
+        return max(0.0, self._open_until.get(host, 0.0) - time.monotonic())
+
+    def record_success(self, host: str):
+        self._failures[host] = 0
+
+    def record_failure(self, host: str, retry_after: Optional[float] = None):
+        self._failures[host] += 1
+        if self._failures[host] >= self.failure_threshold:
+            cooldown = max(self.cooldown, retry_after or 0.0)
+            self._open_until[host] = time.monotonic() + cooldown
+            # Half-open: one more failure after the cooldown re-opens the circuit
+            self._failures[host] = self.failure_threshold - 1
+
+
+class RetryScheduler:
+    def __init__(
+        self,
+        max_attempts: int = 1,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Runs a task for each URL, retrying failed URLs individually with exponential
+        backoff and jitter instead of in full passes over all URLs.
+
+        A URL fails when the task raises a RequestException or returns a result that
+        is not a success, and is retried unless that result is final. Throttled
+        requests wait at least as long as the server's Retry-After. Request failures
+        also count towards the circuit breaker of the URL's host, while URLs of a
+        host with an open circuit wait for it to close (without using up attempts).
+
+        Parameters
+        ----------
+        max_attempts : int, optional
+            Maximum attempts per URL, by default 1
+        base_delay : float, optional
+            Delay before the first retry in seconds, doubled for each further
+            retry, by default 1.0
+        max_delay : float, optional
+            Upper bound on the delay between retries in seconds, by default 60.0
+        circuit_breaker : Optional[CircuitBreaker], optional
+            Per-host circuit breaker, by default a CircuitBreaker()
+        """
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker()
+        self.circuit_breaker = circuit_breaker
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before retrying after the given (1-indexed) attempt failed.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of the attempt that failed.
+        retry_after : Optional[float], optional
+            The server's requested delay, by default None
+
+        Returns
+        -------
+        float
+            A delay between half and all of the exponential backoff, and no less
+            than retry_after.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(delay / 2, delay)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def run(
+        self,
+        urls: Sequence[str],
+        task: Callable[[str], R],
+        is_success: Callable[[R], bool],
+        on_result: Callable[[str, Optional[R], int], None],
+        workers: int = 1,
+        is_final: Optional[Callable[[R], bool]] = None,
+    ) -> Dict[str, int]:
+        """
+        Run the task for every URL until it succeeds or runs out of attempts.
+
+        Parameters
+        ----------
+        urls : Sequence[str]
+            The URLs to run the task for.
+        task : Callable[[str], R]
+            The task, run on worker threads. Anything other than a RequestException
+            raised by it is re-raised.
+        is_success : Callable[[R], bool]
+            Checks whether a result returned by the task is a success.
+        on_result : Callable[[str, Optional[R], int], None]
+            Called with each URL, its final result (None if the last attempt raised
+            a RequestException) and the number of attempts it took.
+        workers : int, optional
+            Number of threads used to run tasks, by default 1
+        is_final : Optional[Callable[[R], bool]], optional
+            Checks whether a result which is not a success is final, i.e. one that
+            retrying cannot change. Such URLs are not retried. By default None
+            (every unsuccessful result is retried)
+
+        Returns
+        -------
+        Dict[str, int]
+            The number of attempts made for each URL.
+        """
+        workers = max(workers, 1)
+        attempts: Dict[str, int] = defaultdict(int)
+        # Min-heap of (time the URL may be tried next, tie breaker, URL)
+        queue: List[Tuple[float, int, str]] = [(0.0, i, u) for i, u in enumerate(urls)]
+        heapq.heapify(queue)
+        counter = len(queue)
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while queue or running:
+                now = time.monotonic()
+                while queue and (len(running) < workers) and (queue[0][0] <= now):
+                    _, _, url = heapq.heappop(queue)
+                    closed_in = self.circuit_breaker.retry_in(get_domain(url))
+                    if closed_in > 0:
+                        heapq.heappush(queue, (now + closed_in, counter, url))
+                        counter += 1
+                        continue
+                    attempts[url] += 1
+                    running[executor.submit(task, url)] = url
+
+                # Sleep until a task finishes or the next queued URL is due
+                timeout = None
+                if queue and (len(running) < workers):
+                    timeout = max(0.0, queue[0][0] - time.monotonic())
+                if not running:
+                    time.sleep(timeout or 0.0)
+                    continue
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    url = running.pop(future)
+                    host = get_domain(url)
+                    retry_after = None
+                    final = False
+                    try:
+                        result = future.result()
+                        self.circuit_breaker.record_success(host)
+                        ok = is_success(result)
+                        if (not ok) and (is_final is not None):
+                            final = is_final(result)
+                    except RequestException as e:
+                        result = None
+                        ok = False
+                        if isinstance(e, ThrottledError):
+                            retry_after = e.retry_after
+                        self.circuit_breaker.record_failure(host, retry_after)
+
+                    if ok or final or (attempts[url] >= self.max_attempts):
+                        on_result(url, result, attempts[url])
+                    else:
+                        retry_at = time.monotonic() + self.backoff(
+                            attempts[url], retry_after
+                        )
+                        heapq.heappush(queue, (retry_at, counter, url))
+                        counter += 1
+
+        return dict(attempts)
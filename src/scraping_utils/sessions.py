@@ -0,0 +1,243 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from .response_cache import ResponseCache
+
+# Minimum number of seconds between two requests to the same domain
+DOMAIN_RATE_LIMITS: Dict[str, float] = {
+    "gmbinder.com": 0.1,
+    "homebrewery.naturalcrit.com": 0.05,
+}
+
+# Responses meaning the server wants us to slow down
+THROTTLING_STATUS_CODES = (429, 503)
+
+
+class ThrottledError(RequestException):
+    def __init__(self, *args, retry_after: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date.
+
+    Parameters
+    ----------
+    value : Optional[str]
+        The value of the header, if present.
+
+    Returns
+    -------
+    Optional[float]
+        Seconds to wait before retrying, or None if the header is missing/invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def get_domain(url: str) -> str:
+    """
+    Get the domain of a URL in the same form used by conform_url, i.e. lowercase and
+    without any leading "www."
+
+    Parameters
+    ----------
+    url : str
+        A URL string.
+
+    Returns
+    -------
+    str
+        The domain of the URL, or "" if it has none.
+    """
+    domain = urlparse(url).hostname or ""
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+
+class DomainRateLimiter:
+    def __init__(
+        self,
+        rate_limits: Optional[Dict[str, float]] = None,
+        default_rate_limit: float = 0.05,
+    ):
+        """
+        Thread-safe rate limiter which spaces out requests to each domain
+        independently, so that slow domains do not hold up requests to others.
+
+        Parameters
+        ----------
+        rate_limits : Optional[Dict[str, float]], optional
+            Minimum seconds between requests for specific domains, by default None
+        default_rate_limit : float, optional
+            Minimum seconds between requests for any other domain, by default 0.05
+        """
+        self.rate_limits: Dict[str, float] = dict(rate_limits or {})
+        self.default_rate_limit = default_rate_limit
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def interval(self, domain: str) -> float:
+        return self.rate_limits.get(domain, self.default_rate_limit)
+
+    def wait(self, url: str):
+        """
+        Block until a request to the domain of this URL is allowed.
+
+        Parameters
+        ----------
+        url : str
+            The URL about to be requested.
+        """
+        domain = get_domain(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.interval(domain)
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, url: str, seconds: float):
+        """
+        Hold back all requests to the domain of this URL for a number of seconds,
+        e.g. to honour a Retry-After header.
+
+        Parameters
+        ----------
+        url : str
+            A URL on the domain to hold back.
+        seconds : float
+            Seconds from now before the next request is allowed.
+        """
+        domain = get_domain(url)
+        with self._lock:
+            resume_at = time.monotonic() + seconds
+            self._next_slot[domain] = max(self._next_slot.get(domain, 0), resume_at)
+
+
+def build_session(pool_size: int = 10) -> requests.Session:
+    """
+    Build a requests Session that keeps connections alive. urllib3 keeps a separate
+    connection pool for each host, each holding up to pool_size connections.
+
+    Parameters
+    ----------
+    pool_size : int, optional
+        Maximum number of connections kept open per host, by default 10
+
+    Returns
+    -------
+    requests.Session
+        A session with pooled adapters mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PageFetcher:
+    def __init__(
+        self,
+        pool_size: int = 10,
+        rate_limiter: Optional[DomainRateLimiter] = None,
+        timeout: Optional[float] = 30,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """
+        Issues GET requests over a shared, pooled session. Safe to share between
+        threads.
+
+        If a cache is given, fresh cached responses are returned without touching
+        the network, and stale ones are revalidated with a conditional request.
+
+        Throttling responses (429/503) raise a ThrottledError, and hold back further
+        requests to that domain for the server's Retry-After period.
+
+        Parameters
+        ----------
+        pool_size : int, optional
+            Maximum number of connections kept open per host, by default 10
+        rate_limiter : Optional[DomainRateLimiter], optional
+            Limiter consulted before every request, by default None (no limit)
+        timeout : Optional[float], optional
+            Seconds to wait for the server before giving up, by default 30
+        cache : Optional[ResponseCache], optional
+            On-disk response cache, by default None (no caching)
+        """
+        self.session = build_session(pool_size)
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.cache = cache
+
+    def get(self, url: str) -> requests.Response:
+        """
+        Perform a GET request for the URL.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+
+        Returns
+        -------
+        requests.Response
+            The server's response (possibly rebuilt from the cache).
+
+        Raises
+        ------
+        ThrottledError
+            If the server responded with 429 Too Many Requests or 503 Service
+            Unavailable.
+        """
+        entry = None
+        headers = {}
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            if entry is not None:
+                if self.cache.is_fresh(entry):
+                    return self.cache.to_response(entry)
+                headers = self.cache.revalidation_headers(entry)
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+
+        if response.status_code in THROTTLING_STATUS_CODES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if (self.rate_limiter is not None) and (retry_after is not None):
+                self.rate_limiter.defer(url, retry_after)
+            raise ThrottledError(
+                f"{response.status_code} response from {get_domain(url)}",
+                retry_after=retry_after,
+                response=response,
+            )
+
+        if self.cache is not None:
+            if (entry is not None) and (response.status_code == 304):
+                self.cache.refresh(entry)
+                return self.cache.to_response(entry)
+            elif response.status_code == 200:
+                self.cache.store(url, response)
+        return response
@@ -0,0 +1,104 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rule actions
+REQUEST = "request"  # The source URL can only be found on the page itself
+REPLACE = "replace"  # Swap part of the URL for another string
+KEEP = "keep"  # The URL already points to the source
+DROP = "drop"  # Not a supported site, there is no source URL
+
+
+class SrcUrlRule(NamedTuple):
+    contains: Tuple[str, ...]
+    action: str
+    replace: Tuple[str, str] = ("", "")
+
+
+# Checked in order, the first rule whose substrings all appear in a URL applies
+SRC_URL_RULES: List[SrcUrlRule] = [
+    SrcUrlRule(("gmbinder.com",), REQUEST),
+    SrcUrlRule(("homebrewery.naturalcrit.com", "share"), REPLACE, ("share", "source")),
+    SrcUrlRule(("homebrewery.naturalcrit.com", "source"), KEEP),
+    SrcUrlRule(("homebrewery.naturalcrit.com",), REQUEST),
+    SrcUrlRule((), DROP),
+]
+
+
+def match_src_url_rule(url: str, rules: List[SrcUrlRule] = SRC_URL_RULES) -> SrcUrlRule:
+    """
+    Find the first rule which applies to a URL.
+
+    Parameters
+    ----------
+    url : str
+        A URL, either to the GMBinder or Homebrewery sites.
+    rules : List[SrcUrlRule], optional
+        The rule table, by default SRC_URL_RULES
+
+    Returns
+    -------
+    SrcUrlRule
+        The matching rule.
+    """
+    for rule in rules:
+        if all(s in url for s in rule.contains):
+            return rule
+    raise ValueError(f"No source URL rule matches {url}")
+
+
+def apply_src_url_rule(rule: SrcUrlRule, url: str) -> Optional[str]:
+    """
+    Get the source URL a rule gives for a URL.
+
+    Returns
+    -------
+    Optional[str]
+        The source URL, or None if it needs to be found with a web request.
+    """
+    if rule.action == REPLACE:
+        return url.replace(*rule.replace)
+    elif rule.action == KEEP:
+        return url
+    elif rule.action == DROP:
+        return ""
+    else:
+        return None
+
+
+def apply_src_url_rules(
+    urls: pd.Series, rules: List[SrcUrlRule] = SRC_URL_RULES
+) -> pd.Series:
+    """
+    Vectorised version of match_src_url_rule/apply_src_url_rule.
+
+    Parameters
+    ----------
+    urls : pd.Series
+        URLs, either to the GMBinder or Homebrewery sites.
+    rules : List[SrcUrlRule], optional
+        The rule table, by default SRC_URL_RULES
+
+    Returns
+    -------
+    pd.Series
+        Source URLs aligned with urls, NaN where a web request is needed.
+    """
+    src_urls = pd.Series(np.nan, index=urls.index, dtype=object)
+    unmatched = pd.Series(True, index=urls.index)
+
+    for rule in rules:
+        mask = unmatched.copy()
+        for s in rule.contains:
+            mask &= urls.str.contains(s, regex=False)
+        unmatched &= ~mask
+
+        if rule.action == REPLACE:
+            src_urls[mask] = urls[mask].str.replace(*rule.replace, regex=False)
+        elif rule.action == KEEP:
+            src_urls[mask] = urls[mask]
+        elif rule.action == DROP:
+            src_urls[mask] = ""
+
+    return src_urls
@@ -252,7 +252,7 @@ def prep_data(data_path: Path) -> pd.DataFrame:
     Parameters
     ----------
     data_path : Path
-        The path to the CSV or pickle file containing the data.
+        The path to the CSV, pickle, Parquet or Feather file containing the data.
 
     Returns
     -------
@@ -292,7 +292,7 @@ def annotate_sections(data_path: Path, prev_length: int):
     Parameters
     ----------
     data_path : Path
-        The path to the CSV or pickle file containing the main data DataFrame.
+        The path to the CSV, pickle, Parquet or Feather file containing the main data DataFrame.
     prev_length : int
         The desired length for previewing the text body during the review process.
     """
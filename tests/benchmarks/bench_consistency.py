@@ -0,0 +1,71 @@
+"""
+Time of make_consistent with the rule table's triggers against the old sequential
+passes (every rule applied, and a re.sub for every JARGON term), on long
+compendium documents made by repeating the sample texts in tests/fixtures/texts.
+"""
+import re
+from functools import partial
+
+from timing import FIXTURES, best_time, report
+
+from src.preprocessing.text_cleaning.consistency import (
+    CONSISTENCY_RULES,
+    GATED_RULES,
+    _fix_jargon,
+    make_consistent,
+)
+from src.preprocessing.text_cleaning.mappers import JARGON
+
+
+def _sequential_fix_jargon(text: str) -> str:
+    # fix_jargon before the rule table, compiling and applying every term
+    for target, replacement in JARGON.items():
+        text = re.sub(
+            pattern=r"(?<![A-Z0-9])" + target + r"s?(?![A-Z0-9])",
+            repl=partial(_fix_jargon, target=target, replacement=replacement),
+            string=text,
+            flags=re.IGNORECASE,
+        )
+    text = text.replace("classs", "classes")
+    text = text.replace("piecess", "pieces")
+    text = text.replace("increasess", "increases")
+    return text
+
+
+SEQUENTIAL_RULES = [
+    rule
+    if rule.name in GATED_RULES
+    else rule._replace(
+        triggers=(),
+        apply=_sequential_fix_jargon if rule.name == "jargon" else rule.apply,
+    )
+    for rule in CONSISTENCY_RULES
+]
+
+
+def main():
+    texts = [
+        path.read_text(encoding="utf-8")
+        for path in sorted((FIXTURES / "texts").glob("*.md"))
+    ]
+    rows = []
+    for name, doc in [("sample text", texts[0]), ("sample texts", "\n".join(texts))]:
+        for repeats in (1, 20, 100):
+            long_doc = "\n\n".join([doc] * repeats)
+            expected = make_consistent(long_doc, rules=SEQUENTIAL_RULES)
+            assert make_consistent(long_doc) == expected
+            baseline = best_time(
+                lambda: make_consistent(long_doc, rules=SEQUENTIAL_RULES), repeat=3
+            )
+            candidate = best_time(lambda: make_consistent(long_doc), repeat=3)
+            case = f"{name} x{repeats} ({len(long_doc) // 1024}kB)"
+            rows.append((case, baseline, candidate))
+
+    report(
+        "make_consistent: sequential passes (baseline) vs rule table (candidate)",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
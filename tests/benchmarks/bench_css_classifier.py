@@ -0,0 +1,67 @@
+"""
+Per-line latency of check_for_css with the merged CssClassifier against the old
+search of every NOISY_CSS pattern in turn, over the lines of the sample texts in
+tests/fixtures/texts. The classifier is timed without its line cache, and with it
+for the two passes of clean_css.
+"""
+import re
+from typing import List, Sequence
+
+from timing import FIXTURES, best_time, report
+
+from src.preprocessing.text_cleaning.css_cleaning import CssClassifier, check_for_css
+from src.preprocessing.text_cleaning.noise import NOISY_CSS
+
+
+def _old_check_for_css(line: str, noisy_css: Sequence[re.Pattern]) -> bool:
+    line = line.strip()
+    css = any([bool(css.findall(line)) for css in noisy_css])
+    if line == "":
+        return css
+    elif not (css) and (line[0] == "."):
+        css = ("{" in line) and ("}" in line)
+    return css
+
+
+def _lines() -> List[str]:
+    lines = []
+    for path in sorted((FIXTURES / "texts").glob("*.md")):
+        lines.extend(path.read_text(encoding="utf-8").split("\n"))
+    return lines
+
+
+def main():
+    lines = _lines()
+    n = len(lines)
+
+    def old_pass():
+        for line in lines:
+            _old_check_for_css(line, NOISY_CSS)
+
+    uncached = CssClassifier(NOISY_CSS, cache_size=0)
+
+    def uncached_pass():
+        for line in lines:
+            check_for_css(line, uncached)
+
+    def cached_two_passes():
+        classifier = CssClassifier(NOISY_CSS)
+        for _ in range(2):
+            for line in lines:
+                check_for_css(line, classifier)
+
+    old = best_time(old_pass) / n
+    rows = [
+        ("one pass, no cache", old, best_time(uncached_pass) / n),
+        ("two passes, cached", old, best_time(cached_two_passes) / (2 * n)),
+    ]
+    report(
+        f"Per-line check_for_css over {n} lines: per pattern (baseline) vs "
+        "CssClassifier (candidate)",
+        rows,
+        unit="us",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Per-page time of the event-parser fast paths of _grab_src_url/_collect_text
+(find_first_tag_attr, extract_textarea_text) against a full html5lib parse with
+BeautifulSoup, on the saved pages in tests/fixtures/html.
+"""
+from timing import FIXTURES, best_time, report
+
+from bs4 import BeautifulSoup
+
+from src.preprocessing.text_cleaning.markup_style_cleaning import strip_tags
+from src.preprocessing.text_cleaning.noise import NOISY_HTML
+from src.scraping_utils.html_extraction import (
+    extract_textarea_text,
+    find_first_tag_attr,
+)
+
+BUTTONS = {
+    "gmbinder": {"class": "btn btn-default", "title": "View Source"},
+    "homebrewery": {"class": "navItem teal", "icon": "fas fa-code"},
+}
+
+
+def _soup_textarea(html: str):
+    soup = BeautifulSoup(html, "html5lib")
+    for tag in NOISY_HTML:
+        strip_tags(soup, tag)
+    return soup.find("textarea")
+
+
+def main():
+    rows = []
+    for page in sorted((FIXTURES / "html").glob("*.html")):
+        with open(page, encoding="utf-8", newline="") as f:
+            html = f.read()
+        site = page.stem.split("_")[0]
+        if "source" in page.stem:
+            baseline = best_time(lambda: _soup_textarea(html))
+            candidate = best_time(lambda: extract_textarea_text(html, NOISY_HTML))
+        else:
+            attrs = BUTTONS[site]
+            baseline = best_time(
+                lambda: BeautifulSoup(html, "html5lib").find("a", attrs)
+            )
+            candidate = best_time(lambda: find_first_tag_attr(html, "a", attrs, "href"))
+        rows.append((f"{page.stem} ({len(html) // 1024}kB)", baseline, candidate))
+
+    report("html5lib BeautifulSoup (baseline) vs event parser (candidate)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Time of clean_links_images with the single scan against the parser-based
+reference in tests/test_links_images.py, on the sample texts and on generated
+documents holding hundreds of links and images.
+"""
+import sys
+from typing import List
+
+from timing import FIXTURES, ROOT, best_time, report
+
+sys.path.insert(0, str(ROOT / "tests"))
+from test_links_images import reference_clean_links_images  # noqa: E402
+
+from src.preprocessing.text_cleaning.markup_style_cleaning import (  # noqa: E402
+    clean_links_images,
+)
+
+LINK_LINES = [
+    "See [the {i}th spell](https://example.com/spells/{i}) for details.",
+    "| [*Monster {i}*](https://example.com/monsters/{i} \"Monster\") | 5 | 12 |",
+    "![Art {i}](https://example.com/art/{i}.png) A caption with www.example.com/{i}",
+    "- [Item {i}](https://example.com/items/{i}), [Feat {i}](/feats/{i}) and text",
+]
+
+
+def _links_document(n_lines: int) -> str:
+    lines: List[str] = []
+    for i in range(n_lines):
+        lines.append(LINK_LINES[i % len(LINK_LINES)].format(i=i))
+        if i % 10 == 9:
+            lines.append("")
+            lines.append(f"## Section {i // 10}")
+    return "\n".join(lines)
+
+
+def main():
+    texts = [
+        path.read_text(encoding="utf-8")
+        for path in sorted((FIXTURES / "texts").glob("*.md"))
+    ]
+    cases = [("sample texts", "\n\n".join(texts))]
+    for n_lines in (100, 400):
+        text = _links_document(n_lines)
+        n_links = text.count("](")
+        cases.append((f"{n_links} links/images", text))
+
+    rows = []
+    for name, text in cases:
+        assert clean_links_images(text) == reference_clean_links_images(text)
+        baseline = best_time(lambda: reference_clean_links_images(text), repeat=3)
+        candidate = best_time(lambda: clean_links_images(text), repeat=3)
+        rows.append((name, baseline, candidate))
+    report(
+        "clean_links_images: parser-based reference (baseline) vs single scan "
+        "(candidate)",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
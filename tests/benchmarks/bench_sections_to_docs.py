@@ -0,0 +1,35 @@
+"""
+Time of sections_df_to_docs against the per-UID loop in
+tests/test_markdown_handling.py, on synthetic section frames of 300 documents and
+ten times that.
+"""
+import sys
+
+from timing import ROOT, best_time, report
+
+sys.path.insert(0, str(ROOT / "tests"))
+from test_markdown_handling import (  # noqa: E402
+    reference_sections_df_to_docs,
+    synthetic_sections_df,
+)
+
+from src.preprocessing.markdown_handling import sections_df_to_docs  # noqa: E402
+
+
+def main():
+    rows = []
+    for n_docs in (300, 3_000):
+        df = synthetic_sections_df(n_docs)
+        baseline = best_time(lambda: reference_sections_df_to_docs(df), repeat=1)
+        candidate = best_time(lambda: sections_df_to_docs(df), repeat=3)
+        rows.append((f"{n_docs} docs, {len(df)} sections", baseline, candidate))
+
+    report(
+        "sections_df_to_docs: per-UID loop (baseline) vs groupby (candidate)",
+        rows,
+        unit="s",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput of EmbeddingAwareTokenizer.tokenize_batch() (and so of transform() with
+one worker) against the per-document corpus.map(tokenizer.tokenize), with and
+without the known terms cache (before it, each text rebuilt the union of the
+vocabularies and mapping keys), on the paragraphs of the sample texts in
+tests/fixtures/texts as documents. Unknown tokens
+are replaced by an unknown token and, where NLTK's tagger data is installed, by POS
+tags. Without NLTK's punkt data, texts are split by the Treebank word tokenizer.
+"""
+import copy
+import random
+from typing import List, Set
+
+import nltk
+import pandas as pd
+from nltk.tokenize import TreebankWordTokenizer
+
+from timing import FIXTURES, best_time, report
+
+from src.preprocessing import tokenization
+from src.preprocessing.tokenization import EmbeddingAwareTokenizer
+
+
+class _UncachedTokenizer(EmbeddingAwareTokenizer):
+    @property
+    def known_terms(self) -> Set[str]:
+        return self.common_vocab.union(self.token_mapping_keys).union(
+            self.embedding_vocab
+        )
+
+
+def _has_data(resource: str) -> bool:
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        return False
+    return True
+
+
+def _documents(n_docs: int) -> pd.Series:
+    paragraphs: List[str] = []
+    for path in sorted((FIXTURES / "texts").glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        paragraphs.extend(p for p in text.split("\n\n") if p.strip())
+    return pd.Series([paragraphs[i % len(paragraphs)] for i in range(n_docs)])
+
+
+# Size of the embedding vocabulary, about that of common pretrained embeddings
+EMBEDDING_SIZE = 100_000
+
+
+def _tokenizer(corpus: pd.Series, unknown_token: str) -> EmbeddingAwareTokenizer:
+    # Half of the corpus' words have embeddings, padded with made up words
+    rng = random.Random(0)
+    words = sorted({w for text in corpus for w in text.lower().split()})
+    embedding_vocab = rng.sample(words, k=len(words) // 2)
+    n_made_up = EMBEDDING_SIZE - len(embedding_vocab)
+    embedding_vocab += [f"word{i}" for i in range(n_made_up)]
+    tokenizer = EmbeddingAwareTokenizer(
+        embedding_vocab=embedding_vocab,
+        min_counts_common_token=3,
+        min_subtoken_size=3,
+        max_subtokens=2,
+        unknown_token=unknown_token,
+    )
+    tokenizer.fit(corpus)
+    return tokenizer
+
+
+def main():
+    if not _has_data("tokenizers/punkt"):
+        tokenization.word_tokenize = TreebankWordTokenizer().tokenize
+    unknown_tokens = ["<unk>"]
+    if _has_data("taggers/averaged_perceptron_tagger"):
+        unknown_tokens.append("")
+    else:
+        print("NLTK tagger data not found, POS tag placeholders are not timed\n")
+
+    rows = []
+    for n_docs in (500, 5_000):
+        corpus = _documents(n_docs)
+        for unknown_token in unknown_tokens:
+            tokenizer = _tokenizer(corpus, unknown_token)
+            uncached = copy.copy(tokenizer)
+            uncached.__class__ = _UncachedTokenizer
+            kind = "unknown token" if unknown_token else "POS tags"
+
+            def batch():
+                # Fresh placeholders for each run
+                tokenizer.unknown_mappings.clear()
+                tokenizer.tokenize_batch(corpus.to_list())
+
+            candidate = best_time(batch, repeat=3)
+            for name, per_doc in [("no cache", uncached), ("cached", tokenizer)]:
+
+                def one_by_one():
+                    per_doc.unknown_mappings.clear()
+                    corpus.map(per_doc.tokenize)
+
+                repeat = 1 if per_doc is uncached else 3
+                baseline = best_time(one_by_one, repeat=repeat)
+                rows.append((f"{n_docs} docs, {kind}, {name}", baseline, candidate))
+
+    report(
+        "Tokenizing a corpus: corpus.map(tokenize) without/with the known terms "
+        "cache (baseline) vs tokenize_batch (candidate)",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Time of the delimiter steps of EmbeddingAwareTokenizer.fit() (merging delimited
+variations, then splitting delimited tokens) against the loop based versions in
+tests/test_tokenization.py, on synthetic vocabularies of about 8k tokens and ten
+times that.
+"""
+import sys
+
+from timing import ROOT, best_time, report
+
+sys.path.insert(0, str(ROOT / "tests"))
+from test_tokenization import (  # noqa: E402
+    reference_map_delim_splits,
+    reference_map_delimited_tokens,
+    synthetic_count_df,
+    synthetic_tokenizer,
+)
+
+DELIMS = ["-", "'", "."]
+
+
+def _merge(tokenizer, count_df, map_delimited_tokens):
+    for d in DELIMS:
+        count_df = map_delimited_tokens(tokenizer, count_df, d)
+    tokenizer.common_vocab.update(count_df[count_df["count"] >= 2]["token"])
+    return count_df
+
+
+def _split(tokenizer, count_df, map_delim_splits):
+    for d in DELIMS:
+        count_df = map_delim_splits(tokenizer, count_df, d)
+    return count_df
+
+
+def main():
+    def merge_new(tokenizer, df, d):
+        return tokenizer.map_delimited_tokens(df, delim=d)
+
+    def split_new(tokenizer, df, d):
+        return tokenizer.map_delim_splits(df, delim=d)
+
+    rows = []
+    for n_words in (4_000, 40_000):
+        count_df = synthetic_count_df(n_words)
+        tokenizer = synthetic_tokenizer(count_df)
+        merged = _merge(tokenizer, count_df, merge_new)
+        n = f"{len(count_df) // 1000}k tokens"
+
+        baseline = best_time(
+            lambda: _merge(tokenizer, count_df, reference_map_delimited_tokens),
+            repeat=1,
+        )
+        candidate = best_time(lambda: _merge(tokenizer, count_df, merge_new), repeat=3)
+        rows.append((f"merge variations, {n}", baseline, candidate))
+
+        baseline = best_time(
+            lambda: _split(tokenizer, merged, reference_map_delim_splits), repeat=1
+        )
+        candidate = best_time(lambda: _split(tokenizer, merged, split_new), repeat=3)
+        rows.append((f"split tokens, {n}", baseline, candidate))
+
+    report(
+        "Tokenizer delimiter steps: loop based (baseline) vs vectorised (candidate)",
+        rows,
+        unit="s",
+    )
+
+
+if __name__ == "__main__":
+    main()
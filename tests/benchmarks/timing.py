@@ -0,0 +1,50 @@
+"""
+Shared helpers for the benchmark scripts in this directory. The scripts are run
+directly (they are not collected by pytest), e.g.
+
+    python tests/benchmarks/bench_html_extraction.py
+"""
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+FIXTURES = ROOT / "tests" / "fixtures"
+
+
+def best_time(func: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Best wall time of a call to func in seconds, over repeat runs of number calls."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+UNITS = {"s": 1.0, "ms": 1e3, "us": 1e6}
+
+
+def report(title: str, rows: List[Tuple[str, float, float]], unit: str = "ms"):
+    """
+    Print a table comparing a baseline and a candidate.
+
+    Parameters
+    ----------
+    title : str
+        Heading of the table.
+    rows : List[Tuple[str, float, float]]
+        Case name, baseline seconds and candidate seconds of each case.
+    unit : str, optional
+        Unit the times are shown in, one of UNITS, by default "ms"
+    """
+    scale = UNITS[unit]
+    width = max([len(name) for name, _, _ in rows] + [4])
+    print(title)
+    print(f"{'case':<{width}}  {'baseline':>10}  {'candidate':>10}  {'speedup':>8}")
+    for name, baseline, candidate in rows:
+        speedup = baseline / candidate if candidate else float("inf")
+        print(
+            f"{name:<{width}}  {baseline * scale:>8.2f}{unit:<2}"
+            f"  {candidate * scale:>8.2f}{unit:<2}"
+            f"  {speedup:>7.1f}x"
+        )
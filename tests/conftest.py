@@ -0,0 +1,69 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+# A route returns (status, headers, body) for the request's headers
+Route = Callable[[Dict[str, str]], Tuple[int, Dict[str, str], bytes]]
+
+
+class StubServer:
+    def __init__(self):
+        """
+        A local HTTP server answering GET requests from a table of routes, which
+        records every request it receives (path and headers).
+        """
+        self.routes: Dict[str, Route] = {}
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                headers = dict(self.headers.items())
+                stub.requests.append((self.path, headers))
+                route = stub.routes.get(self.path)
+                if route is None:
+                    status, out_headers, body = 404, {}, b""
+                else:
+                    status, out_headers, body = route(headers)
+                self.send_response(status)
+                for key, value in out_headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + path
+
+    def paths(self) -> List[str]:
+        return [path for path, _ in self.requests]
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
@@ -0,0 +1,128 @@
+import pandas as pd
+import pytest
+
+from src.preprocessing.text_cleaning import main_cleaning_funcs
+from src.preprocessing.text_cleaning.main_cleaning_funcs import (
+    MANIFEST_NAME,
+    clean_raw_scrapes,
+    clean_scraped_text,
+)
+from src.preprocessing.text_cleaning.pipeline import (
+    CleaningPipeline,
+    CleaningStage,
+    scraped_text_stages,
+)
+
+RAW_TEXTS = {
+    1: "# Title\n\nSome text â€™ here.\n\n## Sub\n\nMore â€¢ text.",
+    2: "# Plain\n\nNothing to repair.",
+    3: "# FAIL\n\nFirst failure.",
+    4: "# Quotes\n\nâ€œQuotedâ€ text.",
+    5: "# FAIL\n\nSecond failure.",
+}
+
+
+def fail_marked(text: str) -> str:
+    # Raises the error clean_raw_scrapes expects from a stage for marked texts
+    if "FAIL" in text:
+        raise ValueError(text.split("\n")[-1])
+    return text
+
+
+def failing_pipeline(cache_dir=None) -> CleaningPipeline:
+    stages = scraped_text_stages() + [CleaningStage("fail", fail_marked, cache=False)]
+    return CleaningPipeline(stages, cache_dir=cache_dir)
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    raw_path = tmp_path / "raw"
+    clean_path = tmp_path / "clean"
+    raw_path.mkdir()
+    clean_path.mkdir()
+    for uid, text in RAW_TEXTS.items():
+        (raw_path / f"{uid}.txt").write_text(text)
+    return raw_path, clean_path
+
+
+def docs() -> pd.DataFrame:
+    return pd.DataFrame({"UID": list(RAW_TEXTS), "link": [f"l{u}" for u in RAW_TEXTS]})
+
+
+def manifest_uids(clean_path) -> list:
+    return sorted(pd.read_csv(clean_path / MANIFEST_NAME)["uid"])
+
+
+def clean_texts(clean_path) -> dict:
+    return {p.name: p.read_text() for p in clean_path.glob("*.txt")}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_lowest_uid_error_raised_and_failures_not_recorded(
+    dirs, monkeypatch, workers
+):
+    raw_path, clean_path = dirs
+    monkeypatch.setattr(main_cleaning_funcs, "default_pipeline", failing_pipeline)
+
+    with pytest.raises(ValueError, match="First failure"):
+        clean_raw_scrapes(docs(), raw_path, clean_path, workers=workers)
+
+    assert manifest_uids(clean_path) == [1, 2, 4]
+    assert sorted(clean_texts(clean_path)) == ["1.txt", "2.txt", "4.txt"]
+
+    # Only the failed texts are cleaned again
+    (raw_path / "3.txt").write_text("# Fixed\n\nFirst text, fixed.")
+    with pytest.raises(ValueError, match="Second failure"):
+        clean_raw_scrapes(docs(), raw_path, clean_path, workers=workers)
+    assert manifest_uids(clean_path) == [1, 2, 3, 4]
+
+
+def test_workers_match_serial(tmp_path, dirs):
+    raw_path, clean_path = dirs
+    for uid in [3, 5]:
+        (raw_path / f"{uid}.txt").write_text(f"# Heading {uid}\n\nText {uid}.")
+    parallel_path = tmp_path / "parallel"
+    parallel_path.mkdir()
+
+    serial = clean_raw_scrapes(docs(), raw_path, clean_path, workers=1)
+    parallel = clean_raw_scrapes(docs(), raw_path, parallel_path, workers=2)
+
+    pd.testing.assert_series_equal(parallel, serial)
+    assert clean_texts(parallel_path) == clean_texts(clean_path)
+    assert len(clean_texts(clean_path)) == len(RAW_TEXTS)
+    assert manifest_uids(parallel_path) == manifest_uids(clean_path)
+
+
+def test_encoding_repairs(dirs):
+    raw_path, clean_path = dirs
+    for uid in [3, 5]:
+        (raw_path / f"{uid}.txt").unlink()
+
+    repairs = clean_raw_scrapes(docs(), raw_path, clean_path)
+
+    expected = pd.Series({1: 2, 2: 0, 4: 2}, name="encoding_repairs", dtype=int)
+    expected.index.name = "UID"
+    pd.testing.assert_series_equal(repairs, expected)
+    assert "â€" not in (clean_path / "1.txt").read_text()
+
+    # Nothing left to clean
+    repairs = clean_raw_scrapes(docs(), raw_path, clean_path)
+    assert repairs.empty and repairs.name == "encoding_repairs"
+
+
+def test_clean_scraped_text_builds_no_pipeline_without_options(monkeypatch):
+    text = RAW_TEXTS[1]
+    expected, _ = CleaningPipeline(scraped_text_stages()).run(text)
+    without_encoding, _ = CleaningPipeline(
+        scraped_text_stages(fix_encoding=False)
+    ).run(text)
+
+    def no_new_pipeline(*args, **kwargs):
+        raise AssertionError("Built a pipeline without options")
+
+    with monkeypatch.context() as m:
+        m.setattr(main_cleaning_funcs, "CleaningPipeline", no_new_pipeline)
+        assert clean_scraped_text(text) == expected
+
+    assert clean_scraped_text(text, fix_encoding=False) == without_encoding
+    assert without_encoding != expected
@@ -0,0 +1,85 @@
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from src.preprocessing.text_cleaning.consistency import (
+    CONSISTENCY_RULES,
+    GATED_RULES,
+    fix_subreddit_links,
+    fold_case,
+    make_consistent,
+)
+
+from conftest import FIXTURES
+
+# Golden outputs were written by the sequential make_consistent which preceded
+# the rule table, and must not change
+INPUTS = sorted((FIXTURES / "texts").glob("*.md")) + sorted(
+    (FIXTURES / "consistency").glob("*.md")
+)
+GOLDEN = FIXTURES / "consistency" / "golden"
+
+
+def _read(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+def _lines() -> List[str]:
+    return [line for path in INPUTS for line in _read(path).split("\n")]
+
+
+@pytest.mark.parametrize("path", INPUTS, ids=lambda p: p.stem)
+def test_matches_golden(path):
+    assert make_consistent(_read(path)) == _read(GOLDEN / f"{path.stem}.txt")
+
+
+@pytest.mark.parametrize("path", INPUTS, ids=lambda p: p.stem)
+def test_triggers_do_not_change_output(path):
+    untriggered = [
+        rule if rule.name in GATED_RULES else rule._replace(triggers=())
+        for rule in CONSISTENCY_RULES
+    ]
+    text = _read(path)
+
+    assert make_consistent(text, rules=untriggered) == make_consistent(text)
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [r for r in CONSISTENCY_RULES if r.triggers and (r.name not in GATED_RULES)],
+    ids=lambda r: r.name,
+)
+def test_rules_without_triggers_leave_text_unchanged(rule):
+    # Every line, and every line as the previous rules leave it, without any of a
+    # rule's triggers must be left unchanged by the rule
+    lines = _lines()
+    lines += [make_consistent(line) for line in lines]
+    lines += [line.upper() for line in lines] + [line.title() for line in lines]
+    for line in lines:
+        haystack = fold_case(line) if rule.ignore_case else line
+        if not any(t in haystack for t in rule.triggers):
+            assert rule.apply(line) == line
+
+
+def test_subreddit_links_ignorecase_is_a_count():
+    # re.IGNORECASE is passed as re.sub's count, so only the first two links are
+    # fixed (and matching is case sensitive); make_consistent keeps this behaviour
+    text = "/r/ one /r/ two /r/ three /R/ four / u/ five"
+
+    assert fix_subreddit_links(text) == "/r/one /r/two /r/ three /R/ four /u/five"
+    assert "/r/first, /r/second, / r/ third" in _read(GOLDEN / "edge_cases.txt")
+
+
+def test_gated_rules():
+    # fix_lvl/fix_dmg have only ever been applied to texts containing "lv"/"dmg"
+    assert make_consistent("A 3rd-level spell.") == "A 3rd-level spell."
+    assert make_consistent("A 3rd-level lv spell.") == "A 3rd level level spell."
+    assert make_consistent("8 FIRE DMG") == "8 FIRE DMG"
+    assert make_consistent("8 FIRE DMG, 2 dmg") == "8 fire dmg, 2 dmg"
+
+
+def test_case_folded_triggers():
+    # "KNOWN" only triggers the known rule through the case-folded text
+    assert make_consistent("SpellsKNOWN") == "Spells KNOWN"
+    assert make_consistent("Components: V, S") == "Components: Verbal, Somatic"
@@ -0,0 +1,141 @@
+import re
+
+import pytest
+
+from src.preprocessing.markdown_handling import parse_sections
+from src.preprocessing.text_cleaning.credit_identification_helpers import (
+    CREDIT_PATTERNS,
+    HARD_DROP_PATTERNS,
+    SOFT_DROP_PATTERNS,
+    SPLITTER_PATTERNS,
+    FauxSection,
+    check_if_any_pats,
+    check_if_credit,
+    clean_promos,
+)
+
+from conftest import FIXTURES
+
+
+# The per-pattern loops which the combined PatternSets replaced, kept as the
+# reference their output is checked against
+def reference_check_if_any_pats(pats, text):
+    return any(re.search(pat, text, flags=re.IGNORECASE) for pat in pats)
+
+
+def reference_strip_promos(text, header, max_pct_promos=0.4):
+    if header:
+        if reference_check_if_any_pats(HARD_DROP_PATTERNS, text):
+            return ""
+        for pat in SOFT_DROP_PATTERNS:
+            text = re.sub(pat, "", text, flags=re.IGNORECASE)
+        return text
+
+    if reference_check_if_any_pats(HARD_DROP_PATTERNS, text):
+        lines = text.split("\n")
+        for pat in HARD_DROP_PATTERNS:
+            text = re.sub(pat, "", text, flags=re.IGNORECASE)
+        text = "\n".join(
+            [o for e, o in zip(text.split("\n"), lines) if o == e]
+        )
+    if reference_check_if_any_pats(SOFT_DROP_PATTERNS, text):
+        lines = text.split("\n")
+        for pat in SOFT_DROP_PATTERNS:
+            text = re.sub(pat, "", text, flags=re.IGNORECASE)
+        clean_lines = []
+        for edited, original in zip(text.split("\n"), lines):
+            if not original:
+                clean_lines.append(original)
+            elif 1 - (len(edited) / len(original)) < max_pct_promos:
+                clean_lines.append(edited)
+        text = "\n".join(clean_lines)
+    return text
+
+
+def reference_clean_promos(text, header, max_pct_promos=0.4):
+    # Splitters are case-sensitive (no flags)
+    for pat in SPLITTER_PATTERNS:
+        text = re.split(pat, text)[0]
+    return reference_strip_promos(text, header, max_pct_promos)
+
+
+def reference_check_if_credit(section, max_pct_promos=0.4):
+    content = section.content.lstrip(section.heading)
+    if len(section.heading) > 0:
+        heading = reference_clean_promos(section.heading, header=True)
+        if 1 - (len(heading) / len(section.heading)) >= max_pct_promos:
+            return True
+    if len(content) == 0:
+        return False
+    clean = reference_clean_promos(content, header=False, max_pct_promos=max_pct_promos)
+    return 1 - (len(clean) / len(content)) >= max_pct_promos
+
+
+# Splitters only cut the text in their own case, the other patterns ignore case
+CASE_TEXTS = [
+    "Supported By my patrons, thank you all",
+    "supported by my patrons, thank you all",
+    "SUPPORTED BY my patrons, thank you all",
+    "A class for wardens.\nOPEN GAME License\nThe rest is legal text",
+    "A class for wardens.\nopen game license\nThe rest is legal text",
+    "A class for wardens.\nOpen Game License\nThe rest is legal text",
+    "Great subclass. Special thanks to all my wonderful Patrons for this one",
+    "Great subclass. special thanks to all my wonderful patrons for this one",
+    "Created by Nicholas H. with a lot of help",
+    "created by nicholas h. with a lot of help",
+    "WWW.GMBINDER.COM This document was lovingly created using GM Binder.",
+    "www.gmbinder.com this document was lovingly created using gm binder.",
+    "The fighter swings. Art by someone, version 2",
+    "Martial artists strike twice per turn and gain art of war",
+    "Credits\n\nWritten by me, art by u/someone",
+    "",
+]
+
+
+def fixture_sections():
+    sections = []
+    for path in sorted((FIXTURES / "texts").glob("*.md")):
+        sections.extend(parse_sections(path.read_text(encoding="utf-8")))
+    return sections
+
+
+def case_sections():
+    sections = []
+    for text in CASE_TEXTS:
+        sections.append(FauxSection(text, ""))
+        sections.append(FauxSection("Heading\n\n" + text, "Heading"))
+        first_line = text.split("\n")[0]
+        sections.append(FauxSection(first_line + "\n\nSome body text", first_line))
+    return sections
+
+
+@pytest.mark.parametrize("text", CASE_TEXTS)
+@pytest.mark.parametrize("header", [True, False])
+def test_clean_promos_matches_reference(text, header):
+    assert clean_promos(text, header=header) == reference_clean_promos(text, header)
+
+
+@pytest.mark.parametrize("text", CASE_TEXTS)
+def test_check_if_any_pats_matches_reference(text):
+    for pats in [HARD_DROP_PATTERNS, SOFT_DROP_PATTERNS, CREDIT_PATTERNS]:
+        assert check_if_any_pats(pats, text) == reference_check_if_any_pats(
+            pats, text
+        )
+
+
+def test_check_if_credit_matches_reference():
+    sections = fixture_sections() + case_sections()
+
+    for section in sections:
+        for max_pct_promos in [0.2, 0.4, 0.8]:
+            assert check_if_credit(section, max_pct_promos) == (
+                reference_check_if_credit(section, max_pct_promos)
+            ), section
+
+
+def test_splitters_are_case_sensitive():
+    text = "Body text OPEN GAME License trailing legal text"
+
+    assert clean_promos(text, header=False, max_pct_promos=1) == "Body text "
+    # Not split in lower case, the hard drop pattern removes the whole line instead
+    assert clean_promos(text.lower(), header=False, max_pct_promos=1) == ""
@@ -0,0 +1,144 @@
+import re
+from typing import List, Sequence
+
+from src.preprocessing.text_cleaning.css_cleaning import (
+    CssClassifier,
+    check_for_css,
+    clean_standard_css,
+    clean_wrapper_css,
+)
+from src.preprocessing.text_cleaning.noise import NOISY_CSS
+
+from conftest import FIXTURES
+
+# Near misses and edge cases of the NOISY_CSS patterns
+EXTRA_LINES = [
+    "",
+    "   ",
+    "Expert in pxls",
+    "The px value",
+    "width of 10 ft",
+    "Width: 30px",
+    "colour: red",
+    "color: red",
+    "COLOR: red",
+    "the table tr",
+    "Table TR",
+    "a td b",
+    "position:fixed.subclassSpells",
+    "position: fixed",
+    "URL(https://example.com/a.png)",
+    "uRl(https://example.com/a.png)",
+    "url (https://example.com/a.png)",
+    "DIV.Wide",
+    "div.",
+    "50% {",
+    "/* comment */",
+    "/* unclosed comment",
+    "<!-- note -->",
+    "<!-- note: with punctuation -->",
+    ".phb",
+    ".element {variable: value}",
+    ".element {variable: value",
+    "var(-)",
+    "var(--main)",
+    "rgba(0,0,0,0)",
+    "hue-rotate(90deg)",
+    "transform:scale(2)",
+    "margin-top :0",
+    "text-index\t:\t1em",
+    "shadow-x12 : 3",
+    "vertical-align2: top",
+    "font-variant:small-caps",
+    "font-variant: small-caps",
+    "th,td",
+    "th, \ttd",
+    "Thunder & lightning",
+    "résumé: café { }",
+]
+
+
+def _corpus_lines() -> List[str]:
+    lines = list(EXTRA_LINES)
+    for path in sorted((FIXTURES / "texts").glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        lines.extend(text.split("\n"))
+    return lines
+
+
+def _old_check_for_css(line: str, noisy_css: Sequence[re.Pattern]) -> bool:
+    # check_for_css before CssClassifier, searching each pattern in turn
+    line = line.strip()
+    css = any([bool(css.findall(line)) for css in noisy_css])
+    if line == "":
+        return css
+    elif not (css) and (line[0] == "."):
+        css = ("{" in line) and ("}" in line)
+    return css
+
+
+def _per_pattern_classifier(noisy_css: Sequence[re.Pattern]) -> CssClassifier:
+    # A classifier searching every pattern on its own
+    classifier = CssClassifier(noisy_css)
+    classifier.combined = None
+    classifier.separate = list(noisy_css)
+    return classifier
+
+
+LINES = _corpus_lines()
+
+
+def test_corpus_has_css_and_text():
+    decisions = [_old_check_for_css(line, NOISY_CSS) for line in LINES]
+    assert 30 < sum(decisions) < len(decisions) - 100
+
+
+def test_all_noisy_css_patterns_are_merged():
+    classifier = CssClassifier(NOISY_CSS)
+    assert classifier.combined is not None
+    assert classifier.separate == []
+
+
+def test_matches_per_pattern_search():
+    classifier = CssClassifier(NOISY_CSS)
+
+    mismatches = [
+        line
+        for line in LINES
+        if (
+            classifier.search(line.strip())
+            != any(p.search(line.strip()) is not None for p in NOISY_CSS)
+        )
+        or (check_for_css(line, classifier) != _old_check_for_css(line, NOISY_CSS))
+    ]
+
+    assert mismatches == []
+
+
+def test_unmergeable_patterns():
+    patterns = [
+        re.compile(r"(ab)\1"),
+        re.compile(r"x y  # verbose", re.VERBOSE),
+        re.compile(r"(?i)foo"),
+        re.compile(r"bar", re.IGNORECASE),
+        re.compile(r"(?s)a.b"),
+        re.compile(r"^start", re.MULTILINE),
+        re.compile(r"(?P<name>q)(?P=name)"),
+    ]
+    classifier = CssClassifier(patterns)
+    lines = ["abab", "ab", "xy", "x y", "FOO", "BAR", "a\nb", "start", "qq", "q"]
+
+    for line in lines:
+        expected = any(p.search(line) is not None for p in patterns)
+        assert classifier.search(line) == expected, line
+
+
+def test_cleaned_lines_match_per_pattern_search():
+    classifier = CssClassifier(NOISY_CSS)
+    reference = _per_pattern_classifier(NOISY_CSS)
+
+    for path in sorted((FIXTURES / "texts").glob("*.md")):
+        lines = path.read_text(encoding="utf-8").split("\n")
+        expected = clean_standard_css(clean_wrapper_css(lines, reference), reference)
+        actual = clean_standard_css(clean_wrapper_css(lines, classifier), classifier)
+        assert actual == expected, path.name
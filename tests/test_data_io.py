@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from src.annotation_utils.data_io import pandas_from_path, save_pandas_to_path
+from src.preprocessing import SectionStore
+from src.preprocessing.markdown_handling import get_section_df
+from src.preprocessing.section_store import build_section_store
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "UID": ["a", "b", "c"],
+            "tokens": [["one", "two"], [], ["three"]],
+            "length": [2, 0, 1],
+        }
+    )
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_list_columns_round_trip(tmp_path, suffix):
+    path = tmp_path / f"data{suffix}"
+    save_pandas_to_path(_frame(), path)
+
+    data = pandas_from_path(path)
+
+    assert data["tokens"].tolist() == [["one", "two"], [], ["three"]]
+    assert all(isinstance(v, list) for v in data["tokens"])
+
+
+def test_filters_on_columns_not_read(tmp_path):
+    path = tmp_path / "data.parquet"
+    save_pandas_to_path(_frame(), path)
+
+    data = pandas_from_path(path, columns=["UID"], filters=[("length", ">", 0)])
+
+    assert data.columns.tolist() == ["UID"]
+    assert data["UID"].tolist() == ["a", "c"]
+
+
+def test_section_store_restores_lists(tmp_path):
+    store = SectionStore(tmp_path / "store")
+    store.write(_frame(), 0)
+    store.write(_frame(), 1)
+
+    data = store.read()
+
+    assert len(data) == 6
+    assert all(isinstance(v, list) for v in data["tokens"])
+
+
+def test_section_store_keeps_documents_in_one_part(tmp_path):
+    text_path = tmp_path / "texts"
+    text_path.mkdir()
+    for uid in [1, 2, 3]:
+        (text_path / f"{uid}.txt").write_text(f"# Doc {uid}\n\nText\n\n## Sub\n\nMore")
+    # Several rows per document, which split documents when chunking by row
+    df = pd.DataFrame({"UID": [1, 2, 2, 3, 3], "link": ["a", "b", "b2", "c", "c2"]})
+
+    store = build_section_store(df, text_path, tmp_path / "store", chunk_size=2)
+
+    chunks = list(store.iter_chunks())
+    assert [sorted(chunk["UID"].unique()) for chunk in chunks] == [[1, 2], [3]]
+    # The same rows as parsing all documents at once
+    expected = get_section_df(df, text_path)
+    pd.testing.assert_frame_equal(
+        store.read().reset_index(drop=True),
+        expected.reset_index(drop=True),
+    )
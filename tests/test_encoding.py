@@ -0,0 +1,37 @@
+from src.preprocessing.text_cleaning.encoding import repair_encoding
+from src.preprocessing.text_cleaning.mappers import ENCODING_MAPPER
+
+
+# The sequential replacement which repair_encoding replaced
+def reference_repair_encoding(text: str) -> str:
+    for k, v in ENCODING_MAPPER.items():
+        text = text.replace(k, v)
+    return text
+
+
+def test_longest_sequence_wins():
+    # "â€" is itself a sequence (”), replacing it first left "”¢"
+    assert reference_repair_encoding("â€¢") == "”¢"
+
+    assert repair_encoding("â€¢") == ("•", 1)
+
+
+def test_repair_count():
+    text = "â€œQuotedâ€ â€” itâ€™s â€¢ fine â€¦"
+
+    repaired, n = repair_encoding(text)
+
+    assert repaired == "“Quoted” — it’s • fine …"
+    assert n == 6
+
+
+def test_clean_text_is_unchanged():
+    text = "Plain text, “already” fine — no repairs • here…"
+
+    assert repair_encoding(text) == (text, 0)
+    assert repair_encoding("") == ("", 0)
+
+
+def test_each_sequence_is_repaired():
+    for k, v in ENCODING_MAPPER.items():
+        assert repair_encoding(f"a {k} b") == (f"a {v} b", 1)
@@ -0,0 +1,82 @@
+from typing import Dict, Optional
+
+import pytest
+from bs4 import BeautifulSoup
+
+from src.preprocessing.text_cleaning.markup_style_cleaning import strip_tags
+from src.preprocessing.text_cleaning.noise import NOISY_HTML
+from src.scraping_utils.html_extraction import (
+    extract_textarea_text,
+    find_first_tag_attr,
+)
+
+from conftest import FIXTURES
+
+PAGES = sorted((FIXTURES / "html").glob("*.html"))
+GMBINDER_BUTTON = {"class": "btn btn-default", "title": "View Source"}
+HOMEBREWERY_BUTTON = {"class": "navItem teal", "icon": "fas fa-code"}
+
+
+def _read(path) -> str:
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _soup_attr(html: str, tag: str, attrs: Dict[str, str], attr: str) -> Optional[str]:
+    # The BeautifulSoup path of _grab_src_url
+    found = BeautifulSoup(html, "html5lib").find(tag, attrs)
+    return None if found is None else found.get(attr)
+
+
+def _soup_textarea(html: str) -> Optional[str]:
+    # The BeautifulSoup path of _collect_text
+    soup = BeautifulSoup(html, "html5lib")
+    for tag in NOISY_HTML:
+        strip_tags(soup, tag)
+    txt_area = soup.find("textarea")
+    return None if txt_area is None else txt_area.text
+
+
+def test_fixtures_exist():
+    assert len(PAGES) >= 6
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda p: p.stem)
+@pytest.mark.parametrize("attrs", [GMBINDER_BUTTON, HOMEBREWERY_BUTTON])
+def test_find_first_tag_attr_matches_soup(page, attrs):
+    html = _read(page)
+
+    assert find_first_tag_attr(html, "a", attrs, "href") == _soup_attr(
+        html, "a", attrs, "href"
+    )
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda p: p.stem)
+def test_extract_textarea_text_matches_soup(page):
+    html = _read(page)
+
+    fast = extract_textarea_text(html, noisy_tags=NOISY_HTML)
+
+    # None defers to the BeautifulSoup path, any text must be what it finds
+    if fast is not None:
+        assert fast == _soup_textarea(html)
+
+
+def test_expected_matches():
+    html = _read(FIXTURES / "html" / "gmbinder_view.html")
+    assert find_first_tag_attr(html, "a", GMBINDER_BUTTON, "href") == (
+        "https://www.gmbinder.com/share/-abc123/source?x=1&y=2"
+    )
+
+    html = _read(FIXTURES / "html" / "homebrewery_share.html")
+    assert find_first_tag_attr(html, "a", HOMEBREWERY_BUTTON, "href") == (
+        "/source/abc123"
+    )
+
+    html = _read(FIXTURES / "html" / "gmbinder_source.html")
+    text = extract_textarea_text(html, noisy_tags=NOISY_HTML)
+    assert text.startswith("# Chapter 0\n\n")
+    assert "<b>bold</b>" in text and "\r" not in text
+
+    html = _read(FIXTURES / "html" / "gmbinder_source_in_noise.html")
+    assert extract_textarea_text(html, noisy_tags=NOISY_HTML) is None
@@ -0,0 +1,182 @@
+import re
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import pytest
+
+from src.preprocessing.text_cleaning.markup_style_cleaning import (
+    MD_PARSER,
+    clean_links_images,
+)
+from src.preprocessing.text_cleaning.noise import URL_PATTERN
+
+from conftest import FIXTURES
+
+# The parser-based clean_links_images which the single scan replaced, kept as the
+# reference its output is checked against
+Image = namedtuple("Image", "label src title")
+Link = namedtuple("Link", "label href title")
+
+
+def find_links_images(text: str) -> Tuple[List[Link], List[Image]]:
+    """
+    Find all markdown links and images in a text, as the links() and images()
+    methods of NLTK's CategorizedMarkdownCorpusReader do.
+    """
+    links: List[Link] = []
+    images: List[Image] = []
+
+    for inline_token in MD_PARSER.parse(text):
+        if inline_token.type != "inline":
+            continue
+        children = inline_token.children
+        for i, child_token in enumerate(children):
+            if child_token.type == "link_open":
+                # Only the first child of the link is taken as the label (as NLTK)
+                links.append(
+                    Link(
+                        children[i + 1].content,
+                        child_token.attrGet("href"),
+                        child_token.attrGet("title"),
+                    )
+                )
+            elif child_token.type == "image":
+                images.append(
+                    Image(
+                        child_token.content,
+                        child_token.attrGet("src"),
+                        child_token.attrGet("title"),
+                    )
+                )
+
+    return (links, images)
+
+
+QUOTE1 = r"(" + re.escape('"') + r")"
+QUOTE2 = r"(" + re.escape("'") + r")"
+QUOTE = f"({QUOTE1}|{QUOTE2})"
+
+
+def link_repl(match: re.Match) -> str:
+    match_str: str = match.group(0)
+    match_str = match_str.split("](")[0]
+    match_str = match_str.lstrip("[")
+    return match_str
+
+
+def link_pattern_repl(link: Link) -> Tuple[str, Callable]:
+    label = re.escape(link.label)
+    label = r"( ?\*.*\* ?)?" + label + r"( ?\*.*\* ?)?"
+    href = re.escape(link.href)
+    if link.title:
+        title = re.escape(link.title)
+        pattern = rf"\[{label}\]\({href}\s*{QUOTE}{title}{QUOTE}\)"
+    else:
+        pattern = rf"\[{label}\]\({href}\)"
+    return (pattern, link_repl)
+
+
+def image_pattern_repl(image: Image) -> Tuple[str, str]:
+    label = re.escape(image.label)
+    label = r"( ?\*.*\* ?)?" + label + r"( ?\*.*\* ?)?"
+    src = re.escape(image.src)
+    if image.title:
+        title = re.escape(image.title)
+        pattern = rf"!\[{label}\]\({src}\s*{QUOTE}{title}{QUOTE}\)"
+    else:
+        pattern = rf"!\[{label}\]\({src}\)"
+    return (pattern, "")
+
+
+def reference_clean_links_images(text: str) -> str:
+    links, images = find_links_images(text)
+    lines = text.split("\n")
+
+    for img in images:
+        img_pat, img_repl = image_pattern_repl(img)
+        text = re.sub(pattern=img_pat, repl=img_repl, string=text)
+
+    for link in links:
+        link_pat, link_repl_ = link_pattern_repl(link)
+        text = re.sub(pattern=link_pat, repl=link_repl_, string=text)
+
+    text = re.sub(pattern=URL_PATTERN, repl="", string=text, flags=re.IGNORECASE)
+
+    clean_lines = []
+    for edited, original in zip(text.split("\n"), lines):
+        if original:
+            pct_link = 1 - (len(edited) / len(original))
+            if (pct_link >= 0.4) and ("#" not in original):
+                pass
+            else:
+                clean_lines.append(edited)
+        else:
+            clean_lines.append(edited)
+
+    return "\n".join(clean_lines)
+
+
+PAGES = sorted((FIXTURES / "texts").glob("*.md")) + sorted(
+    (FIXTURES / "links").glob("*.md")
+)
+
+
+def _read(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("path", PAGES, ids=lambda p: p.stem)
+def test_matches_reference(path):
+    text = _read(path)
+
+    assert clean_links_images(text) == reference_clean_links_images(text)
+
+
+def _lines() -> List[str]:
+    return [line for path in PAGES for line in _read(path).split("\n")]
+
+
+def test_lines_match_reference():
+    # Each line on its own, so that a difference points at the line causing it
+    mismatches = [
+        (line, clean_links_images(line), reference_clean_links_images(line))
+        for line in _lines()
+        if clean_links_images(line) != reference_clean_links_images(line)
+    ]
+
+    assert mismatches == []
+
+
+# Intentional differences from the reference (see clean_links_images)
+def test_text_between_emphasised_links_is_kept():
+    text = (
+        "See [*one*](http://a.com/x) and then [*two*](http://a.com/x), both of which"
+        " are worth a read before the next session"
+    )
+
+    assert clean_links_images(text) == (
+        "See *one* and then *two*, both of which are worth a read before the next"
+        " session"
+    )
+    # The reference removed everything from the first label to the last link (and
+    # then the line, as it had shrunk too much)
+    assert reference_clean_links_images(text) == ""
+
+
+def test_links_in_code_blocks_are_not_rewritten():
+    text = (
+        "Go to [home](http://a.com/x) now, please\n"
+        "\n"
+        "```\n"
+        "[home](http://a.com/x)\n"
+        "```\n"
+        "\n"
+        "    [home](http://a.com/x)\n"
+    )
+
+    assert clean_links_images(text, max_pct_links=1) == (
+        "Go to home now, please\n\n```\n[home]()\n```\n\n    [home]()\n"
+    )
+    # The reference rewrote them as well, as the same link appears outside the code
+    assert "[home]" not in reference_clean_links_images(text)
@@ -0,0 +1,48 @@
+import os
+
+from src.preprocessing.text_cleaning.manifest import CleaningManifest
+
+
+def _write_raw(raw_path, texts):
+    raw_path.mkdir(exist_ok=True)
+    for uid, text in texts.items():
+        (raw_path / f"{uid}.txt").write_text(text)
+
+
+def _clean(manifest, raw_path, uids, version):
+    stale, pending = manifest.find_stale(raw_path, uids, set(uids), version)
+    for uid in stale:
+        manifest.record(pending[uid])
+    return stale
+
+
+def test_find_stale(tmp_path):
+    raw_path = tmp_path / "raw"
+    _write_raw(raw_path, {1: "one", 2: "two", 3: "three"})
+    manifest = CleaningManifest(tmp_path / "manifest.csv")
+
+    # Everything is stale without a manifest
+    assert _clean(manifest, raw_path, [1, 2, 3], "v1") == [1, 2, 3]
+    manifest.save()
+    manifest = CleaningManifest(tmp_path / "manifest.csv")
+    assert _clean(manifest, raw_path, [1, 2, 3], "v1") == []
+
+    # A changed raw text, and an unchanged but touched one
+    _write_raw(raw_path, {2: "TWO"})
+    stat = os.stat(raw_path / "3.txt")
+    os.utime(raw_path / "3.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert _clean(manifest, raw_path, [1, 2, 3], "v1") == [2]
+
+    # Missing clean texts
+    stale, _ = manifest.find_stale(raw_path, [1, 2, 3], {1, 2}, "v1")
+    assert stale == [3]
+
+
+def test_cleaner_version_change_makes_all_stale(tmp_path):
+    raw_path = tmp_path / "raw"
+    _write_raw(raw_path, {1: "one", 2: "two"})
+    manifest = CleaningManifest(tmp_path / "manifest.csv")
+    _clean(manifest, raw_path, [1, 2], "v1")
+
+    assert _clean(manifest, raw_path, [1, 2], "v2") == [1, 2]
+    assert _clean(manifest, raw_path, [1, 2], "v2") == []
@@ -0,0 +1,213 @@
+import random
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import nltk.data
+import pandas as pd
+import pytest
+from nltk.corpus.reader.markdown import CategorizedMarkdownCorpusReader
+
+from src.preprocessing.markdown_handling import (
+    _get_section_df,
+    parse_sections,
+    read_sections,
+    sections_df_to_docs,
+)
+from src.preprocessing.text_cleaning.credit_identification_helpers import (
+    check_if_credit,
+)
+
+from conftest import FIXTURES
+
+
+# The per-UID loop which sections_df_to_docs replaced, kept as the reference its
+# output is checked against. Its second append of clean_text to each UID's values,
+# which made building the result frame fail, is removed.
+def reference_sections_df_to_docs(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.sort_values(["UID", "section_number"])
+    uids = df["UID"].unique()
+
+    section_cols = [
+        "UID",
+        "is_credit",
+        "section_text",
+        "section_number",
+        "header_level",
+    ]
+    token_cols = [c for c in df.columns if "tokens" in c]
+    standard_cols = token_cols + section_cols
+    _other_cols = [c for c in df.columns if c not in standard_cols]
+    other_cols = []
+    for c in _other_cols:
+        unique_combos = df[~df.duplicated(["UID", c], keep="first")]
+        if len(unique_combos) == len(uids):
+            other_cols.append(c)
+
+    values: Dict[str, list] = defaultdict(list)
+    for uid in uids:
+        section_df = df[df["UID"] == uid]
+        is_credit = section_df["is_credit"]
+        main_text = "\n\n".join(section_df[~is_credit]["section_text"])
+        full_text = "\n\n".join(section_df["section_text"])
+        credit_text = "\n\n".join(section_df[is_credit]["section_text"])
+
+        values["UID"].append(uid)
+        values["clean_text"].append(main_text)
+        values["full_text"].append(full_text)
+        values["num_sections"].append(len(section_df))
+        values["credit_text"].append(credit_text)
+        values["num_credit_sections"].append(is_credit.sum())
+
+        for col in token_cols:
+            clean_tokens = section_df.loc[~is_credit, col].explode().to_list()
+            credit_tokens = section_df.loc[is_credit, col].explode().to_list()
+            values[f"clean_{col}"].append(clean_tokens)
+            values[f"credit_{col}"].append(credit_tokens)
+
+        for col in other_cols:
+            values[col].append(section_df[col].values[0])
+
+    _df = pd.DataFrame(values)
+    for col in other_cols:
+        _df[col] = _df[col].astype(df[col].dtype)
+    return _df
+
+
+WORDS = ["goblin", "fire", "ball", "spell", "credit", "art", "by", "the", "of"]
+
+
+def synthetic_sections_df(n_docs: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A section frame as get_section_df() returns, with token lists (some empty), a
+    column with one value per document and one varying within documents. Rows are
+    shuffled, so sorting them is part of the work.
+    """
+    rng = random.Random(seed)
+    rows: Dict[str, List] = defaultdict(list)
+    for uid in rng.sample(range(10 * n_docs), k=n_docs):
+        subreddit = rng.choice(["UnearthedArcana", "DnDHomebrew", "homebrew"])
+        for i in range(rng.randint(1, 29)):
+            tokens = rng.choices(WORDS, k=rng.randint(0, 12))
+            rows["UID"].append(uid)
+            rows["header_level"].append(rng.randint(1, 3))
+            rows["section_number"].append(i)
+            rows["section_heading"].append(f"Section {i}")
+            rows["section_text"].append(" ".join(tokens))
+            rows["is_credit"].append(rng.random() < 0.2)
+            rows["word_tokens"].append(tokens)
+            rows["subreddit"].append(subreddit)
+            rows["score"].append(rng.randint(0, 3))
+
+    df = pd.DataFrame(rows)
+    df["section_number"] = df["section_number"].astype("Int16")
+    df["header_level"] = df["header_level"].astype("Int8")
+    df["is_credit"] = df["is_credit"].astype("boolean")
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_sections_df_to_docs_matches_reference(seed):
+    df = synthetic_sections_df(50, seed=seed)
+
+    docs = sections_df_to_docs(df)
+
+    pd.testing.assert_frame_equal(docs, reference_sections_df_to_docs(df))
+    assert "subreddit" in docs.columns
+    assert "score" not in docs.columns
+
+
+EXTRA_TEXTS = {
+    "intro_before_heading": "Some intro text.\n\nMore intro.\n\n# First\n\nBody\n",
+    "bom": "\ufeff# Heading\n\nText after a byte order mark.\n\n## Sub\n\nMore.",
+    "bom_intro": "\ufeffIntro, no heading yet.\n\n# Heading\n\nText.",
+    "no_headings": "Just a paragraph.\n\nAnd another.",
+    "empty": "",
+    "crlf": "# Heading\r\n\r\nText\r\n\r\n### Deep\r\n\r\nDeeper text",
+}
+
+
+def corpus_texts() -> List[str]:
+    paths = sorted((FIXTURES / "texts").glob("*.md"))
+    texts = [path.read_text(encoding="utf-8") for path in paths]
+    return texts + list(EXTRA_TEXTS.values())
+
+
+@pytest.fixture
+def corpus_dir(tmp_path, monkeypatch) -> Path:
+    # The texts as {uid}.txt, in a directory NLTK is allowed to read from
+    for uid, text in enumerate(corpus_texts()):
+        with open(tmp_path / f"{uid}.txt", "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+    monkeypatch.setattr(nltk.data, "path", nltk.data.path + [str(tmp_path)])
+    return tmp_path
+
+
+def nltk_reader(corpus_dir: Path) -> CategorizedMarkdownCorpusReader:
+    return CategorizedMarkdownCorpusReader(str(corpus_dir), r"[0-9]+\.txt")
+
+
+def as_tuples(sections) -> list:
+    return [(s.heading, s.level, s.content) for s in sections]
+
+
+# The reader based _get_section_df which parsing in place replaced, kept as the
+# reference its output is checked against
+def reference_get_section_df(
+    reader: CategorizedMarkdownCorpusReader, uids: Sequence[int]
+) -> pd.DataFrame:
+    values: Dict[str, list] = defaultdict(list)
+
+    for uid in uids:
+        sections = reader.sections(f"{uid}.txt")
+        for i, section in enumerate(sections):
+            values["UID"].append(uid)
+            values["header_level"].append(section.level)
+            values["section_number"].append(i)
+            values["section_heading"].append(section.heading)
+            values["section_text"].append(section.content)
+            values["is_credit"].append(check_if_credit(section))
+
+    df = pd.DataFrame(values)
+    df["section_number"] = df["section_number"].astype("Int16")
+    df["header_level"] = df["header_level"].astype("Int8")
+    df["is_credit"] = df["is_credit"].astype("boolean")
+
+    df = df[df["section_text"] != ""]
+
+    return df
+
+
+def test_sections_match_nltk(corpus_dir):
+    reader = nltk_reader(corpus_dir)
+
+    for uid, text in enumerate(corpus_texts()):
+        expected = as_tuples(reader.sections(f"{uid}.txt"))
+        assert as_tuples(read_sections(corpus_dir / f"{uid}.txt")) == expected
+        if not text.startswith("\ufeff"):
+            assert as_tuples(parse_sections(text)) == expected
+
+
+def test_text_before_first_heading_is_dropped():
+    sections = parse_sections(EXTRA_TEXTS["intro_before_heading"])
+
+    assert as_tuples(sections) == [("First", 1, "First\n\nBody")]
+
+
+@pytest.mark.parametrize("workers,chunk_size", [(1, 500), (1, 3), (2, 3), (3, 1)])
+def test_get_section_df_matches_nltk(corpus_dir, workers, chunk_size):
+    uids = list(range(len(corpus_texts())))
+    expected = reference_get_section_df(nltk_reader(corpus_dir), uids)
+
+    from_files = _get_section_df(
+        uids, text_path=corpus_dir, workers=workers, chunk_size=chunk_size
+    )
+    from_texts = _get_section_df(
+        uids,
+        texts=[(corpus_dir / f"{uid}.txt").read_text("utf-8-sig") for uid in uids],
+        workers=workers,
+        chunk_size=chunk_size,
+    )
+
+    pd.testing.assert_frame_equal(from_files, expected)
+    pd.testing.assert_frame_equal(from_texts, expected)
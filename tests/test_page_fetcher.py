@@ -0,0 +1,154 @@
+import time
+from email.utils import formatdate
+
+import pandas as pd
+import pytest
+
+from src.scraping import get_source_texts
+from src.scraping_utils import (
+    DomainRateLimiter,
+    PageFetcher,
+    ResponseCache,
+    ThrottledError,
+)
+
+
+def test_get_ok(stub_server):
+    stub_server.routes["/ok"] = lambda headers: (200, {}, b"hello")
+    fetcher = PageFetcher()
+
+    response = fetcher.get(stub_server.url("/ok"))
+
+    assert response.status_code == 200
+    assert response.text == "hello"
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_throttling_raises_with_retry_after_seconds(stub_server, status):
+    stub_server.routes["/busy"] = lambda headers: (status, {"Retry-After": "2"}, b"")
+    fetcher = PageFetcher()
+
+    with pytest.raises(ThrottledError) as info:
+        fetcher.get(stub_server.url("/busy"))
+
+    assert info.value.retry_after == 2.0
+    assert info.value.response.status_code == status
+
+
+def test_throttling_retry_after_http_date(stub_server):
+    retry_at = formatdate(time.time() + 30, usegmt=True)
+    stub_server.routes["/busy"] = lambda headers: (503, {"Retry-After": retry_at}, b"")
+    fetcher = PageFetcher()
+
+    with pytest.raises(ThrottledError) as info:
+        fetcher.get(stub_server.url("/busy"))
+
+    assert 25 <= info.value.retry_after <= 30
+
+
+def test_throttling_defers_domain(stub_server):
+    stub_server.routes["/busy"] = lambda headers: (429, {"Retry-After": "0.5"}, b"")
+    stub_server.routes["/ok"] = lambda headers: (200, {}, b"ok")
+    fetcher = PageFetcher(rate_limiter=DomainRateLimiter(default_rate_limit=0))
+
+    with pytest.raises(ThrottledError):
+        fetcher.get(stub_server.url("/busy"))
+    start = time.monotonic()
+    fetcher.get(stub_server.url("/ok"))
+
+    assert time.monotonic() - start >= 0.4
+
+
+def test_rate_limit_spaces_requests(stub_server):
+    stub_server.routes["/ok"] = lambda headers: (200, {}, b"ok")
+    fetcher = PageFetcher(rate_limiter=DomainRateLimiter(default_rate_limit=0.2))
+
+    start = time.monotonic()
+    for _ in range(3):
+        fetcher.get(stub_server.url("/ok"))
+
+    assert time.monotonic() - start >= 0.4
+
+
+def test_fresh_cache_hit_skips_network(stub_server, tmp_path):
+    stub_server.routes["/page"] = lambda headers: (200, {}, b"cached")
+    fetcher = PageFetcher(cache=ResponseCache(tmp_path))
+
+    first = fetcher.get(stub_server.url("/page"))
+    second = fetcher.get(stub_server.url("/page"))
+
+    assert first.text == second.text == "cached"
+    assert stub_server.paths() == ["/page"]
+
+
+def test_stale_entry_revalidated_with_304(stub_server, tmp_path):
+    def page(headers):
+        if headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, b"version one"
+
+    stub_server.routes["/page"] = page
+    fetcher = PageFetcher(cache=ResponseCache(tmp_path, ttl=0))
+
+    first = fetcher.get(stub_server.url("/page"))
+    second = fetcher.get(stub_server.url("/page"))
+
+    assert first.text == second.text == "version one"
+    assert second.status_code == 200
+    assert stub_server.paths() == ["/page", "/page"]
+    assert "If-None-Match" not in stub_server.requests[0][1]
+    assert stub_server.requests[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_stale_entry_replaced_when_modified(stub_server, tmp_path):
+    versions = iter([b"version one", b"version two"])
+    stub_server.routes["/page"] = lambda headers: (
+        200,
+        {"Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+        next(versions),
+    )
+    fetcher = PageFetcher(cache=ResponseCache(tmp_path, ttl=0))
+
+    fetcher.get(stub_server.url("/page"))
+    second = fetcher.get(stub_server.url("/page"))
+
+    assert second.text == "version two"
+    assert stub_server.requests[1][1]["If-Modified-Since"] == (
+        "Mon, 01 Jan 2024 00:00:00 GMT"
+    )
+
+
+def _serve_sources(stub_server, n: int):
+    # Homebrewery source pages and GMBinder pages whose source button leads to a
+    # textarea, addressed by path so the URL rules recognise the sites
+    links = []
+    for i in range(n):
+        body = f"<html><body>Homebrew text {i}</body></html>".encode()
+        path = f"/homebrewery.naturalcrit.com/source/{i}"
+        stub_server.routes[path] = lambda headers, body=body: (200, {}, body)
+        links.append(stub_server.url(path))
+
+        src_path = f"/gmbinder.com/source/{i}"
+        view_path = f"/gmbinder.com/share/{i}"
+        button = (
+            f'<a class="btn btn-default" title="View Source" '
+            f'href="{stub_server.url(src_path)}">Source</a>'
+        ).encode()
+        textarea = f"<textarea># GMBinder text {i}</textarea>".encode()
+        stub_server.routes[view_path] = lambda headers, b=button: (200, {}, b)
+        stub_server.routes[src_path] = lambda headers, b=textarea: (200, {}, b)
+        links.append(stub_server.url(view_path))
+    return links
+
+
+def test_get_source_texts_concurrent_matches_serial(stub_server):
+    links = _serve_sources(stub_server, 5)
+    df = pd.DataFrame({"link": links + links[:3]})
+
+    serial = get_source_texts(df, rate_limit=0, domain_rate_limits={})
+    concurrent = get_source_texts(df, rate_limit=0, domain_rate_limits={}, workers=4)
+
+    pd.testing.assert_frame_equal(serial, concurrent)
+    assert serial["Text"].iloc[0] == "Homebrew text 0"
+    assert serial["Text"].iloc[1] == "# GMBinder text 0"
+    assert serial["src_url"].iloc[1] == stub_server.url("/gmbinder.com/source/0")
@@ -0,0 +1,248 @@
+import importlib
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.preprocessing.text_cleaning import pipeline as pipeline_module
+from src.preprocessing.text_cleaning.pipeline import (
+    CleaningPipeline,
+    CleaningStage,
+    _SourceTokens,
+    default_pipeline,
+    source_hash,
+)
+
+from conftest import ROOT
+
+STAGE_MODULE = """
+import re
+
+from .helpers import shout
+
+PATTERN = re.compile({pattern!r})
+
+
+def stage(text):
+    return shout(PATTERN.sub("-", text))
+"""
+
+HELPERS_MODULE = """
+def shout(text):
+    {docstring}
+    return text{suffix}
+
+
+def unrelated(text):
+    return text{unrelated}
+"""
+
+
+# Names of the packages written by write_stage() are unique across tests, as imported
+# modules stay in sys.modules
+PACKAGE_NUMBERS = itertools.count()
+
+
+@pytest.fixture
+def write_stage(tmp_path, monkeypatch):
+    # Writes (and imports) a package with a stage function and a helper it uses
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+
+    def write(
+        pattern="a",
+        suffix=".upper()",
+        unrelated="",
+        docstring='"""Shout."""',
+        rewrite=None,
+    ):
+        # A new package each time, so that no stale module is imported, unless the
+        # package of the stage to rewrite is given, which is then reloaded
+        if rewrite is None:
+            name = f"stagepkg{next(PACKAGE_NUMBERS)}"
+        else:
+            name = rewrite.__module__.split(".")[0]
+        package = tmp_path / name
+        package.mkdir(exist_ok=True)
+        (package / "__init__.py").write_text("")
+        (package / "stage.py").write_text(STAGE_MODULE.format(pattern=pattern))
+        (package / "helpers.py").write_text(
+            HELPERS_MODULE.format(
+                suffix=suffix, unrelated=unrelated, docstring=docstring
+            )
+        )
+        importlib.invalidate_caches()
+        if rewrite is None:
+            return importlib.import_module(f"{name}.stage").stage
+        importlib.reload(sys.modules[f"{name}.helpers"])
+        return importlib.reload(sys.modules[f"{name}.stage"]).stage
+
+    return write
+
+
+def _normalised_hash(stage) -> str:
+    # What source_hash() hashes, with the (unique) name of the stage's package
+    # replaced, so that stages written by write_stage() can be compared
+    name = stage.__module__.split(".")[0]
+    tokens = _SourceTokens({name, "src"})
+    data = json.dumps([tokens.token(stage), tokens.sources], sort_keys=True)
+    return data.replace(name, "stagepkg")
+
+
+def test_source_hash_follows_code_and_constants(write_stage):
+    base = write_stage()
+
+    assert base("banana") == "B-N-N-"
+    assert source_hash(base) == source_hash(base)
+    assert _normalised_hash(write_stage()) == _normalised_hash(base)
+    # The stage's constant, and the code of a helper it calls
+    assert _normalised_hash(write_stage(pattern="n")) != _normalised_hash(base)
+    assert _normalised_hash(write_stage(suffix=".lower()")) != _normalised_hash(base)
+
+
+def test_source_hash_ignores_unused_code(write_stage):
+    base = write_stage()
+
+    assert _normalised_hash(write_stage(unrelated=".strip()")) == _normalised_hash(
+        base
+    )
+
+
+def test_source_hash_ignores_docstrings_and_comments(write_stage):
+    base = write_stage()
+    documented = write_stage(
+        docstring='"""\n    Shout the text, loudly.\n    """  # A comment\n    # More',
+    )
+
+    assert _normalised_hash(documented) == _normalised_hash(base)
+    # A string which is not a docstring is code
+    assert _normalised_hash(
+        write_stage(docstring='"""Shout."""\n    "not a docstring"')
+    ) != _normalised_hash(base)
+
+
+def test_stage_keys_change_with_code(tmp_path, write_stage):
+    stage = write_stage()
+    pipeline = CleaningPipeline([CleaningStage("stage", stage)], cache_dir=tmp_path)
+    changed = CleaningPipeline(
+        [CleaningStage("stage", write_stage(suffix=".lower()"))], cache_dir=tmp_path
+    )
+
+    assert pipeline.keys("text") != changed.keys("text")
+
+
+def test_default_config_hash_is_deterministic():
+    # Independent of hash randomisation, so that every process agrees on the keys
+    script = (
+        "from src.preprocessing.text_cleaning.pipeline import default_pipeline;"
+        "print(default_pipeline().config_hash())"
+    )
+    hashes = set()
+    for seed in ["1", "2"]:
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=str(ROOT))
+        out = subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        hashes.add(out.stdout.strip())
+
+    assert hashes == {default_pipeline().config_hash()}
+
+
+def _counting_pipeline(cache_dir, calls):
+    def upper(text):
+        calls.append("upper")
+        return text.upper()
+
+    def count(text):
+        calls.append("count")
+        return text + "!", {"length": len(text)}
+
+    return CleaningPipeline(
+        [CleaningStage("upper", upper), CleaningStage("count", count)],
+        cache_dir=cache_dir,
+    )
+
+
+def test_run_resumes_from_cache(tmp_path):
+    calls = []
+    pipeline = _counting_pipeline(tmp_path, calls)
+
+    first = pipeline.run("text")
+    second = pipeline.run("text")
+
+    assert first == second == ("TEXT!", {"length": 4})
+    assert calls == ["upper", "count"]
+
+
+def test_concurrent_stores_do_not_collide(tmp_path):
+    pipeline = _counting_pipeline(tmp_path, [])
+    stage = pipeline.stages[0]
+    errors = []
+
+    def store(i):
+        try:
+            pipeline._store(stage, "k" * 64, f"text {i}", {})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert pipeline._load(stage, "k" * 64)["text"].startswith("text ")
+    assert list(tmp_path.rglob("*.tmp")) == []
+
+
+def test_prune_cache(tmp_path):
+    pipeline = _counting_pipeline(tmp_path, [])
+    stage = pipeline.stages[0]
+    now = time.time()
+    for i in range(5):
+        pipeline._store(stage, f"{i:064d}", f"text {i}", {})
+        # Entry i was last used i hours ago
+        os.utime(pipeline._cache_path(stage, f"{i:064d}"), (now, now - 3600 * i))
+
+    def remaining():
+        return sorted(path.stem[-1] for path in tmp_path.rglob("*.json"))
+
+    assert pipeline.prune_cache() == 0
+    assert pipeline.prune_cache(max_age=2.5 * 3600) == 2
+    assert remaining() == ["0", "1", "2"]
+
+    # Reading an entry makes it the most recently used
+    pipeline._load(stage, f"{2:064d}")
+    assert pipeline.prune_cache(max_entries=1) == 2
+    assert remaining() == ["2"]
+    assert CleaningPipeline([stage]).prune_cache(max_entries=0) == 0
+
+
+def test_config_hash_changes_with_code_and_cleaner_version(write_stage, monkeypatch):
+    def config_hash(stage):
+        return CleaningPipeline([CleaningStage("stage", stage)]).config_hash()
+
+    stage = write_stage()
+    base = config_hash(stage)
+    assert config_hash(write_stage(rewrite=stage)) == base
+
+    # The same stage calling a helper whose code changed
+    changed = write_stage(suffix=".lower()", rewrite=stage)
+    assert changed("banana") == "b-n-n-"
+    assert config_hash(changed) != base
+
+    stage = write_stage(rewrite=stage)
+    assert config_hash(stage) == base
+    monkeypatch.setattr(pipeline_module, "CLEANER_VERSION", 2)
+    assert config_hash(stage) != base
@@ -0,0 +1,51 @@
+import threading
+
+import requests
+
+from src.scraping_utils import ResponseCache
+
+
+def _response(url: str, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    return response
+
+
+def test_concurrent_stores_of_one_url(tmp_path):
+    cache = ResponseCache(tmp_path)
+    url = "https://gmbinder.com/share/-abc"
+    bodies = [f"body {i}".encode() * 1000 for i in range(16)]
+    errors = []
+    barrier = threading.Barrier(len(bodies))
+
+    def store(body: bytes):
+        try:
+            barrier.wait()
+            cache.store(url, _response(url, body))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(body,)) for body in bodies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    entry = cache.lookup(url)
+    assert cache.to_response(entry).content in bodies
+    # No temporary files are left behind
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_store_lookup_round_trip(tmp_path):
+    cache = ResponseCache(tmp_path)
+    url = "https://homebrewery.naturalcrit.com/source/abc"
+    cache.store(url, _response(url, b"text"))
+
+    entry = cache.lookup("https://www.homebrewery.naturalcrit.com/source/abc")
+
+    assert entry is not None
+    assert cache.to_response(entry).content == b"text"
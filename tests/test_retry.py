@@ -0,0 +1,182 @@
+import time
+from collections import Counter
+
+import pandas as pd
+from requests.exceptions import ConnectionError
+
+from src.scraping import get_source_texts
+from src.scraping_utils.retry import CircuitBreaker, RetryScheduler
+
+
+def _run(task, max_attempts=5, is_final=None):
+    results = {}
+    scheduler = RetryScheduler(max_attempts=max_attempts, base_delay=0.01)
+    attempts = scheduler.run(
+        ["https://a.com/1"],
+        task=task,
+        is_success=lambda result: result != "",
+        on_result=lambda url, result, n: results.__setitem__(url, result),
+        is_final=is_final,
+    )
+    return results, attempts
+
+
+def test_unsuccessful_results_are_retried():
+    results, attempts = _run(lambda url: "")
+
+    assert attempts == {"https://a.com/1": 5}
+    assert results == {"https://a.com/1": ""}
+
+
+def test_request_errors_are_retried_until_success():
+    calls = []
+
+    def task(url):
+        calls.append(url)
+        if len(calls) < 3:
+            raise ConnectionError("down")
+        return "text"
+
+    results, attempts = _run(task, is_final=lambda result: True)
+
+    assert attempts == {"https://a.com/1": 3}
+    assert results == {"https://a.com/1": "text"}
+
+
+def test_final_results_are_not_retried():
+    results, attempts = _run(lambda url: "", is_final=lambda result: result == "")
+
+    assert attempts == {"https://a.com/1": 1}
+    assert results == {"https://a.com/1": ""}
+
+
+def test_links_without_source_url_are_not_retried(stub_server):
+    # A Homebrewery page without a source button
+    stub_server.routes["/homebrewery.naturalcrit.com/abc"] = lambda headers: (
+        200,
+        {},
+        b"<html><body>No button</body></html>",
+    )
+    links = [
+        stub_server.url("/homebrewery.naturalcrit.com/abc"),
+        stub_server.url("/unsupported.site/abc"),
+    ]
+
+    start = time.monotonic()
+    df = get_source_texts(
+        pd.DataFrame({"link": links}),
+        rate_limit=0,
+        domain_rate_limits={},
+        pass_attempts=5,
+    )
+
+    assert time.monotonic() - start < 1
+    assert df["src_url"].tolist() == ["", ""]
+    assert df["Text"].tolist() == ["", ""]
+    # The unsupported link is never requested
+    assert stub_server.paths() == ["/homebrewery.naturalcrit.com/abc"]
+
+
+def test_empty_source_pages_are_retried(stub_server):
+    bodies = iter([b"", b"Homebrew text"])
+    stub_server.routes["/homebrewery.naturalcrit.com/source/abc"] = lambda headers: (
+        200,
+        {},
+        next(bodies),
+    )
+    link = stub_server.url("/homebrewery.naturalcrit.com/source/abc")
+
+    df = get_source_texts(
+        pd.DataFrame({"link": [link]}),
+        rate_limit=0,
+        domain_rate_limits={},
+        pass_attempts=5,
+    )
+
+    assert df["Text"].tolist() == ["Homebrew text"]
+    assert Counter(stub_server.paths()) == {
+        "/homebrewery.naturalcrit.com/source/abc": 2
+    }
+
+
+def test_circuit_opens_after_threshold_failures():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=30)
+
+    for _ in range(2):
+        breaker.record_failure("a.com")
+    assert breaker.retry_in("a.com") == 0
+
+    breaker.record_failure("a.com")
+    assert 29 < breaker.retry_in("a.com") <= 30
+    assert breaker.retry_in("b.com") == 0
+
+
+def test_circuit_stays_open_for_retry_after():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=1)
+
+    breaker.record_failure("a.com", retry_after=60)
+
+    assert 59 < breaker.retry_in("a.com") <= 60
+
+
+def test_half_open_circuit_reopens_after_one_failure():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=0.1)
+    for _ in range(3):
+        breaker.record_failure("a.com")
+
+    time.sleep(0.15)
+    assert breaker.retry_in("a.com") == 0
+
+    # The trial request fails
+    breaker.record_failure("a.com")
+    assert breaker.retry_in("a.com") > 0
+
+
+def test_success_closes_circuit():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=0.1)
+    for _ in range(3):
+        breaker.record_failure("a.com")
+
+    time.sleep(0.15)
+    breaker.record_success("a.com")
+
+    # Back to needing failure_threshold failures
+    for _ in range(2):
+        breaker.record_failure("a.com")
+    assert breaker.retry_in("a.com") == 0
+    breaker.record_failure("a.com")
+    assert breaker.retry_in("a.com") > 0
+
+
+def test_scheduler_waits_for_open_circuit():
+    calls = []
+
+    def task(url):
+        calls.append((url, time.monotonic() - start))
+        if url.startswith("https://a.com") and len(calls) <= 2:
+            raise ConnectionError("down")
+        return "text"
+
+    scheduler = RetryScheduler(
+        max_attempts=2,
+        base_delay=0.01,
+        circuit_breaker=CircuitBreaker(failure_threshold=2, cooldown=0.3),
+    )
+    start = time.monotonic()
+    attempts = scheduler.run(
+        ["https://a.com/1", "https://a.com/2", "https://b.com/1"],
+        task=task,
+        is_success=lambda result: result != "",
+        on_result=lambda url, result, n: None,
+    )
+
+    # The two failures open a.com's circuit, its retries wait for the cooldown
+    assert attempts == {"https://a.com/1": 2, "https://a.com/2": 2, "https://b.com/1": 1}
+    assert [url for url, _ in calls[:3]] == [
+        "https://a.com/1",
+        "https://a.com/2",
+        "https://b.com/1",
+    ]
+    # Other hosts are not held up
+    assert calls[2][1] < 0.2
+    assert all(t >= 0.29 for url, t in calls[3:])
@@ -0,0 +1,155 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src import scraping
+from src.preprocessing.text_cleaning.data_io import write_text_to_file
+from src.scraping import run_scrape_job
+from src.scraping_utils.journal import ScrapeJournal
+
+LINKS = ["a", "b", "c"]
+
+
+def page(text: str) -> bytes:
+    return f"<html><body>{text}</body></html>".encode()
+
+
+@pytest.fixture
+def job(stub_server, tmp_path):
+    """
+    Homebrewery source links served by the stub server (the KEEP rule, so each link
+    is requested once), with one UID per link.
+    """
+    for name in LINKS:
+        stub_server.routes[f"/homebrewery.naturalcrit.com/source/{name}"] = (
+            lambda headers, name=name: (200, {}, page(f"text {name}"))
+        )
+    df = pd.DataFrame(
+        {
+            "UID": [1, 2, 3],
+            "link": [
+                stub_server.url(f"/homebrewery.naturalcrit.com/source/{name}")
+                for name in LINKS
+            ],
+        }
+    )
+    text_dir = tmp_path / "texts"
+    text_dir.mkdir()
+
+    def run(**kwargs):
+        return run_scrape_job(
+            df,
+            journal_path=tmp_path / "journal.jsonl",
+            text_dir=text_dir,
+            rate_limit=0,
+            domain_rate_limits={},
+            **kwargs,
+        )
+
+    run.df = df
+    run.journal_path = tmp_path / "journal.jsonl"
+    run.text_dir = text_dir
+    return run
+
+
+def requested(stub_server):
+    return [path.rsplit("/", 1)[-1] for path in stub_server.paths()]
+
+
+def test_scrape_job_collects_texts(job, stub_server):
+    result = job()
+
+    assert result["Text"].to_list() == ["text a", "text b", "text c"]
+    assert result["src_url"].to_list() == job.df["link"].to_list()
+    assert sorted(p.name for p in job.text_dir.iterdir()) == [
+        "1.txt",
+        "2.txt",
+        "3.txt",
+    ]
+    assert requested(stub_server) == LINKS
+
+
+def test_scrape_job_resumes_after_interruption(job, stub_server, monkeypatch):
+    writes = []
+
+    def interrupt_second_write(uid, text, text_dir):
+        if writes:
+            raise KeyboardInterrupt
+        writes.append(uid)
+        write_text_to_file(uid, text, text_dir)
+
+    monkeypatch.setattr(scraping, "write_text_to_file", interrupt_second_write)
+    with pytest.raises(KeyboardInterrupt):
+        job()
+    monkeypatch.undo()
+    assert list(ScrapeJournal(job.journal_path).load()) == [job.df["link"][0]]
+
+    stub_server.requests.clear()
+    result = job()
+
+    assert requested(stub_server) == ["b", "c"]
+    assert result["Text"].to_list() == ["text a", "text b", "text c"]
+
+
+def test_scrape_job_ignores_truncated_journal_line(job, stub_server):
+    job()
+    records = job.journal_path.read_text().splitlines()
+    # A crash while writing the last record leaves part of a line behind
+    job.journal_path.write_text("\n".join(records[:2]) + "\n" + records[2][:20])
+
+    stub_server.requests.clear()
+    result = job()
+
+    assert requested(stub_server) == ["c"]
+    assert result["Text"].to_list() == ["text a", "text b", "text c"]
+    # The next record starts on a line of its own
+    records = ScrapeJournal(job.journal_path).load()
+    assert [r.ok for r in records.values()] == [True, True, True]
+
+
+def test_scrape_job_retries_only_failed_links(job, stub_server):
+    path_b = "/homebrewery.naturalcrit.com/source/b"
+    stub_server.routes[path_b] = lambda headers: (200, {}, page(""))
+    first = job()
+    assert first["Text"].to_list() == ["text a", "", "text c"]
+
+    stub_server.routes[path_b] = lambda headers: (200, {}, page("text b"))
+    stub_server.requests.clear()
+    second = job()
+
+    assert requested(stub_server) == ["b"]
+    assert second["Text"].to_list() == ["text a", "text b", "text c"]
+    records = ScrapeJournal(job.journal_path).load()
+    assert records[job.df["link"][1]].attempts == 2
+    assert records[job.df["link"][0]].attempts == 1
+
+
+def test_scrape_job_refetches_missing_text_files(job, stub_server):
+    job()
+    (job.text_dir / "1.txt").unlink()
+
+    stub_server.requests.clear()
+    job()
+
+    assert requested(stub_server) == ["a"]
+
+
+def test_write_text_to_file_replaces_without_leftovers(tmp_path):
+    write_text_to_file(7, "old", tmp_path)
+    write_text_to_file(7, "new", tmp_path)
+
+    assert [p.name for p in tmp_path.iterdir()] == ["7.txt"]
+    assert (tmp_path / "7.txt").read_text() == "new"
+
+
+def test_journal_keeps_latest_record(tmp_path):
+    journal = ScrapeJournal(tmp_path / "journal.jsonl")
+    journal.append("x", "", ok=False, attempts=1)
+    journal.append("x", "src", ok=True, attempts=2)
+
+    records = journal.load()
+
+    assert records["x"].ok and records["x"].attempts == 2
+    lines = (tmp_path / "journal.jsonl").read_text().splitlines()
+    assert [json.loads(line)["link"] for line in lines] == ["x", "x"]
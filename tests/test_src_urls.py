@@ -0,0 +1,169 @@
+import socket
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import scraping
+from src.review_newly_ingested import fix_and_fill_src_url
+from src.scraping import resolve_src_urls
+from src.scraping_utils import DomainRateLimiter, PageFetcher
+from src.scraping_utils.url_rules import (
+    apply_src_url_rule,
+    apply_src_url_rules,
+    match_src_url_rule,
+)
+
+GMB_PAGE = (
+    b'<html><body><a class="btn btn-default" title="View Source" '
+    b'href="https://www.gmbinder.com/share/-abc/source">Source</a></body></html>'
+)
+HB_PAGE = (
+    b'<html><body><a class="navItem teal" icon="fas fa-code" '
+    b'href="/source/xyz">Source</a></body></html>'
+)
+
+RULE_URLS = [
+    "https://www.gmbinder.com/share/-abc",
+    "https://homebrewery.naturalcrit.com/share/xyz",
+    "https://homebrewery.naturalcrit.com/source/xyz",
+    "https://homebrewery.naturalcrit.com/print/xyz",
+    "https://www.reddit.com/r/UnearthedArcana/comments/abc",
+    "https://docs.google.com/document/d/abc",
+]
+
+
+def unthrottled_fetcher() -> PageFetcher:
+    return PageFetcher(rate_limiter=DomainRateLimiter(default_rate_limit=0))
+
+
+def closed_port_url(path: str) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}{path}"
+
+
+def test_apply_src_url_rules():
+    urls = pd.Series(RULE_URLS, index=[10, 11, 12, 13, 14, 15], dtype=object)
+
+    src_urls = apply_src_url_rules(urls)
+
+    assert src_urls.index.equals(urls.index)
+    assert np.isnan(src_urls[10])  # GMBinder pages must be requested
+    assert src_urls[11] == "https://homebrewery.naturalcrit.com/source/xyz"
+    assert src_urls[12] == "https://homebrewery.naturalcrit.com/source/xyz"
+    assert np.isnan(src_urls[13])  # Other Homebrewery pages must be requested
+    assert src_urls[14] == ""
+    assert src_urls[15] == ""
+
+
+def test_apply_src_url_rules_matches_per_url_rules():
+    urls = pd.Series(RULE_URLS, dtype=object)
+
+    vectorised = apply_src_url_rules(urls)
+    per_url = [apply_src_url_rule(match_src_url_rule(url), url) for url in urls]
+
+    assert vectorised.where(vectorised.notna(), None).to_list() == per_url
+
+
+def test_resolve_src_urls(stub_server):
+    stub_server.routes["/gmbinder.com/share/-abc"] = lambda h: (200, {}, GMB_PAGE)
+    stub_server.routes["/gmbinder.com/share/-nobtn"] = lambda h: (200, {}, b"")
+    stub_server.routes["/homebrewery.naturalcrit.com/xyz"] = lambda h: (200, {}, HB_PAGE)
+    gmb = stub_server.url("/gmbinder.com/share/-abc")
+    no_btn = stub_server.url("/gmbinder.com/share/-nobtn")
+    hb = stub_server.url("/homebrewery.naturalcrit.com/xyz")
+    share = "https://homebrewery.naturalcrit.com/share/xyz"
+    urls = pd.Series(
+        [gmb, share, hb, gmb, np.nan, no_btn, "https://example.com/abc"],
+        index=list("abcdefg"),
+        name="link",
+    )
+
+    src_urls = resolve_src_urls(urls, fetcher=unthrottled_fetcher(), workers=2)
+
+    assert src_urls.index.equals(urls.index)
+    assert src_urls.name == "link"
+    assert src_urls["a"] == src_urls["d"] == "https://www.gmbinder.com/share/-abc/source"
+    assert src_urls["b"] == "https://homebrewery.naturalcrit.com/source/xyz"
+    assert src_urls["c"] == "https://homebrewery.naturalcrit.com/source/xyz"
+    assert pd.isna(src_urls["e"])
+    assert src_urls["f"] == no_btn  # No button, the page itself is the source
+    assert src_urls["g"] == ""
+    # Duplicates are requested once, rewritable URLs never
+    assert sorted(stub_server.paths()) == [
+        "/gmbinder.com/share/-abc",
+        "/gmbinder.com/share/-nobtn",
+        "/homebrewery.naturalcrit.com/xyz",
+    ]
+
+
+def test_resolve_src_urls_skips_known(stub_server):
+    gmb = stub_server.url("/gmbinder.com/share/-abc")
+    urls = pd.Series([gmb, gmb])
+
+    src_urls = resolve_src_urls(
+        urls, known={gmb: "known"}, fetcher=unthrottled_fetcher()
+    )
+
+    assert src_urls.to_list() == ["known", "known"]
+    assert stub_server.paths() == []
+
+
+def test_resolve_src_urls_failure_leaves_only_that_url_empty(stub_server):
+    stub_server.routes["/gmbinder.com/share/-abc"] = lambda h: (200, {}, GMB_PAGE)
+    stub_server.routes["/homebrewery.naturalcrit.com/xyz"] = lambda h: (200, {}, HB_PAGE)
+    urls = pd.Series(
+        [
+            closed_port_url("/gmbinder.com/share/-dead"),
+            stub_server.url("/gmbinder.com/share/-abc"),
+            stub_server.url("/homebrewery.naturalcrit.com/xyz"),
+        ]
+    )
+
+    src_urls = resolve_src_urls(urls, fetcher=unthrottled_fetcher(), workers=1)
+
+    assert src_urls.to_list() == [
+        "",
+        "https://www.gmbinder.com/share/-abc/source",
+        "https://homebrewery.naturalcrit.com/source/xyz",
+    ]
+
+
+def test_resolve_src_urls_default_fetcher_is_rate_limited(stub_server, monkeypatch):
+    # The shared unthrottled fetcher must not be used
+    monkeypatch.setattr(scraping, "DEFAULT_FETCHER", None)
+    paths = [f"/gmbinder.com/share/-{i}" for i in range(3)]
+    for path in paths:
+        stub_server.routes[path] = lambda h: (200, {}, GMB_PAGE)
+    urls = pd.Series([stub_server.url(path) for path in paths])
+
+    start = time.monotonic()
+    resolve_src_urls(urls, workers=3, rate_limit=0.2, domain_rate_limits={})
+
+    assert time.monotonic() - start >= 0.4
+    assert len(stub_server.paths()) == 3
+
+
+@pytest.mark.parametrize("has_src_url", [False, True])
+def test_fix_and_fill_src_url(stub_server, has_src_url):
+    stub_server.routes["/gmbinder.com/share/-abc"] = lambda h: (200, {}, GMB_PAGE)
+    gmb = stub_server.url("/gmbinder.com/share/-abc")
+    known = stub_server.url("/gmbinder.com/share/-known")
+    share = "https://homebrewery.naturalcrit.com/share/xyz"
+    metadata = pd.DataFrame({"link": [known], "src_url": ["known source"]})
+    data = pd.DataFrame({"link": [known, gmb, share]}, index=[5, 6, 7])
+    if has_src_url:
+        data["src_url"] = ["kept", np.nan, np.nan]
+
+    fix_and_fill_src_url(metadata, data, fetcher=unthrottled_fetcher())
+
+    expected_first = "kept" if has_src_url else "known source"
+    assert data["src_url"].to_list() == [
+        expected_first,
+        "https://www.gmbinder.com/share/-abc/source",
+        "https://homebrewery.naturalcrit.com/source/xyz",
+    ]
+    assert stub_server.paths() == ["/gmbinder.com/share/-abc"]
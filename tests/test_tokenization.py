@@ -0,0 +1,385 @@
+import random
+import string
+from functools import partial
+from typing import List
+
+import pandas as pd
+import pytest
+from nltk.tokenize import TreebankWordTokenizer
+
+from src.preprocessing import tokenization
+from src.preprocessing.tokenization import EmbeddingAwareTokenizer
+
+CORPUS = [
+    "The fire-ball spell deals fire damage to the goblin.",
+    "A fireball hits the goblin, the goblin's armour melts.",
+    "Cast fire-ball again: the goblins flee from the fireball!",
+]
+
+
+@pytest.fixture(autouse=True)
+def treebank_word_tokenize(monkeypatch):
+    # Splits like word_tokenize, without needing the punkt sentence tokenizer data
+    monkeypatch.setattr(
+        tokenization, "word_tokenize", TreebankWordTokenizer().tokenize
+    )
+
+
+def fitted_tokenizer(unknown_token: str = "<unk>") -> EmbeddingAwareTokenizer:
+    tokenizer = EmbeddingAwareTokenizer(
+        embedding_vocab=["Fire", "Ball", "Fireball", "Goblin", "Spell"],
+        min_counts_common_token=2,
+        min_subtoken_size=3,
+        max_subtokens=2,
+        unknown_token=unknown_token,
+    )
+    tokenizer.fit(CORPUS)
+    return tokenizer
+
+
+@pytest.fixture
+def tokenizer() -> EmbeddingAwareTokenizer:
+    return fitted_tokenizer()
+
+
+def stub_tagger(sents: List[List[str]]) -> List[List[tuple]]:
+    # Tags depend on the position in the text, i.e. on the context, like a real
+    # tagger's. Records the texts it is asked to tag.
+    stub_tagger.calls.append(sents)
+    return [
+        [(t, "NN" if i % 2 == 0 else "VB") for i, t in enumerate(tokens)]
+        for tokens in sents
+    ]
+
+
+stub_tagger.calls = []
+
+
+@pytest.fixture
+def pos_tokenizer(monkeypatch) -> EmbeddingAwareTokenizer:
+    # Without an unknown token, unknown tokens are replaced by their POS tag
+    stub_tagger.calls = []
+    tokenizer = fitted_tokenizer(unknown_token="")
+    monkeypatch.setattr(
+        tokenizer,
+        "_resolve_unknowns",
+        partial(tokenizer._resolve_unknowns, tagger=stub_tagger),
+    )
+    return tokenizer
+
+
+def test_vocab(tokenizer):
+    assert tokenizer.vocab == tokenizer.embedding_vocab | tokenizer.common_vocab
+    assert {"fireball", "goblin", "the"} <= tokenizer.vocab
+    assert tokenizer.vocab <= tokenizer.known_terms
+
+
+TEXTS = [
+    "The goblin casts fire-ball at 3 orcs.",
+    "Orcs flee; the wizard laughs at the orcs.",
+    "A wizard and 2 dragons, the 1st dragon sleeps.",
+    "",
+    "Dragons hoard gold. The goblin steals gold!",
+]
+
+
+def test_tokenize_batch_matches_tokenize(tokenizer):
+    batch = tokenizer.tokenize_batch(TEXTS)
+
+    assert batch == [tokenizer.tokenize(text) for text in TEXTS]
+    assert "<unk>" in batch[1]
+
+
+def test_tokenize_batch_matches_tokenize_with_pos_tags(pos_tokenizer):
+    one_by_one = fitted_tokenizer(unknown_token="")
+    one_by_one._resolve_unknowns = partial(
+        one_by_one._resolve_unknowns, tagger=stub_tagger
+    )
+
+    expected = [one_by_one.tokenize(text) for text in TEXTS]
+    n_calls = len(stub_tagger.calls)
+    stub_tagger.calls = []
+    batch = pos_tokenizer.tokenize_batch(TEXTS)
+
+    assert batch == expected
+    assert "<VB>" in batch[1] and n_calls > 1
+    assert pos_tokenizer.unknown_mappings == one_by_one.unknown_mappings
+    # One call for all texts with new unknown tokens
+    assert len(stub_tagger.calls) == 1
+
+
+def test_repeated_unknown_in_later_text_is_not_tagged(pos_tokenizer):
+    batch = pos_tokenizer.tokenize_batch(["the wizard laughs", "wizard the goblin"])
+
+    # The second text's only unknown token is resolved in the first text
+    assert stub_tagger.calls == [[["the", "wizard", "laughs"]]]
+    assert batch == [["the", "<VB>", "<NN>"], ["<VB>", "the", "goblin"]]
+
+
+def test_unknown_keeps_tag_from_earlier_text(pos_tokenizer):
+    batch = pos_tokenizer.tokenize_batch(["the wizard laughs", "wizard sleeps"])
+
+    # "wizard" would be tagged NN in the second text, it keeps its first tag
+    assert stub_tagger.calls == [[["the", "wizard", "laughs"], ["wizard", "sleeps"]]]
+    assert batch == [["the", "<VB>", "<NN>"], ["<VB>", "<VB>"]]
+
+    # Also across calls, without tagging again
+    stub_tagger.calls = []
+    assert pos_tokenizer.tokenize("wizard") == ["<VB>"]
+    assert stub_tagger.calls == []
+
+
+def test_unknown_token_skips_tagging(tokenizer):
+    def failing_tagger(sents):
+        raise AssertionError("Tagged with an unknown token set")
+
+    batch = tokenizer._resolve_unknowns(
+        [["the", "wizard"], ["wizard", "laughs"]], tagger=failing_tagger
+    )
+
+    assert batch == [["the", "<unk>"], ["<unk>", "<unk>"]]
+    assert tokenizer.unknown_mappings == {}
+
+
+def test_fit_clears_unknown_mappings(pos_tokenizer):
+    pos_tokenizer.tokenize("the wizard laughs")
+    assert pos_tokenizer.unknown_mappings == {"wizard": "<VB>", "laughs": "<NN>"}
+
+    pos_tokenizer.fit(["The wizard casts fire-ball.", "The wizard flees."])
+
+    assert pos_tokenizer.unknown_mappings == {}
+    assert pos_tokenizer.tokenize("the wizard laughs") == ["the", "wizard", "<NN>"]
+
+
+def transform_corpus() -> pd.Series:
+    texts = TEXTS * 4
+    return pd.Series(texts, index=range(100, 100 + 3 * len(texts), 3), name="text")
+
+
+def test_transform_with_workers_matches_serial(tokenizer):
+    corpus = transform_corpus()
+
+    serial = tokenizer.transform(corpus, workers=1)
+    parallel = fitted_tokenizer().transform(corpus, workers=2, chunk_size=3)
+
+    pd.testing.assert_series_equal(parallel, serial)
+    assert serial.index.equals(corpus.index)
+    assert serial.name == "text"
+
+
+def test_transform_with_workers_matches_serial_with_pos_tags(
+    pos_tokenizer, monkeypatch
+):
+    corpus = transform_corpus()
+    serial = pos_tokenizer.transform(corpus, workers=1)
+
+    # The workers tag with the module's pos_tag_sents
+    monkeypatch.setattr(tokenization, "pos_tag_sents", stub_tagger)
+    parallel_tokenizer = fitted_tokenizer(unknown_token="")
+    parallel = parallel_tokenizer.transform(corpus, workers=2, chunk_size=3)
+
+    pd.testing.assert_series_equal(parallel, serial)
+    assert parallel_tokenizer.unknown_mappings == pos_tokenizer.unknown_mappings
+
+
+def test_known_terms_rebuilt_after_fit_and_new_mappings():
+    tokenizer = EmbeddingAwareTokenizer(
+        embedding_vocab=["Fire", "Goblin"],
+        min_counts_common_token=2,
+        min_subtoken_size=3,
+        max_subtokens=2,
+    )
+    before = tokenizer.known_terms
+    assert before == {"fire", "goblin"}
+    assert tokenizer.known_terms is before
+
+    tokenizer.fit(CORPUS)
+    assert {"the", "fireball"} <= tokenizer.known_terms
+    assert tokenizer.known_terms == (
+        tokenizer.vocab | set(tokenizer.token_mappings)
+    )
+
+    tokenizer.token_mappings["fire-bolt"] = ["fire", "bolt"]
+    assert "fire-bolt" in tokenizer.known_terms
+    tokenizer.common_vocab.add("wizard")
+    assert "wizard" in tokenizer.known_terms
+
+
+# The merging and splitting of delimited tokens before they were vectorised, kept as
+# the reference for EmbeddingAwareTokenizer.map_delimited_tokens/map_delim_splits.
+# The subtoken count addition is fixed: it added a Series aligned on the split
+# token's index label, which made the subtokens' counts NaN.
+def reference_map_delimited_tokens(
+    tokenizer: EmbeddingAwareTokenizer, count_df: pd.DataFrame, delim: str
+) -> pd.DataFrame:
+    df = count_df.copy()
+    df["base_token"] = df["token"].str.replace(delim, "", regex=False)
+    embedding_vocab = tokenizer.embedding_vocab
+    df["is_known"] = df["token"].isin(embedding_vocab)
+    df = df[df["base_token"].str.len() > 1]
+    df = df.sort_values(by=["is_known", "count"], ascending=[False, False])
+    preferred_variations = df[
+        ~df["base_token"].duplicated(keep="first")
+        & df["base_token"].duplicated(keep=False)
+    ]["token"]
+
+    mappings = {}
+    for token in preferred_variations:
+        basic_token = token.replace(delim, "")
+        variant_mask = (df["base_token"] == basic_token) & (df["token"] != token)
+        variants = df.loc[variant_mask, "token"]
+        for v in variants:
+            mappings[v] = [token]
+
+    tokenizer.token_mappings.update(mappings)
+
+    df = df.groupby(["base_token"], as_index=False).agg(
+        {"count": "sum", "token": "first"}
+    )
+
+    return df
+
+
+def reference_map_delim_splits(
+    tokenizer: EmbeddingAwareTokenizer, count_df: pd.DataFrame, delim: str
+) -> pd.DataFrame:
+    df = count_df[count_df["token"].str.contains(delim, regex=False)].copy()
+    df["split_tokens"] = df["token"].str.split(delim, regex=False)
+    df["split_tokens"] = df["split_tokens"].map(
+        lambda tokens: [t for t in tokens if t != ""]
+    )
+    vocab = tokenizer.embedding_vocab.union(tokenizer.common_vocab)
+    df["valid_splits"] = df["split_tokens"].map(
+        lambda toks: sum([t in vocab for t in toks]) > 0
+    )
+
+    mappings = df[df["valid_splits"]].set_index("token")["split_tokens"].to_dict()
+    tokenizer.token_mappings.update(mappings)
+
+    count_df = count_df[~count_df["token"].isin([k for k in mappings.keys()])].copy()
+
+    for token, subtokens in mappings.items():
+        added_count = df[df["token"] == token]["count"].iloc[0]
+        subtoken_rows = count_df["token"].isin(subtokens)
+        count_df.loc[subtoken_rows, "count"] = (
+            count_df.loc[subtoken_rows, "count"] + added_count
+        )
+
+    return count_df
+
+
+def synthetic_count_df(n_words: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A count frame as get_count_df() returns, of random words with delimited
+    variations (e.g. "fire-ball" and "fireball") and delimited compounds of words
+    (e.g. "fire-goblin"), with repeated counts so that ties are sorted too.
+    """
+    rng = random.Random(seed)
+
+    def word() -> str:
+        return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+
+    words: List[str] = [word() for _ in range(n_words)]
+    tokens = set(words)
+    for w in words:
+        for delim in rng.sample(["-", "'", "."], k=rng.randint(0, 2)):
+            cut = rng.randint(1, len(w) - 1)
+            tokens.add(w[:cut] + delim + w[cut:])
+        if rng.random() < 0.3:
+            tokens.add(rng.choice(["-", "'", "."]).join([w, rng.choice(words)]))
+    tokens = sorted(tokens)
+    counts = [rng.randint(1, 20) for _ in tokens]
+    return pd.DataFrame({"token": tokens, "count": counts})
+
+
+def synthetic_tokenizer(
+    count_df: pd.DataFrame, seed: int = 0
+) -> EmbeddingAwareTokenizer:
+    # A fifth of the tokens are in the embedding vocabulary
+    rng = random.Random(seed)
+    tokens = count_df["token"].tolist()
+    return EmbeddingAwareTokenizer(
+        embedding_vocab=rng.sample(tokens, k=len(tokens) // 5),
+        min_counts_common_token=2,
+        min_subtoken_size=3,
+        max_subtokens=2,
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_delimiter_steps_match_reference(seed):
+    # The delimiter steps of fit(), on a synthetic vocabulary
+    count_df = synthetic_count_df(500, seed=seed)
+    tokenizer = synthetic_tokenizer(count_df, seed=seed)
+    reference = synthetic_tokenizer(count_df, seed=seed)
+
+    merged, ref_merged = count_df, count_df
+    for d in ["-", "'", "."]:
+        merged = tokenizer.map_delimited_tokens(merged, delim=d)
+        ref_merged = reference_map_delimited_tokens(reference, ref_merged, delim=d)
+        pd.testing.assert_frame_equal(merged, ref_merged)
+    assert list(tokenizer.token_mappings.items()) == list(
+        reference.token_mappings.items()
+    )
+
+    tokenizer.common_vocab.update(merged[merged["count"] >= 2]["token"])
+    reference.common_vocab.update(ref_merged[ref_merged["count"] >= 2]["token"])
+    split, ref_split = merged, ref_merged
+    for d in ["-", "'", "."]:
+        split = tokenizer.map_delim_splits(split, delim=d)
+        ref_split = reference_map_delim_splits(reference, ref_split, delim=d)
+        pd.testing.assert_frame_equal(split, ref_split)
+    assert len(tokenizer.token_mappings) > len(count_df) // 10
+    assert list(tokenizer.token_mappings.items()) == list(
+        reference.token_mappings.items()
+    )
+
+
+def test_delim_splits_without_delimited_tokens(tokenizer):
+    count_df = pd.DataFrame({"token": ["fire", "ball"], "count": [1, 2]})
+
+    split = tokenizer.map_delim_splits(count_df, delim="-")
+
+    pd.testing.assert_frame_equal(split, count_df)
+
+
+def line_tokenize(text: str) -> List[str]:
+    # Like word_tokenize, which splits sentences first, each line is tokenized on
+    # its own, so joining texts by newlines does not change their tokens
+    treebank = TreebankWordTokenizer()
+    return [t for line in text.split("\n") for t in treebank.tokenize(line)]
+
+
+def test_streamed_counts_equal_string_counts(tokenizer):
+    texts = CORPUS + TEXTS
+
+    from_string = tokenizer.get_count_df("\n".join(texts), tokenizer=line_tokenize)
+    streamed = tokenizer.get_count_df(
+        (text for text in texts), tokenizer=line_tokenize
+    )
+
+    pd.testing.assert_frame_equal(streamed, from_string)
+    assert from_string.set_index("token")["count"]["goblin"] == 5
+
+
+def test_fit_streams_the_corpus(monkeypatch):
+    monkeypatch.setattr(tokenization, "word_tokenize", line_tokenize)
+    corpora = []
+    get_count_df = EmbeddingAwareTokenizer.get_count_df
+
+    def spy(self, corpus, tokenizer):
+        corpora.append(corpus)
+        return get_count_df(self, corpus, tokenizer)
+
+    monkeypatch.setattr(EmbeddingAwareTokenizer, "get_count_df", spy)
+    texts = pd.Series(CORPUS + TEXTS)
+
+    streamed = EmbeddingAwareTokenizer(["Fire", "Goblin"], 2, 3, 2, "<unk>")
+    streamed.fit_transform(texts)
+    joined = EmbeddingAwareTokenizer(["Fire", "Goblin"], 2, 3, 2, "<unk>")
+    joined.fit("\n".join(texts))
+
+    # The texts are passed on as they are, not joined into one string
+    assert corpora[0] is texts
+    assert streamed.common_vocab == joined.common_vocab
+    assert streamed.token_mappings == joined.token_mappings